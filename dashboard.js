@@ -2,7 +2,10 @@
    Stabilized loader and initialization for Five Forks dashboard.
    - Loads counties from data/counties.json with exponential-backoff retry and fallback list.
    - Initializes map (Leaflet) and attaches a tile fallback handler.
-   - Creates basic county cards and map markers.
+   - Creates basic county cards and map markers, keeping cards pre-rendered
+     into index.html by scripts/prerender.py (no counties.json wait on load).
+   - Brings the cards up to date from the counties delta feed
+     (scripts/delta-client.js) on load and on refresh.
    - Defensive DOM wiring for toggles and refresh.
 */
 
@@ -49,6 +52,46 @@ function loadCountyList(maxRetries = 3) {
   return tryFetch();
 }
 
+// Cards pre-rendered by scripts/prerender.py carry the county list
+function prerenderedCounties() {
+  const cards = document.querySelectorAll('#countyGrid .county-card[data-prerendered]');
+  return Array.from(cards).map(card => ({
+    name: card.dataset.county,
+    lat: Number(card.dataset.lat),
+    lon: Number(card.dataset.lon),
+    dangerClass: Number(card.dataset.danger) || null
+  }));
+}
+
+/* ========= Precomputed fuel moisture (written by fuel_moisture.py) ========= */
+let FUEL_MOISTURE = null;
+
+function loadFuelMoisture() {
+  return fetch('data/fuel_moisture.json', { cache: 'no-cache' })
+    .then(r => (r.ok ? r.json() : null))
+    .then(json => {
+      FUEL_MOISTURE = json;
+      return json;
+    })
+    .catch(err => {
+      console.warn('fuel_moisture.json not available:', err);
+      return null;
+    });
+}
+
+// Current-hour and minimum 1-hr fuel moisture for a county, or null
+function fuelMoistureText(name) {
+  const entry = FUEL_MOISTURE && FUEL_MOISTURE.counties && FUEL_MOISTURE.counties[name];
+  if (!entry || !entry['1hr'] || !entry['1hr'].length) return null;
+  const hour = Math.floor((Date.now() - Date.parse(FUEL_MOISTURE.start)) / 3600000);
+  const series = entry['1hr'];
+  const now = series[Math.max(0, Math.min(series.length - 1, hour))];
+  if (now === null || now === undefined) return null;   // forecast not fetched for this county
+  let text = `1-hr fuel: ${now}% (7-day min ${entry.min1hr}%)`;
+  if (entry.firstCritical1hr !== null && entry.firstCritical1hr !== undefined) text += ' ⚠️';
+  return text;
+}
+
 /* ========= Map initialization & tile fallback ========= */
 let mapInstance = null;
 let markersLayer = null;
@@ -94,10 +137,8 @@ function attachTileFallback(tileLayer, map) {
           attribution: '&copy; OpenStreetMap contributors',
           maxZoom: 19
         });
-        // remove existing tile layers
-        map.eachLayer(layer => {
-          if (layer instanceof L.TileLayer) map.removeLayer(layer);
-        });
+        // replace the failing base layer (overlay tile layers stay)
+        map.removeLayer(tileLayer);
         fallback.addTo(map);
       } catch (e) {
         console.error('Error switching to fallback tiles', e);
@@ -106,10 +147,59 @@ function attachTileFallback(tileLayer, map) {
   });
 }
 
+// Interpolated danger-class surface written by spatial_interp.py
+function addDangerOverlay(map) {
+  if (!map) return;
+  fetch('data/danger_grid.json', { cache: 'no-cache' })
+    .then(r => (r.ok ? r.json() : null))
+    .then(meta => {
+      if (!meta || !meta.image || !meta.bounds) return;
+      L.imageOverlay(meta.image, meta.bounds, { opacity: 0.35, interactive: false }).addTo(map);
+    })
+    .catch(err => console.warn('danger_grid.json not available:', err));
+}
+
+// FRP / detection-density heat tiles written by heat_raster.py (toggled from the layer control)
+const EMPTY_TILE = 'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
+
+function addHeatLayers(map) {
+  if (!map) return;
+  fetch('data/heat/index.json', { cache: 'no-cache' })
+    .then(r => (r.ok ? r.json() : null))
+    .then(index => {
+      if (!index || !index.bounds || index.format !== 'png') return;
+      const labels = { frp: 'Fire intensity (FRP)', density: 'Detection density' };
+      const overlays = {};
+      Object.entries(index.layers).forEach(([name, layer]) => {
+        const present = new Set();
+        Object.entries(layer.tiles).forEach(([z, list]) => list.forEach(t => present.add(`${z}/${t}`)));
+        // Only request tiles that exist; empty areas get a blank image
+        const HeatLayer = L.TileLayer.extend({
+          getTileUrl(coords) {
+            return present.has(`${coords.z}/${coords.x}/${coords.y}`)
+              ? L.TileLayer.prototype.getTileUrl.call(this, coords) : EMPTY_TILE;
+          }
+        });
+        overlays[labels[name] || name] = new HeatLayer(layer.url, {
+          minNativeZoom: index.minZoom,
+          maxNativeZoom: index.maxZoom,
+          opacity: 0.8,
+          updateWhenZooming: false
+        });
+      });
+      L.control.layers(null, overlays, { position: 'topright', collapsed: true }).addTo(map);
+    })
+    .catch(err => console.warn('heat index not available:', err));
+}
+
 /* ========= UI helpers: county cards & markers ========= */
+// Marker fill per danger class (as the danger grid overlay, spatial_interp.py)
+const DANGER_COLORS = { 1: '#4caf50', 2: '#ffeb3b', 3: '#ff9800', 4: '#f44336', 5: '#8b0000' };
+
 function clearCountyCards() {
   const grid = document.getElementById('countyGrid');
-  if (grid) grid.innerHTML = '';
+  // Pre-rendered cards stay; they are updated in place
+  if (grid && !grid.querySelector('.county-card[data-prerendered]')) grid.innerHTML = '';
 }
 
 function createCountyCard(county) {
@@ -125,9 +215,11 @@ function createCountyCard(county) {
 
 function addCountyMarker(county) {
   if (!mapInstance || !markersLayer) return;
+  const card = prerenderedCounties().find(p => p.name === county.name);
+  const danger = county.dangerClass || (card && card.dangerClass);
   const marker = L.circleMarker([county.lat, county.lon], {
     radius: 7,
-    fillColor: '#ff7800',
+    fillColor: DANGER_COLORS[danger] || '#ff7800',
     color: '#000',
     weight: 1,
     opacity: 1,
@@ -137,6 +229,43 @@ function addCountyMarker(county) {
   markersLayer.addLayer(marker);
 }
 
+/* ========= Counties delta feed (delta_feed.py via scripts/delta-client.js) ========= */
+const DANGER_NAMES = { 1: 'Low', 2: 'Moderate', 3: 'High', 4: 'Very High', 5: 'Extreme' };
+const fmt = v => (v === null || v === undefined ? '–' : v);
+
+// Apply one county record newer than what the card shows (same text as scripts/prerender.py)
+function updateCountyCard(rec, seq) {
+  const card = Array.from(document.querySelectorAll('#countyGrid .county-card[data-county]'))
+    .find(c => c.dataset.county === rec.name);
+  if (!card || Number(card.dataset.seq || 0) >= seq) return;
+  card.dataset.seq = seq;
+  const danger = DANGER_NAMES[rec.dangerClass] ? rec.dangerClass : '';
+  card.dataset.danger = danger;
+  card.classList.remove('danger-1', 'danger-2', 'danger-3', 'danger-4', 'danger-5');
+  if (danger) card.classList.add(`danger-${danger}`);
+  const dangerLine = card.querySelector('.danger');
+  if (dangerLine) dangerLine.textContent = danger ? `Class ${danger} · ${DANGER_NAMES[danger]}` : '';
+  const obs = card.querySelector('.obs');
+  if (obs) {
+    let wind = `Wind ${fmt(rec.wind)} mph`;
+    if (rec.gust) wind += ` (gust ${rec.gust})`;
+    obs.textContent = rec.temp === null || rec.temp === undefined ? '' : `${rec.temp}°F · RH ${fmt(rec.rh)}% · ${wind}`;
+  }
+}
+
+function syncCountyCards() {
+  if (typeof syncFeed !== 'function') return Promise.resolve(null);
+  return syncFeed('counties')
+    .then(state => {
+      Object.values(state.records).forEach(rec => updateCountyCard(rec, state.seq));
+      return state;
+    })
+    .catch(err => {
+      console.warn('counties feed not available:', err);
+      return null;
+    });
+}
+
 /* loadCountyData performs the UI population using COUNTIES */
 function loadCountyData() {
   try {
@@ -148,12 +277,14 @@ function loadCountyData() {
     }
 
     COUNTIES.forEach(c => {
-      const card = createCountyCard(c);
-      grid.appendChild(card);
+      const existing = Array.from(grid.querySelectorAll('.county-card[data-prerendered]'))
+        .find(card => card.dataset.county === c.name);
+      const card = existing || grid.appendChild(createCountyCard(c));
       // populate placeholder data; real API fetch logic can be added here
       setTimeout(() => {
         const status = card.querySelector('.status');
-        if (status) status.textContent = 'Data: not fetched in this build';
+        const text = fuelMoistureText(c.name);
+        if (status && (text || !existing)) status.textContent = text || 'Data: not fetched in this build';
       }, 0);
 
       // Add marker on map
@@ -177,7 +308,7 @@ function refreshData() {
 
 function attemptRefresh() {
   refreshAttempts++;
-  loadCountyList().then(() => {
+  Promise.all([loadCountyList(), syncCountyCards()]).then(() => {
     // clear and repopulate markers/cards
     if (markersLayer) markersLayer.clearLayers();
     loadCountyData();
@@ -215,11 +346,23 @@ function toggleTheme() {
 /* ========= Initialization: ensure counties loaded before populating UI ========= */
 document.addEventListener('DOMContentLoaded', function() {
   initTheme();
-  initMap();
+  const map = initMap();
+  addDangerOverlay(map);
+  addHeatLayers(map);
 
-  loadCountyList().then(() => {
-    loadCountyData();
-  });
+  const prerendered = prerenderedCounties();
+  if (prerendered.length) {
+    // Cards are already on the page; apply newer feed records, then add
+    // markers and refresh the fuel line
+    Promise.all([loadFuelMoisture(), syncCountyCards()]).then(() => {
+      COUNTIES = prerenderedCounties();
+      loadCountyData();
+    });
+  } else {
+    Promise.all([loadCountyList(), loadFuelMoisture()]).then(() => {
+      loadCountyData();
+    });
+  }
 
   // Defensive event wiring
   const themeToggle = document.getElementById('themeToggle');
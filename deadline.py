@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Run-level deadline budget shared by the fetchers
+An entry point calls start() once with its default budget (FIREWX_DEADLINE,
+in seconds, overrides it; 0 disables). From then on:
+
+- every HTTP call asks timeout(cap) for its timeout, which is the smaller
+  of its usual cap and the time left in the run
+- retries and polite sleeps are clipped to the time left
+- once the budget is spent, timeout() and check() raise DeadlineExceeded
+  so loops stop starting new work; worker pools cancel queued tasks
+
+Fetchers catch DeadlineExceeded at the top of their loops and publish what
+they have, flagging whatever could not be refreshed as stale.
+
+Without start() nothing is bounded and timeout(cap) simply returns cap, so
+library use (tests, the backfill) behaves as before.
+"""
+import os
+import threading
+import time
+
+# Don't start a request with less than this many seconds left
+MIN_CALL_TIMEOUT = 1.0
+
+_expires = None                 # time.monotonic() value, or None when unbounded
+_cancelled = threading.Event()
+
+
+class DeadlineExceeded(Exception):
+    """The run's time budget is spent; `partial` holds any results so far"""
+
+    def __init__(self, message="run deadline exceeded", partial=None):
+        super().__init__(message)
+        self.partial = partial
+
+
+def start(default=None):
+    """Start the run clock; returns the budget in seconds (None = unbounded)"""
+    global _expires
+    env = os.environ.get("FIREWX_DEADLINE", "").strip()
+    try:
+        seconds = float(env) if env else default
+    except ValueError:
+        seconds = default
+    _cancelled.clear()
+    _expires = time.monotonic() + seconds if seconds and seconds > 0 else None
+    if _expires is not None:
+        print(f"⏱  Run budget: {seconds:.0f} s")
+    return seconds if _expires is not None else None
+
+
+def clear():
+    """Remove the deadline (back to unbounded)"""
+    global _expires
+    _expires = None
+    _cancelled.clear()
+
+
+def cancel():
+    """Stop cooperative work now, as if the deadline had passed"""
+    _cancelled.set()
+
+
+def remaining():
+    """Seconds left in the run (None when unbounded, 0 once expired)"""
+    if _cancelled.is_set():
+        return 0.0
+    if _expires is None:
+        return None
+    return max(0.0, _expires - time.monotonic())
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check():
+    """Raise DeadlineExceeded once the budget is spent"""
+    if expired():
+        raise DeadlineExceeded()
+
+
+def timeout(cap):
+    """Timeout for one call: min(cap, time left); raises when too little is left"""
+    left = remaining()
+    if left is None:
+        return cap
+    if left < MIN_CALL_TIMEOUT:
+        raise DeadlineExceeded()
+    return min(cap, left)
+
+
+def sleep(seconds):
+    """time.sleep clipped to the budget (returns early on cancel)"""
+    left = remaining()
+    _cancelled.wait(seconds if left is None else min(seconds, left))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Versioned delta feeds for the published snapshots
+Each writer (fetch_firms, fetch_weather) hands its records to
+stage() along with a key function. stage() diffs them against the previous
+run and returns the next sequence number; once the snapshot carrying it is
+written, commit() writes (when anything changed):
+
+  data/deltas/<feed>/delta-<seq>.json   added / removed / changed records
+  data/deltas/<feed>/latest.json        current seq, snapshot path, delta range
+  data/deltas/<feed>/state.json         last published records (for the next diff)
+
+A client holding seq S fetches latest.json. If S + 1 is still within the
+retained delta range it applies delta-(S+1) .. delta-(seq) in order;
+otherwise it reloads the full snapshot, which carries its own "seq".
+"""
+import json
+import os
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DELTA_ROOT = os.path.join(REPO_ROOT, "data", "deltas")
+
+# Deltas kept per feed (4 runs/day x 12 days for the 6-hourly writers)
+RETAIN = 48
+
+
+def hotspot_key(h):
+    return (f"{h['latitude']:.4f},{h['longitude']:.4f},"
+            f"{h.get('acq_date', '')},{h.get('acq_time', '')},{h.get('satellite', '')}")
+
+
+def county_key(c):
+    return c["name"]
+
+
+def _write_json(path, obj, **kwargs):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, **kwargs)
+    os.replace(tmp, path)
+
+
+def diff_records(previous, current):
+    """Split keyed record maps into (added, removed keys, changed)"""
+    added = [rec for key, rec in current.items() if key not in previous]
+    removed = [key for key in previous if key not in current]
+    changed = [rec for key, rec in current.items()
+               if key in previous and previous[key] != rec]
+    return added, removed, changed
+
+
+class Pending:
+    """
+    The next delta for a feed, computed but not yet written
+    `seq` is the number the snapshot must carry; call commit() only after
+    the snapshot has been written, so latest.json never points clients at
+    a sequence number no snapshot has.
+    """
+
+    def __init__(self, feed, feed_dir, snapshot, state, current, retain):
+        self.feed = feed
+        self.feed_dir = feed_dir
+        self.snapshot = snapshot
+        self.state = state
+        self.current = current
+        self.retain = retain
+        self.added, self.removed, self.changed = diff_records(state["records"], current)
+        self.changed_any = bool(self.added or self.removed or self.changed) or state["seq"] == 0
+        self.seq = state["seq"] + 1 if self.changed_any else state["seq"]
+
+    def commit(self):
+        """Write the delta, trim old ones and advance latest.json; returns seq"""
+        if not self.changed_any:
+            return self.seq
+        seq, feed_dir = self.seq, self.feed_dir
+        now = datetime.utcnow().isoformat() + "Z"
+        _write_json(os.path.join(feed_dir, f"delta-{seq}.json"), {
+            "feed": self.feed,
+            "seq": seq,
+            "base": seq - 1,
+            "generated": now,
+            "added": self.added,
+            "removed": self.removed,
+            "changed": self.changed,
+        }, separators=(",", ":"))
+
+        first = self.state.get("first", 1)
+        while seq - first >= self.retain:
+            stale = os.path.join(feed_dir, f"delta-{first}.json")
+            if os.path.exists(stale):
+                os.remove(stale)
+            first += 1
+
+        _write_json(os.path.join(feed_dir, "state.json"),
+                    {"seq": seq, "first": first, "records": self.current},
+                    separators=(",", ":"))
+        _write_json(os.path.join(feed_dir, "latest.json"), {
+            "feed": self.feed,
+            "seq": seq,
+            "generated": now,
+            "snapshot": self.snapshot,
+            "deltas": {"first": first, "last": seq},
+            "counts": {"added": len(self.added), "removed": len(self.removed),
+                       "changed": len(self.changed)},
+        }, indent=2)
+        print(f"  Δ {self.feed} seq {seq}: +{len(self.added)} -{len(self.removed)} ~{len(self.changed)}")
+        return seq
+
+
+def stage(feed, records, key_fn, snapshot, root=DELTA_ROOT, retain=RETAIN):
+    """
+    Diff `records` against the last published state
+    Returns a Pending whose `seq` the snapshot should carry (unchanged when
+    nothing differs); write the snapshot, then call commit().
+    """
+    feed_dir = os.path.join(root, feed)
+    os.makedirs(feed_dir, exist_ok=True)
+    try:
+        with open(os.path.join(feed_dir, "state.json"), "r") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {"seq": 0, "first": 1, "records": {}}
+    current = {key_fn(r): r for r in records}
+    return Pending(feed, feed_dir, snapshot, state, current, retain)
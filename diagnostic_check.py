@@ -1,12 +1,37 @@
 #!/usr/bin/env python3
 """
 Diagnostic Check Script for Virginia Fire Season Dashboard
-Checks county correctness and color logic in dashboard.js
+Single-pass consistency validator for the front-end assets and data files
+
+Every JS, HTML, CSS and data JSON file is tokenized once (string literals,
+HTML text/attributes, CSS selectors, JSON strings) and the tokens run through
+one Aho-Corasick automaton of Virginia county names. Per-file results are
+cached in data/diagnostic_cache.json keyed by the file's SHA-256, so an
+unchanged tree re-validates without tokenizing anything.
+
+Cross-checks:
+- the district county set agrees across data/data/counties.json,
+  fetch_weather.COUNTIES, forecasts/forecast_data.json, county_data.json,
+  dashboard.js and scripts/forecast.js
+- every "<Name> County" literal names a real Virginia county
+- danger-class CSS classes used by scripts/pages are defined in a stylesheet,
+  and classes 1-5 each have a style
+- local asset paths referenced by scripts/pages exist
+
+Only the standard library is used, so `firewx diagnose` stays a light command.
 """
 
-import re
+import ast
+import glob
+import hashlib
+import json
+import os
 import sys
-from pathlib import Path
+from html.parser import HTMLParser
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(REPO_ROOT, "data", "diagnostic_cache.json")
+CACHE_VERSION = 1
 
 # Virginia counties (official list)
 VIRGINIA_COUNTIES = {
@@ -28,52 +53,480 @@ VIRGINIA_COUNTIES = {
     'Washington', 'Westmoreland', 'Wise', 'Wythe', 'York'
 }
 
-def check_dashboard_js():
-    """Check dashboard.js for county and color logic issues"""
-    dashboard_path = Path('dashboard.js')
-    
-    if not dashboard_path.exists():
-        print("❌ ERROR: dashboard.js not found")
-        return False
-    
-    content = dashboard_path.read_text()
-    issues = []
-    
-    # Extract county names from dashboard.js
-    county_pattern = r'["\']([A-Z][a-z]+(\s+[A-Z][a-z]+)*)["\']'
-    found_counties = set(re.findall(county_pattern, content))
-    found_counties = {c[0] for c in found_counties if c[0] in VIRGINIA_COUNTIES}
-    
-    # Check for missing counties
-    missing = VIRGINIA_COUNTIES - found_counties
-    if missing:
-        issues.append(f"⚠️  Missing counties: {', '.join(sorted(missing))}")
-    
-    # Check color logic patterns
-    color_checks = [
-        (r'level\s*===?\s*["\']4["\']', 'Level 4 (Red)'),
-        (r'level\s*===?\s*["\']3["\']', 'Level 3 (Orange)'),
-        (r'level\s*===?\s*["\']2["\']', 'Level 2 (Yellow)'),
-        (r'level\s*===?\s*["\']1["\']', 'Level 1 (Green)'),
-    ]
-    
-    for pattern, desc in color_checks:
-        if not re.search(pattern, content):
-            issues.append(f"⚠️  Missing color logic: {desc}")
-    
-    # Report results
-    if issues:
-        print("\n⚠️  DIAGNOSTIC ISSUES FOUND:")
-        for issue in issues:
-            print(f"  {issue}")
-        print(f"\n📊 Total counties found: {len(found_counties)}/{len(VIRGINIA_COUNTIES)}")
+# Files validated (repo-relative globs)
+ASSET_GLOBS = ("*.js", "scripts/*.js", "*.html", "partials/*.html", "forecasts/*.html",
+               "briefs/index.html", "*.css")
+DATA_GLOBS = ("*.json", "data/*.json", "data/data/*.json", "forecasts/*.json",
+              "api/*.json", "api/**/*.json")
+EXCLUDE = {"data/diagnostic_cache.json", "data/brief_archive.json",
+           "data/brief_archive_cache.json", "package.json", "package-lock.json"}
+
+# Where each source of the district county list lives
+CANONICAL_COUNTIES = "data/data/counties.json"
+FETCH_WEATHER = "fetch_weather.py"
+
+# Pipeline outputs that a fresh checkout may not have yet
+GENERATED = {"data/danger_grid.json", "data/danger_grid.png", "data/fuel_moisture.json",
+             "data/drought_state.json", "data/observations.db", "data/firms_archive.json"}
+
+DANGER_CLASS_PREFIXES = ("class-", "level-")
+ASSET_EXTENSIONS = (".js", ".css", ".html", ".json", ".geojson", ".png", ".svg")
+
+
+# ---------------------------------------------------------------------------
+# County name automaton
+# ---------------------------------------------------------------------------
+
+class CountyAutomaton:
+    """Aho-Corasick automaton over county names (one scan finds every name)"""
+
+    def __init__(self, names):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]          # longest name ending at this state
+        for name in names:
+            state = 0
+            for ch in name:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                state = nxt
+            self.out[state] = name
+        # Breadth-first fail links; out[] falls back to the longest suffix match
+        queue = list(self.goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                if self.out[nxt] is None:
+                    self.out[nxt] = self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """[(start, end, name)] of word-bounded matches, longest first at overlaps"""
+        hits = []
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            s = state
+            while s and out[s] is not None:
+                name = out[s]
+                start = i + 1 - len(name)
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    hits.append((start, i + 1, name))
+                    break
+                s = fail[s]
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        kept, last_end = [], -1
+        for h in hits:
+            if h[0] >= last_end:
+                kept.append(h)
+                last_end = h[1]
+        return kept
+
+
+_AUTOMATON = None
+
+
+def automaton():
+    global _AUTOMATON
+    if _AUTOMATON is None:
+        _AUTOMATON = CountyAutomaton(sorted(VIRGINIA_COUNTIES))
+    return _AUTOMATON
+
+
+# ---------------------------------------------------------------------------
+# Tokenizers (one pass per file)
+# ---------------------------------------------------------------------------
+
+def js_strings(text):
+    """String and template literal contents of JS source (comments skipped)"""
+    out = []
+    i, n = 0, len(text)
+    prev = ""                       # last significant character (regex vs divide)
+    while i < n:
+        ch = text[i]
+        if ch == "/" and i + 1 < n and text[i + 1] == "/":
+            i = text.find("\n", i)
+            i = n if i < 0 else i
+            continue
+        if ch == "/" and i + 1 < n and text[i + 1] == "*":
+            i = text.find("*/", i + 2)
+            i = n if i < 0 else i + 2
+            continue
+        if ch in "'\"`":
+            j = i + 1
+            buf = []
+            while j < n and text[j] != ch:
+                if text[j] == "\\" and j + 1 < n:
+                    buf.append(text[j + 1])
+                    j += 2
+                    continue
+                if ch != "`" and text[j] == "\n":
+                    break
+                buf.append(text[j])
+                j += 1
+            out.append("".join(buf))
+            i = j + 1
+            prev = ch
+            continue
+        if ch == "/" and (prev == "" or prev in "(,=:[!&|?{};+-*%<>~^"):
+            # regex literal: skip to the closing slash outside a character class
+            j, in_class = i + 1, False
+            while j < n and text[j] != "\n":
+                c = text[j]
+                if c == "\\":
+                    j += 2
+                    continue
+                if c == "[":
+                    in_class = True
+                elif c == "]":
+                    in_class = False
+                elif c == "/" and not in_class:
+                    break
+                j += 1
+            i = j + 1
+            prev = "/"
+            continue
+        if not ch.isspace():
+            prev = ch
+        i += 1
+    return out
+
+
+def css_classes(text):
+    """Class names used in CSS selectors (declaration blocks skipped)"""
+    classes = set()
+    chunks, i = [], 0
+    while True:                     # drop comments
+        j = text.find("/*", i)
+        if j < 0:
+            chunks.append(text[i:])
+            break
+        chunks.append(text[i:j])
+        k = text.find("*/", j + 2)
+        i = len(text) if k < 0 else k + 2
+    text = "".join(chunks)
+    # A run of text ending in "{" is a rule prelude (selector or @media ...);
+    # one ending in "}" is a declaration block
+    start = 0
+    for pos, ch in enumerate(text):
+        if ch not in "{}":
+            continue
+        if ch == "{":
+            prelude = text[start:pos].rsplit(";", 1)[-1]
+            k = prelude.find(".")
+            while k >= 0:
+                j = k + 1
+                while j < len(prelude) and (prelude[j].isalnum() or prelude[j] in "-_"):
+                    j += 1
+                if j > k + 1 and not prelude[k + 1].isdigit():
+                    classes.add(prelude[k + 1:j])
+                k = prelude.find(".", j)
+        start = pos + 1
+    return classes
+
+
+class _PageTokens(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.texts, self.scripts, self.styles = [], [], []
+        self.class_uses, self.links = set(), []
+        self._in = None
+
+    def handle_starttag(self, tag, attrs):
+        self._in = tag if tag in ("script", "style") else None
+        for key, value in attrs:
+            if value is None:
+                continue
+            if key == "class":
+                self.class_uses.update(value.split())
+            elif key in ("src", "href"):
+                self.links.append(value)
+            elif key not in ("style",):
+                self.texts.append(value)
+
+    def handle_endtag(self, tag):
+        self._in = None
+
+    def handle_data(self, data):
+        if self._in == "script":
+            self.scripts.append(data)
+        elif self._in == "style":
+            self.styles.append(data)
+        elif data.strip():
+            self.texts.append(data.strip())
+
+
+def json_strings(obj, out):
+    """Every string (keys and values) in a parsed JSON document"""
+    if isinstance(obj, str):
+        out.append(obj)
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            out.append(k)
+            json_strings(v, out)
+    elif isinstance(obj, list):
+        for v in obj:
+            json_strings(v, out)
+    return out
+
+
+def _is_asset_path(s):
+    return (s.endswith(ASSET_EXTENSIONS) and "://" not in s and "${" not in s
+            and " " not in s and not s.startswith(("//", "data:", "#")) and len(s) < 200)
+
+
+def analyze(rel_path, text):
+    """Tokenize one file and return its JSON-serializable findings"""
+    ext = os.path.splitext(rel_path)[1]
+    tokens, class_uses, class_defs, links, parse_error = [], set(), set(), [], None
+    if ext == ".js":
+        tokens = js_strings(text)
+    elif ext == ".html":
+        page = _PageTokens()
+        page.feed(text)
+        page.close()
+        tokens = list(page.texts)
+        for script in page.scripts:
+            tokens += js_strings(script)
+        for style in page.styles:
+            class_defs |= css_classes(style)
+        class_uses |= page.class_uses
+        links = [link for link in page.links if _is_asset_path(link)]
+    elif ext == ".css":
+        class_defs = css_classes(text)
+    elif ext == ".json":
+        try:
+            tokens = json_strings(json.loads(text), [])
+        except json.JSONDecodeError as e:
+            parse_error = str(e)
+
+    auto = automaton()
+    exact, mentions, unknown = set(), set(), set()
+    for tok in tokens:
+        stripped = tok.strip()
+        if stripped.endswith(" County"):
+            base = stripped[:-len(" County")]
+            if base in VIRGINIA_COUNTIES:
+                exact.add(base)
+            elif base and base[0].isupper() and len(base) < 40 and "${" not in base:
+                unknown.add(base)
+            continue
+        if stripped in VIRGINIA_COUNTIES:
+            exact.add(stripped)
+            continue
+        for start, end, name in auto.scan(tok):
+            if tok.startswith(" County", end):
+                exact.add(name)
+            else:
+                mentions.add(name)
+        if ext in (".js", ".html") and stripped.startswith(DANGER_CLASS_PREFIXES) \
+                and all(c.isalnum() or c in "-_" for c in stripped):
+            class_uses.add(stripped)
+        if ext in (".js", ".html") and _is_asset_path(stripped):
+            links.append(stripped)
+
+    return {
+        "counties": sorted(exact),
+        "mentions": sorted(mentions - exact),
+        "unknownCounties": sorted(unknown),
+        "classUses": sorted(c for c in class_uses if c.startswith(DANGER_CLASS_PREFIXES)),
+        "classDefs": sorted(class_defs),
+        "links": sorted(set(links)),
+        "parseError": parse_error,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Cache + file walk
+# ---------------------------------------------------------------------------
+
+def _cache_key():
+    names = "\n".join(sorted(VIRGINIA_COUNTIES))
+    return f"{CACHE_VERSION}:{hashlib.sha256(names.encode()).hexdigest()[:12]}"
+
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return cache.get("files", {}) if cache.get("key") == _cache_key() else {}
+
+
+def save_cache(files, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"key": _cache_key(), "files": files}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def asset_files(root=REPO_ROOT):
+    seen = set()
+    for pattern in ASSET_GLOBS + DATA_GLOBS:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            rel = os.path.relpath(path, root).replace(os.sep, "/")
+            if rel not in seen and rel not in EXCLUDE and os.path.isfile(path):
+                seen.add(rel)
+                yield rel
+
+
+def scan_files(root=REPO_ROOT, use_cache=True):
+    """{rel path: findings}, tokenizing only files whose hash changed; returns (results, parsed count)"""
+    cache = load_cache() if use_cache else {}
+    results, fresh, parsed = {}, {}, 0
+    for rel in asset_files(root):
+        with open(os.path.join(root, rel), "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        hit = cache.get(rel)
+        if hit and hit.get("sha256") == digest:
+            findings = hit["findings"]
+        else:
+            findings = analyze(rel, raw.decode("utf-8", errors="replace"))
+            parsed += 1
+        results[rel] = findings
+        fresh[rel] = {"sha256": digest, "findings": findings}
+    if use_cache and (parsed or set(fresh) != set(cache)):
+        save_cache(fresh)
+    return results, parsed
+
+
+# ---------------------------------------------------------------------------
+# Cross-checks
+# ---------------------------------------------------------------------------
+
+def _json(rel, root=REPO_ROOT):
+    try:
+        with open(os.path.join(root, rel)) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def fetch_weather_counties(root=REPO_ROOT):
+    """Names in fetch_weather.COUNTIES, read with ast (no requests import)"""
+    try:
+        with open(os.path.join(root, FETCH_WEATHER)) as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "COUNTIES" for t in node.targets):
+            try:
+                return {c["name"] for c in ast.literal_eval(node.value)}
+            except (ValueError, KeyError, TypeError):
+                return None
+    return None
+
+
+def county_sources(results, root=REPO_ROOT):
+    """{source label: set of county names} for every place that lists the district"""
+    sources = {}
+    canonical = _json(CANONICAL_COUNTIES, root)
+    if isinstance(canonical, list):
+        sources[CANONICAL_COUNTIES] = {c.get("name") for c in canonical}
+    fw = fetch_weather_counties(root)
+    if fw is not None:
+        sources["fetch_weather.COUNTIES"] = fw
+    forecast = _json("forecasts/forecast_data.json", root)
+    if forecast:
+        sources["forecast_data.json counties"] = set(forecast.get("counties", []))
+        sources["forecast_data.json classes"] = {r.get("county") for r in forecast.get("classes", [])}
+    county_data = _json("county_data.json", root)
+    if county_data:
+        sources["county_data.json"] = {c.get("name") for c in county_data.get("counties", [])}
+    for rel in ("dashboard.js", "scripts/forecast.js"):
+        if rel in results:
+            sources[rel] = set(results[rel]["counties"])
+    return sources
+
+
+def cross_check(results, root=REPO_ROOT):
+    """(failures, warnings) as lists of 'area: message' strings"""
+    fails, warns = [], []
+    sources = county_sources(results, root)
+    reference = sources.get(CANONICAL_COUNTIES)
+    if not reference:
+        fails.append(f"counties: {CANONICAL_COUNTIES} missing or empty")
+        reference = set().union(*sources.values()) if sources else set()
+    for label, names in sources.items():
+        bad = {n for n in names if n not in VIRGINIA_COUNTIES}
+        if bad:
+            fails.append(f"counties: {label} has non-Virginia names: {', '.join(sorted(map(str, bad)))}")
+        missing, extra = reference - names, names - reference
+        if missing:
+            fails.append(f"counties: {label} is missing {', '.join(sorted(missing))}")
+        if extra - bad:
+            fails.append(f"counties: {label} has extra {', '.join(sorted(extra - bad))}")
+
+    defs = set()
+    for findings in results.values():
+        defs.update(findings["classDefs"])
+    for rel, findings in sorted(results.items()):
+        if findings["parseError"]:
+            fails.append(f"data: {rel} is not valid JSON ({findings['parseError']})")
+        if findings["unknownCounties"]:
+            fails.append(f"counties: {rel} names unknown counties: "
+                         f"{', '.join(findings['unknownCounties'])}")
+        outside = set(findings["counties"]) - reference
+        if outside and rel not in sources:
+            warns.append(f"counties: {rel} refers to counties outside the district: "
+                         f"{', '.join(sorted(outside))}")
+        undefined = [c for c in findings["classUses"] if c not in defs]
+        if undefined:
+            warns.append(f"color: {rel} uses undefined danger classes {', '.join(undefined)}")
+        # Pages resolve links from their own folder; scripts and partials from the site root
+        base = os.path.dirname(rel) if rel.endswith(".html") and not rel.startswith("partials/") else ""
+        for link in findings["links"]:
+            path = os.path.normpath(os.path.join(base, link.split("?")[0].lstrip("/"))).replace(os.sep, "/")
+            if path not in GENERATED and not os.path.exists(os.path.join(root, path)):
+                warns.append(f"link: {rel} refers to missing {link}")
+    for prefix in ("class-",):
+        missing = [f"{prefix}{k}" for k in range(1, 6) if f"{prefix}{k}" not in defs]
+        if missing:
+            warns.append(f"color: no style for {', '.join(missing)}")
+    return fails, warns
+
+
+def run_checks(root=REPO_ROOT, use_cache=True):
+    """Validate every asset in one pass; True when nothing failed"""
+    results, parsed = scan_files(root, use_cache)
+    fails, warns = cross_check(results, root)
+    sources = county_sources(results, root)
+    reference = sources.get(CANONICAL_COUNTIES, set())
+
+    print(f"🔎 Checked {len(results)} files ({parsed} tokenized, "
+          f"{len(results) - parsed} from cache)")
+    print(f"📊 District counties: {len(reference)} in {CANONICAL_COUNTIES}; "
+          f"{len(sources)} sources cross-checked")
+    if warns:
+        print("\n⚠️  WARNINGS:")
+        for w in warns:
+            print(f"  WARN {w}")
+    if fails:
+        print("\n❌ DIAGNOSTIC FAILURES:")
+        for f in fails:
+            print(f"  FAIL {f}")
         return False
-    else:
-        print("✅ All checks passed!")
-        print(f"📊 Total counties: {len(found_counties)}/{len(VIRGINIA_COUNTIES)}")
-        print("🎨 Color logic verified")
-        return True
+    print("✅ All checks passed!")
+    return True
+
 
 if __name__ == '__main__':
-    success = check_dashboard_js()
+    success = run_checks(use_cache="--no-cache" not in sys.argv[1:])
     sys.exit(0 if success else 1)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Incremental drought and antecedent index engine
+Keeps running per-county state (days since rain, rolling 24/48/72 h precipitation,
+Keetch-Byram Drought Index) and advances it one observation at a time.
+
+Each update is O(1) amortized: rolling precipitation sums are maintained with
+small windows that only evict expired hours, and KBDI steps once per completed
+day. State is checkpointed to data/drought_state.json together with the last
+processed timestamp, so each 6-hour run only reads new rows from the
+observation store (data/observations.db).
+
+Usage:
+  python drought_index.py           # update from the store and save state
+"""
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from obs_store import ObservationStore, DEFAULT_DB, RAIN_THRESHOLD_IN
+from profiling import profile
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(REPO_ROOT, "data", "drought_state.json")
+WEATHER_FILE = os.path.join(REPO_ROOT, "data", "weather.json")
+COUNTIES_FILE = os.path.join(REPO_ROOT, "data", "data", "counties.json")
+
+# Mean annual rainfall for south-central Virginia (inches), used by KBDI
+MEAN_ANNUAL_RAIN_IN = 44.0
+
+# Canopy/litter interception: first 0.20 in of each rain event doesn't count
+KBDI_INTERCEPTION_IN = 0.20
+
+# Rolling precipitation windows (hours)
+PRECIP_WINDOWS = (24, 48, 72)
+
+DAY = 86400
+
+
+class CountyDroughtState:
+    """Running antecedent state for one county"""
+
+    __slots__ = ("last_ts", "last_rain_ts", "kbdi", "windows", "sums",
+                 "day", "day_max_temp", "day_rain", "event_rain")
+
+    def __init__(self, kbdi=0.0):
+        self.last_ts = None          # newest observation applied (epoch s)
+        self.last_rain_ts = None     # newest hour with >= RAIN_THRESHOLD_IN
+        self.kbdi = float(kbdi)      # 0 (saturated) .. 800 (extreme drought)
+        self.windows = {h: deque() for h in PRECIP_WINDOWS}  # (ts, precip_in)
+        self.sums = {h: 0.0 for h in PRECIP_WINDOWS}
+        self.day = None              # UTC day number currently accumulating
+        self.day_max_temp = None
+        self.day_rain = 0.0
+        self.event_rain = 0.0        # rain so far in the current wet spell
+
+    def update(self, ts, precip_in=None, temp_f=None):
+        """Apply one observation; observations must arrive in time order"""
+        if self.last_ts is not None and ts <= self.last_ts:
+            return
+        day = ts // DAY
+        if self.day is not None and day != self.day:
+            self._close_day()
+        self.day = day
+
+        precip = precip_in or 0.0
+        if temp_f is not None and (self.day_max_temp is None or temp_f > self.day_max_temp):
+            self.day_max_temp = temp_f
+        self.day_rain += precip
+        if precip >= RAIN_THRESHOLD_IN:
+            self.last_rain_ts = ts
+
+        for hours, window in self.windows.items():
+            window.append((ts, precip))
+            self.sums[hours] += precip
+            cutoff = ts - hours * 3600
+            while window and window[0][0] <= cutoff:
+                self.sums[hours] -= window.popleft()[1]
+        self.last_ts = ts
+
+    def _close_day(self):
+        """Advance KBDI by one day using that day's max temp and rainfall"""
+        q = self.kbdi
+        if self.day_rain >= RAIN_THRESHOLD_IN:
+            before = max(0.0, self.event_rain - KBDI_INTERCEPTION_IN)
+            self.event_rain += self.day_rain
+            net = max(0.0, self.event_rain - KBDI_INTERCEPTION_IN) - before
+            q = max(0.0, q - 100.0 * net)
+        else:
+            self.event_rain = 0.0
+        if self.day_max_temp is not None:
+            dq = ((800.0 - q) * (0.968 * math.exp(0.0486 * self.day_max_temp) - 8.30)
+                  * 0.001 / (1.0 + 10.88 * math.exp(-0.0441 * MEAN_ANNUAL_RAIN_IN)))
+            q += max(0.0, dq)
+        self.kbdi = min(800.0, max(0.0, q))
+        self.day_max_temp = None
+        self.day_rain = 0.0
+
+    def snapshot(self):
+        """Current antecedent values in the shape generate_briefs consumes"""
+        days = None
+        if self.last_rain_ts is not None and self.last_ts is not None:
+            days = (self.last_ts - self.last_rain_ts) // DAY
+        return {
+            "days_since_rain": days,
+            "rain_24h": round(self.sums[24], 2),
+            "rain_48h": round(self.sums[48], 2),
+            "rain_72h": round(self.sums[72], 2),
+            "kbdi": round(self.kbdi),
+            "as_of": (datetime.fromtimestamp(self.last_ts, timezone.utc).isoformat()
+                      .replace("+00:00", "Z") if self.last_ts else None),
+        }
+
+    def to_dict(self):
+        return {
+            "last_ts": self.last_ts,
+            "last_rain_ts": self.last_rain_ts,
+            "kbdi": self.kbdi,
+            "windows": {str(h): list(map(list, w)) for h, w in self.windows.items()},
+            "day": self.day,
+            "day_max_temp": self.day_max_temp,
+            "day_rain": self.day_rain,
+            "event_rain": self.event_rain,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        state = cls(d.get("kbdi", 0.0))
+        state.last_ts = d.get("last_ts")
+        state.last_rain_ts = d.get("last_rain_ts")
+        for h in PRECIP_WINDOWS:
+            window = deque(tuple(x) for x in d.get("windows", {}).get(str(h), []))
+            state.windows[h] = window
+            state.sums[h] = sum(p for _, p in window)
+        state.day = d.get("day")
+        state.day_max_temp = d.get("day_max_temp")
+        state.day_rain = d.get("day_rain", 0.0)
+        state.event_rain = d.get("event_rain", 0.0)
+        return state
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            raw = json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {name: CountyDroughtState.from_dict(d) for name, d in raw.get("counties", {}).items()}
+
+
+def save_state(states, path=STATE_FILE):
+    out = {
+        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "counties": {name: s.to_dict() for name, s in states.items()},
+        "summary": {name: s.snapshot() for name, s in states.items()},
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(out, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def seed_kbdi(county):
+    """Starting KBDI for a county with no state: DOF CSI from data/weather.json"""
+    try:
+        with open(WEATHER_FILE, "r", encoding="utf-8") as fh:
+            csi = json.load(fh).get(county, {}).get("csi")
+    except (FileNotFoundError, json.JSONDecodeError):
+        csi = None
+    return float(csi) if csi is not None else 0.0
+
+
+def update_all(store, counties, states):
+    """Feed only observations newer than each county's checkpoint"""
+    processed = 0
+    # Complete hours only: a later report in the current hour would replace
+    # this hour's precipitation, which the rolling sums cannot take back
+    end = int(time.time()) // 3600 * 3600 - 1
+    for name in counties:
+        state = states.get(name)
+        if state is None:
+            state = states[name] = CountyDroughtState(seed_kbdi(name))
+        for station in store.stations_for(name):
+            if store.latest_timestamp(station) is None:
+                continue
+            start = state.last_ts + 1 if state.last_ts is not None else None
+            for ts, precip, temp in store.series(station, start=start, end=end,
+                                                 fields=("precip_in", "temp_f"), hourly=True):
+                state.update(ts, precip, temp)
+                processed += 1
+            break
+    return processed
+
+
+def main():
+    if not os.path.exists(DEFAULT_DB):
+        print(f"❌ No observation store at {DEFAULT_DB} (run fetch_weather.py first)")
+        return 1
+    try:
+        with open(COUNTIES_FILE, "r", encoding="utf-8") as fh:
+            counties = [c["name"] for c in json.load(fh)]
+    except (FileNotFoundError, json.JSONDecodeError):
+        counties = []
+
+    states = load_state()
+    with ObservationStore() as store:
+        processed = update_all(store, counties, states)
+    save_state(states)
+
+    print(f"✅ Applied {processed} new observations to {len(states)} counties")
+    for name, state in sorted(states.items()):
+        s = state.snapshot()
+        print(f"  {name}: KBDI {s['kbdi']}, days since rain {s['days_since_rain']}, "
+              f"24/48/72h rain {s['rain_24h']}/{s['rain_48h']}/{s['rain_72h']} in")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("drought_index"):
+        code = main()
+    sys.exit(code)
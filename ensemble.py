@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo uncertainty for county danger classes
+local_points()/class_from_points() (brief Local class) and
+calculate_fire_danger_class() (dashboard dangerClass) score one point
+forecast, so a 1 °F or 2 % RH miss next to a threshold silently flips the
+class. This module perturbs temp, RH and wind with configurable forecast
+error distributions and scores every sample of every county/day in one
+vectorized batch, giving class probabilities and exceedance odds
+(P(class >= k)) instead of a single class.
+
+Errors grow with lead time: the scale for day n is scale * (1 + LEAD_GROWTH * (n - 1)).
+The error spec is "var=dist:scale,..." with dist one of normal (scale = sigma),
+uniform (scale = half-width) or laplace; FIREWX_ENSEMBLE_ERRORS and
+FIREWX_ENSEMBLE_SAMPLES override the defaults.
+
+Usage:
+  python ensemble.py                  # fetch NWS forecasts, add "ensemble" to forecasts/forecast_data.json
+  python ensemble.py --samples 20000 --errors "temp=normal:2,rh=normal:5,wind=laplace:2"
+  python ensemble.py --benchmark      # 10k samples x 95 counties x 3 days
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from profiling import profile, span
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+FORECAST_FILE = os.path.join(REPO_ROOT, "forecasts", "forecast_data.json")
+
+DEFAULT_SAMPLES = 10000
+FORECAST_DAYS = 3
+
+# Day-1 forecast error per variable: (distribution, scale)
+DEFAULT_ERRORS = {
+    "temp": ("normal", 3.0),    # °F
+    "rh": ("normal", 7.0),      # percentage points
+    "wind": ("normal", 3.0),    # mph
+}
+LEAD_GROWTH = 0.25
+DISTRIBUTIONS = ("normal", "uniform", "laplace")
+
+# Time budget for the forecast fetches (seconds; FIREWX_DEADLINE overrides)
+RUN_BUDGET_S = 300
+
+NUM_CLASSES = 5
+LOCAL_CLASSES = 3   # local points top out at 15, i.e. class 3 (High)
+
+
+def parse_errors(spec=None):
+    """{'temp': (dist, scale), ...} from "temp=normal:3,rh=uniform:5" (missing vars keep defaults)"""
+    errors = dict(DEFAULT_ERRORS)
+    spec = spec if spec is not None else os.environ.get("FIREWX_ENSEMBLE_ERRORS", "")
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        try:
+            var, rhs = part.split("=", 1)
+            dist, scale = rhs.split(":", 1) if ":" in rhs else ("normal", rhs)
+            var, dist, scale = var.strip(), dist.strip().lower(), float(scale)
+        except ValueError:
+            raise ValueError(f"bad error spec {part!r} (expected var=dist:scale)")
+        if var not in DEFAULT_ERRORS or dist not in DISTRIBUTIONS or scale < 0:
+            raise ValueError(f"bad error spec {part!r}: variables {', '.join(DEFAULT_ERRORS)}, "
+                             f"distributions {', '.join(DISTRIBUTIONS)}")
+        errors[var] = (dist, scale)
+    return errors
+
+
+def env_samples(default=DEFAULT_SAMPLES):
+    try:
+        return int(os.environ.get("FIREWX_ENSEMBLE_SAMPLES", default))
+    except ValueError:
+        return default
+
+
+# ---------------------------------------------------------------------------
+# Vectorized class rules (same thresholds as the scalar versions)
+# ---------------------------------------------------------------------------
+
+def local_points(temp_f, rh_min, wind_sust):
+    """Array form of build_five_forks_brief.local_points (NaN = missing = 0 points)"""
+    t = ((temp_f >= 50).astype(np.int8) + (temp_f >= 58) + (temp_f >= 66)
+         + (temp_f >= 76) + (temp_f > 86))
+    rh = ((rh_min <= 90).astype(np.int8) + (rh_min <= 59) + (rh_min <= 39)
+          + (rh_min <= 29) + (rh_min <= 19))
+    w = ((wind_sust >= 11).astype(np.int8) + (wind_sust >= 16) + (wind_sust >= 21)
+         + (wind_sust >= 26) + ~np.isnan(wind_sust))
+    return t + rh + w
+
+
+def class_from_points(pts):
+    """Array form of build_five_forks_brief.class_from_points (integer class 1-5)"""
+    return 1 + (pts > 8).astype(np.int8) + (pts > 11) + (pts > 15) + (pts > 18)
+
+
+def danger_class(temp, rh, wind):
+    """Array form of fetch_weather.calculate_fire_danger_class (wind = gust if any, else sustained)"""
+    score = ((temp >= 65).astype(np.int8) + (temp >= 75) + (temp >= 85)
+             + (rh <= 40) + (rh <= 30) + (rh <= 20)
+             + (wind >= 10) + (wind >= 15) + (wind >= 20))
+    return 1 + (score >= 2).astype(np.int8) + (score >= 4) + (score >= 6) + (score >= 8)
+
+
+# ---------------------------------------------------------------------------
+# Ensemble
+# ---------------------------------------------------------------------------
+
+def _noise(rng, dist, scale, shape):
+    if scale == 0:
+        return np.zeros(shape, dtype=np.float32)
+    if dist == "uniform":
+        return rng.uniform(-scale, scale, size=shape).astype(np.float32)
+    if dist == "laplace":
+        return rng.laplace(0.0, scale, size=shape).astype(np.float32)
+    return rng.standard_normal(shape, dtype=np.float32) * np.float32(scale)
+
+
+def _class_probabilities(classes):
+    """(cases, samples) int classes 1..5 -> (cases, 5) probabilities, one bincount"""
+    cases, samples = classes.shape
+    offsets = (np.arange(cases, dtype=np.int64) * NUM_CLASSES)[:, None]
+    counts = np.bincount((classes - 1 + offsets).ravel(), minlength=cases * NUM_CLASSES)
+    return counts.reshape(cases, NUM_CLASSES) / samples
+
+
+@span()
+def run(temp, rh, wind, lead_days=None, samples=None, errors=None, seed=None):
+    """
+    Score `samples` perturbed copies of each case in one batch
+    temp/rh/wind/lead_days are 1-D arrays, one entry per county/day (NaN =
+    missing; lead day 1 = first forecast day). Returns {'local', 'dangerClass'}
+    with (cases, 5) class probability arrays, plus 'localPoints' percentiles.
+    """
+    samples = samples or env_samples()
+    errors = errors or parse_errors()
+    temp = np.asarray(temp, dtype=np.float32)
+    rh = np.asarray(rh, dtype=np.float32)
+    wind = np.asarray(wind, dtype=np.float32)
+    lead = np.ones(len(temp)) if lead_days is None else np.asarray(lead_days, dtype=float)
+    growth = (1.0 + LEAD_GROWTH * np.maximum(lead - 1, 0)).astype(np.float32)[:, None]
+    shape = (len(temp), samples)
+    rng = np.random.default_rng(seed)
+
+    t = temp[:, None] + _noise(rng, *errors["temp"], shape) * growth
+    h = np.clip(rh[:, None] + _noise(rng, *errors["rh"], shape) * growth, 1, 100)
+    w = np.maximum(wind[:, None] + _noise(rng, *errors["wind"], shape) * growth, 0)
+
+    pts = local_points(t, h, w)
+    return {
+        "local": _class_probabilities(class_from_points(pts)),
+        # calculate_fire_danger_class() returns 2 when any input is missing
+        "dangerClass": _class_probabilities(np.where(
+            np.isnan(temp + rh + wind)[:, None], np.int8(2), danger_class(t, h, w))),
+        "localPoints": np.percentile(pts, [10, 50, 90], axis=1).T,
+    }
+
+
+def summarize(probs, classes=NUM_CLASSES):
+    """JSON-ready {'probabilities', 'exceedance', 'mostLikely'} for one case's (5,) vector"""
+    probs = np.asarray(probs)
+    exceed = probs[::-1].cumsum()[::-1]
+    return {
+        "probabilities": {str(k): round(float(probs[k - 1]), 3) for k in range(1, classes + 1)},
+        "exceedance": {str(k): round(float(exceed[k - 1]), 3) for k in range(2, classes + 1)},
+        "mostLikely": int(probs.argmax()) + 1,
+    }
+
+
+def describe(summary):
+    """Short text for a brief cell, e.g. 'Low 20% · Mod 65% · High 15%'"""
+    names = {"1": "Low", "2": "Mod", "3": "High", "4": "VHigh", "5": "Ext"}
+    return " · ".join(f"{names[k]} {p * 100:.0f}%" if p >= 0.01 else f"{names[k]} <1%"
+                      for k, p in summary["probabilities"].items() if p > 0)
+
+
+def score_counties(inputs, samples=None, errors=None, seed=None):
+    """
+    Ensemble for {county: [{'temp_max', 'rh_min', 'wind_20ft'}, ... per day]}
+    Returns {county: [{'inputs', 'local', 'dangerClass', 'localPoints'}, ...]}.
+    """
+    cases = [(name, day, w) for name, days in inputs.items() for day, w in enumerate(days)]
+    if not cases:
+        return {}
+
+    def col(key):
+        return [np.nan if w.get(key) is None else w[key] for _, _, w in cases]
+
+    result = run(col("temp_max"), col("rh_min"), col("wind_20ft"),
+                 lead_days=[day + 1 for _, day, _ in cases],
+                 samples=samples, errors=errors, seed=seed)
+    out = {name: [] for name in inputs}
+    for i, (name, _, w) in enumerate(cases):
+        p10, p50, p90 = (int(round(v)) for v in result["localPoints"][i])
+        out[name].append({
+            "inputs": {k: w.get(k) for k in ("temp_max", "rh_min", "wind_20ft")},
+            "local": summarize(result["local"][i], LOCAL_CLASSES),
+            "dangerClass": summarize(result["dangerClass"][i]),
+            "localPoints": {"p10": p10, "p50": p50, "p90": p90},
+        })
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Forecast inputs
+# ---------------------------------------------------------------------------
+
+def daily_inputs(fc, days=FORECAST_DAYS, tz_offset_hours=-5):
+    """Daily max temp / min RH / max sustained wind from fetch_hourly_forecast() series"""
+    start_local = fc["start"] + timedelta(hours=tz_offset_hours)
+    first_midnight = (24 - start_local.hour) % 24 or 24   # end of today's window
+    out = []
+    for d in range(days):
+        lo = 0 if d == 0 else first_midnight + 24 * (d - 1)
+        hi = first_midnight + 24 * d
+
+        def pick(series, fn):
+            vals = [v for v in series[lo:hi] if v is not None]
+            return round(fn(vals), 1) if vals else None
+
+        out.append({
+            "temp_max": pick(fc["temp_f"], max),
+            "rh_min": pick(fc["rh"], min),
+            "wind_20ft": pick(fc["wind_mph"], max),
+        })
+    return out
+
+
+@span()
+def fetch_inputs():
+    """Per-county daily inputs from the NWS gridpoint forecast (deadline-bounded)"""
+    import deadline
+    from fetch_weather import COUNTIES, fetch_hourly_forecast
+    deadline.start(RUN_BUDGET_S)
+    # One start for every county, so day 1 is the same date for all of them
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    inputs = {}
+    for county in COUNTIES:
+        if deadline.expired():
+            print(f"⏱  Deadline reached, skipping {county['name']}")
+            continue
+        try:
+            fc = fetch_hourly_forecast(county["lat"], county["lon"], 24 * (FORECAST_DAYS + 1), start)
+        except deadline.DeadlineExceeded:
+            print(f"  ⏰ Deadline reached at {county['name']}")
+            break
+        if fc:
+            inputs[county["name"]] = daily_inputs(fc)
+        else:
+            print(f"⚠️  No forecast for {county['name']}")
+    return inputs
+
+
+def benchmark(samples, errors, counties=95, days=FORECAST_DAYS, seed=0):
+    rng = np.random.default_rng(seed)
+    n = counties * days
+    temp = rng.uniform(45, 95, n)
+    rh = rng.uniform(10, 95, n)
+    wind = rng.uniform(0, 30, n)
+    t0 = time.perf_counter()
+    run(temp, rh, wind, lead_days=np.tile(np.arange(1, days + 1), counties),
+        samples=samples, errors=errors, seed=seed)
+    elapsed = time.perf_counter() - t0
+    print(f"⏱  {samples} samples × {counties} counties × {days} days: {elapsed:.2f} s")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo danger-class probabilities")
+    parser.add_argument("--samples", type=int, default=env_samples())
+    parser.add_argument("--errors", default=None,
+                        help='error spec, e.g. "temp=normal:3,rh=normal:7,wind=normal:3"')
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time a synthetic 95-county, 3-day batch and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        errors = parse_errors(args.errors)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+    if args.benchmark:
+        benchmark(args.samples, errors)
+        return 0
+
+    inputs = fetch_inputs()
+    if not inputs:
+        print("❌ ERROR: No county forecasts available")
+        return 1
+    t0 = time.perf_counter()
+    counties = score_counties(inputs, args.samples, errors, args.seed)
+    elapsed = time.perf_counter() - t0
+
+    try:
+        with open(FORECAST_FILE) as f:
+            forecast = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        forecast = {}
+    forecast["ensemble"] = {
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "samples": args.samples,
+        "errors": {var: {"distribution": d, "scale": s} for var, (d, s) in errors.items()},
+        "leadGrowth": LEAD_GROWTH,
+        "counties": counties,
+    }
+    os.makedirs(os.path.dirname(FORECAST_FILE), exist_ok=True)
+    with open(FORECAST_FILE, "w") as f:
+        json.dump(forecast, f, indent=2)
+
+    print(f"✅ Ensemble: {len(counties)} counties × {FORECAST_DAYS} days, "
+          f"{args.samples} samples in {elapsed:.2f} s → {FORECAST_FILE}")
+    for name, days in counties.items():
+        print(f"   {name:15s} " + " | ".join(describe(d["local"]) for d in days))
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("ensemble"):
+        sys.exit(main())
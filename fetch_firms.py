@@ -4,35 +4,83 @@ Enhanced FIRMS fire hotspot data fetcher for Virginia Fire Weather Dashboard
 Implements multi-satellite support, retry logic, and domain failover
 Based on patterns from nasa-wildfires library
 """
+import argparse
 import json
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+import deadline
+import delta_feed
+import freshness
+import overpass
+from deadline import DeadlineExceeded
+from geo import load_boundary, plan_tiles, points_in_polygon
+from hotspots import HotspotTable, write_geojson, write_json
+from profiling import profile, span
+
 # Configuration
 FIRMS_API_KEY = os.environ.get('FIRMS_MAP_KEY', '')
-BBOX = "36.5,-79,38,-77"  # Virginia bounding box
+BBOX = "-79,36.5,-77,38"  # Five Forks area box (FIRMS order: west,south,east,north)
+
+# Statewide coverage: the Virginia outline is tiled into boxes no larger than
+# this (degrees) and fetched concurrently; results are clipped to the outline
+TILE_MAX_WIDTH = 2.0
+TILE_MAX_HEIGHT = 1.5
+TILE_WORKERS = 4
+
+# Total time budget for one fetch_firms run (seconds; FIREWX_DEADLINE overrides).
+# Requests, retries and backoff all draw on it, so a FIRMS brownout ends the
+# run on time with partial results instead of running into the next slot.
+RUN_BUDGET_S = 600
+REQUEST_TIMEOUT_S = 30
 
-# Multiple satellite sources
+# Multiple satellite sources. The NRT products also carry the faster
+# ultra-real-time / real-time VIIRS detections for the US (CSV `version`
+# ending in URT / RT) until the NRT record replaces them, so one request per
+# tile returns the lowest-latency tier FIRMS has for each detection; rows are
+# tagged with their tier and reconciled (hotspots.HotspotTable.reconcile_tiers).
 SATELLITES = {
     'MODIS': 'MODIS_NRT',
     'VIIRS_SNPP': 'VIIRS_SNPP_NRT', 
     'VIIRS_NOAA20': 'VIIRS_NOAA20_NRT'
 }
 
-# Alternate FIRMS domains for failover
-FIRMS_DOMAINS = [
+# Alternate FIRMS domains for failover (FIRMS_BASE_URL, comma-separated,
+# points the fetcher at a mirror or a local stand-in server instead)
+FIRMS_DOMAINS = [d.strip().rstrip('/') for d in os.environ.get('FIRMS_BASE_URL', '').split(',')
+                 if d.strip()] or [
     "https://firms.modaps.eosdis.nasa.gov",
     "https://firms2.modaps.eosdis.nasa.gov"
 ]
 
 
+class DeadlineRetry(Retry):
+    """Retry that never backs off or retries past the run deadline"""
+
+    def _clip(self, seconds):
+        left = deadline.remaining()
+        if seconds is None or left is None:
+            return seconds
+        return max(0.0, min(seconds, left - deadline.MIN_CALL_TIMEOUT))
+
+    def get_backoff_time(self):
+        return self._clip(super().get_backoff_time())
+
+    def get_retry_after(self, response):
+        return self._clip(super().get_retry_after(response))
+
+    def is_exhausted(self):
+        return deadline.expired() or super().is_exhausted()
+
+
 def get_session_with_retries():
     """Create requests session with automatic retry logic"""
     session = requests.Session()
-    retry = Retry(
+    retry = DeadlineRetry(
         total=3,
         backoff_factor=1,
         status_forcelist=[429, 500, 502, 503, 504],
@@ -44,55 +92,91 @@ def get_session_with_retries():
     return session
 
 
-def fetch_satellite_data(satellite_id, date_str):
+@span()
+def probe_availability():
+    """
+    Latest acquisition date FIRMS holds per satellite (one cheap
+    data_availability request, no tile quota). Returns {name: 'YYYY-MM-DD'},
+    or None when every domain fails.
+    """
+    session = get_session_with_retries()
+    names = {sat_id: name for name, sat_id in SATELLITES.items()}
+    for domain in FIRMS_DOMAINS:
+        try:
+            response = session.get(f"{domain}/api/data_availability/csv/{FIRMS_API_KEY}/ALL",
+                                   timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"  ⚠️  Availability probe failed with {domain}: {e}")
+            continue
+        lines = response.text.strip().split('\n')
+        headers = lines[0].split(',')
+        latest = {}
+        for line in lines[1:]:
+            row = dict(zip(headers, line.split(',')))
+            if row.get('data_id') in names:
+                latest[names[row['data_id']]] = row.get('max_date', '')
+        return latest
+    return None
+
+
+def parse_firms_csv(text, satellite_id):
+    """Parse a FIRMS area CSV response into a HotspotTable"""
+    return HotspotTable.from_csv(text, satellite_id)
+
+
+_VA_RING = None
+
+
+def virginia_ring():
+    """Virginia outline, loaded once per process"""
+    global _VA_RING
+    if _VA_RING is None:
+        _VA_RING = load_boundary()
+    return _VA_RING
+
+
+def clip_to_virginia(hotspots):
+    """Keep only hotspots inside the Virginia outline (one vectorized pass)"""
+    if not len(hotspots):
+        return hotspots
+    hotspots = HotspotTable.coerce(hotspots)
+    inside = points_in_polygon(hotspots.data['longitude'], hotspots.data['latitude'],
+                               virginia_ring())
+    return hotspots.take(inside)
+
+
+def virginia_tiles():
+    """API-sized (west, south, east, north) boxes covering Virginia"""
+    return plan_tiles(virginia_ring(), TILE_MAX_WIDTH, TILE_MAX_HEIGHT)
+
+
+@span()
+def fetch_satellite_data(satellite_id, date_str, day_range=1, raise_on_failure=False, bbox=BBOX):
     """
     Fetch data from a specific satellite with domain failover
-    Returns list of hotspot dictionaries
+    Covers `day_range` days (FIRMS allows 1-10) starting at date_str, within
+    `bbox` ("west,south,east,north"); points outside Virginia are dropped.
+    Returns a HotspotTable. When every domain fails this
+    returns an empty table unless raise_on_failure is set, in which case it raises
+    RuntimeError so callers can tell "no fires" from "no answer". Raises
+    DeadlineExceeded when the run budget runs out.
     """
     session = get_session_with_retries()
     
     # Try each domain in rotation
     for domain in FIRMS_DOMAINS:
         try:
-            url = f"{domain}/api/area/csv/{FIRMS_API_KEY}/{satellite_id}/{BBOX}/1/{date_str}"
+            url = f"{domain}/api/area/csv/{FIRMS_API_KEY}/{satellite_id}/{bbox}/{day_range}/{date_str}"
             print(f"  Trying {domain}...")
             
-            response = session.get(url, timeout=30)
+            response = session.get(url, timeout=deadline.timeout(REQUEST_TIMEOUT_S))
             response.raise_for_status()
             
-            # Parse CSV response
-            lines = response.text.strip().split('\n')
-            if len(lines) < 2:
+            hotspots = clip_to_virginia(parse_firms_csv(response.text, satellite_id))
+            if not hotspots:
                 print(f"  No data available from {satellite_id}")
-                return []
-            
-            headers = lines[0].split(',')
-            hotspots = []
-            
-            for line in lines[1:]:
-                values = line.split(',')
-                if len(values) >= len(headers):
-                    hotspot = dict(zip(headers, values))
-                    
-                    # Parse coordinates
-                    try:
-                        lat = float(hotspot.get('latitude', 0))
-                        lon = float(hotspot.get('longitude', 0))
-                        
-                        # Double-check Virginia bounds
-                        if 36 <= lat <= 38 and -79 <= lon <= -76:
-                            hotspots.append({
-                                'latitude': lat,
-                                'longitude': lon,
-                                'brightness': float(hotspot.get('brightness', 0)),
-                                'acq_date': hotspot.get('acq_date', ''),
-                                'acq_time': hotspot.get('acq_time', ''),
-                                'confidence': hotspot.get('confidence', ''),
-                                'satellite': satellite_id,
-                                'frp': float(hotspot.get('frp', 0))  # Fire Radiative Power
-                            })
-                    except (ValueError, TypeError):
-                        continue
+                return HotspotTable()
             
             print(f"  ✅ Success: {len(hotspots)} hotspots from {satellite_id}")
             return hotspots
@@ -102,117 +186,255 @@ def fetch_satellite_data(satellite_id, date_str):
             continue
     
     print(f"  ❌ All domains failed for {satellite_id}")
-    return []
+    if raise_on_failure:
+        raise RuntimeError(f"All FIRMS domains failed for {satellite_id} {date_str}+{day_range}d")
+    return HotspotTable()
+
+
+@span()
+def fetch_satellite_region(satellite_id, date_str, day_range=1, raise_on_failure=False,
+                           tiles=None, workers=TILE_WORKERS):
+    """
+    Fetch one satellite over every Virginia tile concurrently
+    Each tile is clipped to the outline as it arrives and detections
+    repeated across tile seams are dropped. If the run deadline passes with
+    tiles still outstanding, queued tiles are cancelled and DeadlineExceeded
+    is raised with the tiles that did finish as `partial`.
+    """
+    tiles = tiles if tiles is not None else virginia_tiles()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = [
+        pool.submit(fetch_satellite_data, satellite_id, date_str, day_range,
+                    raise_on_failure, ",".join(f"{v:.4f}" for v in tile))
+        for tile in tiles
+    ]
+    done, _ = wait(futures, timeout=deadline.remaining())
+    # Running tiles are already bounded by the deadline; drop the queued ones
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    parts = []
+    unfinished = 0
+    for future in futures:
+        if future not in done:
+            unfinished += 1
+            continue
+        try:
+            parts.append(future.result())
+        except DeadlineExceeded:
+            unfinished += 1
+    hotspots = HotspotTable.concat(parts).unique_exact()
+    if unfinished:
+        raise DeadlineExceeded(f"{unfinished}/{len(tiles)} tiles unfinished for {satellite_id}",
+                               partial=hotspots)
+    return hotspots
 
 
-def fetch_all_satellites():
-    """Fetch fire data from all available satellites"""
+def fetch_all_satellites(sources=None):
+    """
+    Fetch fire data from all available satellites (or the named `sources`)
+    Returns (hotspots, per-satellite counts, names of satellites the run
+    deadline cut short)
+    """
     print("Fetching FIRMS fire hotspot data from multiple satellites...")
     date_str = datetime.utcnow().strftime('%Y-%m-%d')
+    print(f"Covering Virginia with {len(virginia_tiles())} tiles")
     
-    all_hotspots = []
+    parts = []
     stats = {}
+    incomplete = []
     
     for sat_name, sat_id in SATELLITES.items():
+        if sources is not None and sat_name not in sources:
+            continue
         print(f"\n📡 {sat_name}...")
-        hotspots = fetch_satellite_data(sat_id, date_str)
-        all_hotspots.extend(hotspots)
+        try:
+            hotspots = fetch_satellite_region(sat_id, date_str)
+        except DeadlineExceeded as e:
+            print(f"  ⏰ Deadline reached: {e}")
+            hotspots = e.partial if e.partial is not None else HotspotTable()
+            incomplete.append(sat_name)
+        parts.append(hotspots)
         stats[sat_name] = len(hotspots)
     
-    return all_hotspots, stats
+    return HotspotTable.concat(parts), stats, incomplete
+
+
+def carry_forward(incomplete, path='firms_data.json'):
+    """
+    Previous snapshot's detections for satellites this run could not finish
+    (or did not poll), and when each satellite's data was last fetched in full
+    """
+    try:
+        with open(path, 'r') as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return HotspotTable(), {}
+    updated = previous.get('sourceUpdated') or {
+        name: previous.get('lastUpdated') for name in SATELLITES}
+    stale_ids = {SATELLITES[name] for name in incomplete}
+    carried = HotspotTable.from_records(
+        h for h in previous.get('hotspots', []) if h.get('satellite') in stale_ids)
+    return carried, updated
 
 
 def convert_to_geojson(hotspots):
     """
     Convert hotspots to GeoJSON FeatureCollection format
-    Compatible with Leaflet.js mapping
-    """
-    features = []
-    
-    for hotspot in hotspots:
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [hotspot['longitude'], hotspot['latitude']]
-            },
-            "properties": {
-                "brightness": hotspot['brightness'],
-                "acq_date": hotspot['acq_date'],
-                "acq_time": hotspot['acq_time'],
-                "confidence": hotspot['confidence'],
-                "satellite": hotspot['satellite'],
-                "frp": hotspot['frp']
-            }
-        }
-        features.append(feature)
-    
+    Compatible with Leaflet.js mapping (main() streams the same features
+    to disk with hotspots.write_geojson instead)
+    """
     return {
         "type": "FeatureCollection",
-        "features": features
+        "features": list(HotspotTable.coerce(hotspots).iter_features())
     }
 
 
-def deduplicate_hotspots(hotspots):
+def deduplicate_hotspots(hotspots, by_date=False):
     """
     Remove duplicate detections from multiple satellites
-    Keep the detection with highest confidence
+    Keep the detection with highest confidence. With by_date, detections at
+    the same spot on different days are kept (used for multi-day archives).
+    Accepts a HotspotTable or hotspot dicts; returns a HotspotTable.
     """
-    seen = {}
-    
-    for hotspot in hotspots:
-        key = f"{hotspot['latitude']:.4f},{hotspot['longitude']:.4f}"
-        
-        if key not in seen:
-            seen[key] = hotspot
-        else:
-            # Keep detection with higher confidence
-            existing_conf = seen[key].get('confidence', 'low')
-            new_conf = hotspot.get('confidence', 'low')
-            
-            confidence_order = {'low': 1, 'nominal': 2, 'high': 3}
-            if confidence_order.get(new_conf, 0) > confidence_order.get(existing_conf, 0):
-                seen[key] = hotspot
-    
-    return list(seen.values())
+    return HotspotTable.coerce(hotspots).deduplicate(by_date=by_date)
 
 
-def main():
+def scheduled_sources(state, now):
+    """
+    {satellite: due info} for the satellites due under the overpass schedule,
+    after the availability probe has ruled out passes FIRMS has not ingested yet
+    """
+    due = overpass.due_sources(state, now)
+    if not due:
+        return {}
+    due, deferred = overpass.gate_on_probe(due, probe_availability(), now)
+    for name, info in deferred.items():
+        print(f"  ⏳ {name}: pass {info['pass']:%H:%M} UTC not in FIRMS yet, deferring")
+    for name, info in due.items():
+        when = f"pass {info['pass']:%H:%M} UTC" if info['pass'] else "max interval reached"
+        if info['reason'] == 'retry':
+            when += ", retrying"
+        print(f"  📅 {name}: due ({when})")
+    return {name: due[name] for name in SATELLITES if name in due}
+
+
+def previous_keys(path='firms_data.json'):
+    """(lat, lon, date, time) of every detection already published"""
+    try:
+        with open(path, 'r') as f:
+            previous = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
+    return {(h.get('latitude'), h.get('longitude'), h.get('acq_date'), h.get('acq_time'))
+            for h in previous.get('hotspots', [])}
+
+
+def main(argv=None):
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Fetch FIRMS hotspots for Virginia")
+    parser.add_argument("--scheduled", action="store_true",
+                        help="only poll satellites with a pass due (see overpass.py)")
+    args = parser.parse_args(argv)
+
     if not FIRMS_API_KEY:
         print("❌ ERROR: FIRMS_MAP_KEY environment variable not set")
         return
     
-    # Fetch from all satellites
-    all_hotspots, stats = fetch_all_satellites()
+    deadline.start(default=RUN_BUDGET_S)
+    schedule = overpass.load_state()
+    started = datetime.utcnow()
+    
+    sources, due = list(SATELLITES), {}
+    if args.scheduled:
+        due = scheduled_sources(schedule, started)
+        sources = list(due)
+        if not sources:
+            print("💤 No FIRMS source due; nothing fetched")
+            return
     
-    # Remove duplicates
-    unique_hotspots = deduplicate_hotspots(all_hotspots)
+    # Fetch from the due (or all) satellites
+    all_hotspots, stats, incomplete = fetch_all_satellites(sources)
+    
+    # Generate timestamp
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    
+    # Learn pass times / availability lag from the satellites polled in full
+    seen = previous_keys()
+    for name in sources:
+        if name not in incomplete:
+            sat_id = SATELLITES[name]
+            overpass.observe(schedule, name,
+                             (h for h in all_hotspots.iter_dicts() if h['satellite'] == sat_id),
+                             started, seen, due.get(name, {}).get('pass'))
+    overpass.save_state(schedule)
+    
+    # Satellites cut short by the deadline (or not due) keep their previous detections
+    skipped = [name for name in SATELLITES if name not in sources]
+    source_updated = {name: timestamp for name in SATELLITES}
+    if incomplete or skipped:
+        carried, previous_updated = carry_forward(incomplete + skipped)
+        all_hotspots = HotspotTable.concat([all_hotspots, carried]).unique_exact()
+        for name in incomplete + skipped:
+            source_updated[name] = previous_updated.get(name)
+        for name in skipped:
+            stats[name] = sum(1 for h in carried if h['satellite'] == SATELLITES[name])
+        stats = {name: stats[name] for name in SATELLITES if name in stats}
+        if incomplete:
+            print(f"\n⚠️  Partial run: {', '.join(incomplete)} incomplete")
+        print(f"\n↪️  Carried forward {len(carried)} earlier detections "
+              f"({', '.join(incomplete + skipped)})")
+    
+    # Replace URT/RT detections whose NRT record has arrived, then remove duplicates
+    with span("deduplicate"):
+        reconciled = all_hotspots.reconcile_tiers()
+        superseded = len(all_hotspots) - len(reconciled)
+        unique_hotspots = deduplicate_hotspots(reconciled)
+    tiers = unique_hotspots.tier_counts()
     
     print(f"\n📊 Statistics:")
     for sat_name, count in stats.items():
         print(f"  {sat_name}: {count} detections")
     print(f"  Total raw: {len(all_hotspots)} detections")
-    print(f"  After deduplication: {len(unique_hotspots)} unique hotspots")
+    if superseded:
+        print(f"  Superseded by a slower tier: {superseded} URT/RT detections")
+    print(f"  After deduplication: {len(unique_hotspots)} unique hotspots "
+          f"({', '.join(f'{t} {n}' for t, n in tiers.items()) or 'none'})")
     
-    # Generate timestamp
-    timestamp = datetime.utcnow().isoformat() + "Z"
+    # Delta feed for clients that already hold an earlier snapshot
+    with span("delta_feed.stage"):
+        pending = delta_feed.stage("firms", unique_hotspots.iter_dicts(), delta_feed.hotspot_key,
+                                   "firms_data.json")
     
-    # JSON output (backward compatible with your existing dashboard)
-    json_output = {
-        "lastUpdated": timestamp,
-        "count": len(unique_hotspots),
-        "hotspots": unique_hotspots,
-        "statistics": stats
-    }
+    # How old the data is: acquisition -> fetch -> publish, per detection
+    with span("freshness"):
+        records = unique_hotspots.to_records()
+        new_keys = {(h['latitude'], h['longitude'], h['acq_date'], h['acq_time'])
+                    for h in records} - seen
+        fresh = freshness.track_firms(records, started.isoformat() + "Z", timestamp,
+                                      source_updated, new_keys)
+    if fresh["stale"]:
+        print(f"⚠️  A source has not been fetched in {fresh['staleThresholdMinutes']} min")
     
-    with open('firms_data.json', 'w') as f:
-        json.dump(json_output, f, indent=2)
+    with span("write_outputs"):
+        # JSON output (backward compatible with your existing dashboard)
+        write_json('firms_data.json', unique_hotspots, {
+            "lastUpdated": timestamp,
+            "seq": pending.seq,
+            "count": len(unique_hotspots),
+            "statistics": stats,
+            "tiers": tiers,
+            "complete": not incomplete,
+            "staleSources": incomplete,
+            "sourceUpdated": source_updated,
+            "freshness": fresh
+        })
+        
+        # GeoJSON output (for enhanced Leaflet integration)
+        write_geojson('firms_data.geojson', unique_hotspots)
     
-    # GeoJSON output (for enhanced Leaflet integration)
-    geojson_output = convert_to_geojson(unique_hotspots)
-    with open('firms_data.geojson', 'w') as f:
-        json.dump(geojson_output, f, indent=2)
+    # Only now that the snapshot carries the new seq do clients get pointed at it
+    with span("delta_feed.commit"):
+        pending.commit()
     
     print(f"\n✅ Successfully saved FIRMS data:")
     print(f"   - firms_data.json ({len(unique_hotspots)} hotspots)")
@@ -220,4 +442,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profile("fetch_firms"):
+        main()
@@ -5,9 +5,20 @@ Fetches live NWS weather data for counties and calculates fire danger class
 """
 
 import json
-import requests
-from datetime import datetime
+import re
 import time
+import requests
+from datetime import datetime, timedelta
+
+import deadline
+import delta_feed
+import freshness
+import nws_alerts
+import obs_qc
+from deadline import DeadlineExceeded
+from obs_store import ObservationStore
+from profiling import profile, span
+from spatial_interp import fill_missing_counties
 
 # County data with centroids
 COUNTIES = [
@@ -20,19 +31,33 @@ COUNTIES = [
 # Fire danger thresholds for alerting
 ALERT_THRESHOLDS = {"gust": 18, "rh": 30}
 
+NWS_HEADERS = {"User-Agent": "(Five Forks Fire Weather Dashboard, contact@example.com)"}
+
+# How far back to pull station history when the store has nothing newer
+HISTORY_BACKFILL_HOURS = 72
 
+# Total time budget for one fetch_weather run (seconds; FIREWX_DEADLINE
+# overrides). Counties not reached in time keep their previous values,
+# marked "source": "stale".
+RUN_BUDGET_S = 300
+REQUEST_TIMEOUT_S = 10
+
+
+@span()
 def fetch_nws_data(lat, lon):
     """Fetch latest observation from NWS API"""
     try:
         points_url = f"https://api.weather.gov/points/{lat},{lon}"
-        headers = {"User-Agent": "(Five Forks Fire Weather Dashboard, contact@example.com)"}
+        headers = NWS_HEADERS
         
-        response = requests.get(points_url, headers=headers, timeout=10)
+        response = requests.get(points_url, headers=headers,
+                                timeout=deadline.timeout(REQUEST_TIMEOUT_S))
         response.raise_for_status()
         points_data = response.json()
         
         obs_stations_url = points_data['properties']['observationStations']
-        response = requests.get(obs_stations_url, headers=headers, timeout=10)
+        response = requests.get(obs_stations_url, headers=headers,
+                                timeout=deadline.timeout(REQUEST_TIMEOUT_S))
         response.raise_for_status()
         stations = response.json()
         
@@ -42,38 +67,149 @@ def fetch_nws_data(lat, lon):
         station_id = stations['features'][0]['properties']['stationIdentifier']
         obs_url = f"https://api.weather.gov/stations/{station_id}/observations/latest"
         
-        response = requests.get(obs_url, headers=headers, timeout=10)
+        response = requests.get(obs_url, headers=headers,
+                                timeout=deadline.timeout(REQUEST_TIMEOUT_S))
         response.raise_for_status()
         obs_data = response.json()
         
         props = obs_data['properties']
-        
-        temp_c = props.get('temperature', {}).get('value')
-        temp_f = (temp_c * 9/5) + 32 if temp_c else None
-        
-        rh = props.get('relativeHumidity', {}).get('value')
-        
-        dew_c = props.get('dewpoint', {}).get('value')
-        dew_f = (dew_c * 9/5) + 32 if dew_c else None
-        
-        wind_ms = props.get('windSpeed', {}).get('value')
-        wind_mph = wind_ms * 0.621371 if wind_ms else None
-        
-        gust_ms = props.get('windGust', {}).get('value')
-        gust_mph = gust_ms * 0.621371 if gust_ms else None
-        
+        obs = parse_observation(props)
+
+        def rounded(value):
+            return round(value) if value is not None else None
+
+        # Missing stays None (no invented gusts); zero is a real reading
         return {
-            "temp": round(temp_f) if temp_f else None,
-            "rh": round(rh) if rh else None,
-            "dewPoint": round(dew_f) if dew_f else None,
-            "wind": round(wind_mph) if wind_mph else 0,
-            "gust": round(gust_mph) if gust_mph and gust_mph > 0 else (round(wind_mph * 1.3) if wind_mph else 0)
+            "temp": rounded(obs['temp_f']),
+            "rh": rounded(obs['rh']),
+            "dewPoint": rounded(obs['dew_f']),
+            "wind": rounded(obs['wind_mph']),
+            "gust": rounded(obs['gust_mph']),
+            "station": station_id,
+            "observedAt": props.get('timestamp')
         }
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         print(f"Error fetching NWS data for {lat},{lon}: {e}")
         return None
 
+def parse_observation(props):
+    """Convert one NWS observation's properties to imperial units for the store"""
+    def value(key):
+        return (props.get(key) or {}).get('value')
+
+    temp_c = value('temperature')
+    dew_c = value('dewpoint')
+    wind_kmh = value('windSpeed')
+    gust_kmh = value('windGust')
+    precip_mm = value('precipitationLastHour')
+    return {
+        "timestamp": props.get('timestamp'),
+        "temp_f": temp_c * 9/5 + 32 if temp_c is not None else None,
+        "rh": value('relativeHumidity'),
+        "dew_f": dew_c * 9/5 + 32 if dew_c is not None else None,
+        "wind_mph": wind_kmh * 0.621371 if wind_kmh is not None else None,
+        "gust_mph": gust_kmh * 0.621371 if gust_kmh is not None else None,
+        "precip_in": precip_mm / 25.4 if precip_mm is not None else None,
+    }
+
+
+def fetch_station_observations(station_id, start):
+    """Fetch all observations for a station since `start` (datetime, UTC)"""
+    try:
+        url = f"https://api.weather.gov/stations/{station_id}/observations"
+        params = {"start": start.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        response = requests.get(url, headers=NWS_HEADERS, params=params,
+                                timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+        response.raise_for_status()
+        features = response.json().get('features', [])
+        return [parse_observation(f['properties']) for f in features]
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"Error fetching observation history for {station_id}: {e}")
+        return []
+
+
+@span()
+def store_history(store, county, station_id):
+    """Append new observations for a county's station to the local store"""
+    store.register_station(station_id, county['name'], county['lat'], county['lon'])
+    latest = store.latest_timestamp(station_id)
+    if latest is not None:
+        start = datetime.utcfromtimestamp(latest + 1)
+    else:
+        start = datetime.utcnow() - timedelta(hours=HISTORY_BACKFILL_HOURS)
+    added = store.insert_many(station_id, fetch_station_observations(station_id, start))
+    print(f"  Stored {added} new observations for {station_id}")
+    return added
+
+
+def parse_iso_duration(text):
+    """Parse NWS validTime durations such as PT3H, P1D or P1DT6H to hours"""
+    m = re.fullmatch(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?)?', text)
+    if not m:
+        return 1
+    days, hours, minutes = (int(g) if g else 0 for g in m.groups())
+    return max(1, days * 24 + hours + (1 if minutes else 0))
+
+
+def expand_grid_values(values, start, hours, convert=None):
+    """
+    Expand NWS gridpoint {validTime, value} runs into an hourly list
+    aligned on `start` (whole UTC hour); hours with no data are None
+    """
+    series = [None] * hours
+    for item in values:
+        valid_from, _, duration = item['validTime'].partition('/')
+        t0 = datetime.fromisoformat(valid_from).replace(tzinfo=None)
+        offset = int((t0 - start).total_seconds() // 3600)
+        value = item.get('value')
+        if value is not None and convert:
+            value = convert(value)
+        for i in range(offset, offset + parse_iso_duration(duration)):
+            if 0 <= i < hours:
+                series[i] = value
+    return series
+
+
+@span()
+def fetch_hourly_forecast(lat, lon, hours=168, start=None):
+    """
+    Fetch the NWS gridpoint forecast for a point as hourly series
+    Series begin at `start` (whole UTC hour; the current hour by default).
+    Callers stacking several points pass one shared start so the columns line up.
+    Returns {'start', 'temp_f', 'rh', 'wind_mph'} or None on failure
+    """
+    try:
+        response = requests.get(f"https://api.weather.gov/points/{lat},{lon}",
+                                headers=NWS_HEADERS, timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+        response.raise_for_status()
+        grid_url = response.json()['properties']['forecastGridData']
+
+        response = requests.get(grid_url, headers=NWS_HEADERS,
+                                timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+        response.raise_for_status()
+        props = response.json()['properties']
+
+        start = start or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        return {
+            "start": start,
+            "temp_f": expand_grid_values(props['temperature']['values'], start, hours,
+                                         lambda c: c * 9/5 + 32),
+            "rh": expand_grid_values(props['relativeHumidity']['values'], start, hours),
+            "wind_mph": expand_grid_values(props['windSpeed']['values'], start, hours,
+                                           lambda k: k * 0.621371),
+        }
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"Error fetching NWS gridpoint forecast for {lat},{lon}: {e}")
+        return None
+
+
 def calculate_fire_danger_class(temp, rh, wind, gust):
     """Calculate fire danger class based on weather conditions"""
     if None in [temp, rh, wind]:
@@ -94,7 +230,7 @@ def calculate_fire_danger_class(temp, rh, wind, gust):
     elif rh <= 40:
         score += 1
     
-    wind_speed = gust if gust else wind
+    wind_speed = gust if gust is not None else wind
     if wind_speed >= 20:
         score += 3
     elif wind_speed >= 15:
@@ -117,23 +253,81 @@ def check_alerts(county_data):
     """Check if any counties exceed alert thresholds"""
     alerts = []
     for county in county_data:
-        if county['gust'] and county['gust'] > ALERT_THRESHOLDS['gust']:
+        if county['gust'] is not None and county['gust'] > ALERT_THRESHOLDS['gust']:
             alerts.append(f"{county['name']}: High gusts ({county['gust']} mph)")
-        if county['rh'] and county['rh'] < ALERT_THRESHOLDS['rh']:
+        if county['rh'] is not None and county['rh'] < ALERT_THRESHOLDS['rh']:
             alerts.append(f"{county['name']}: Low humidity ({county['rh']}%)")
     return alerts
 
+def unavailable_county(name):
+    """Placeholder for a county with no data; filled from neighbours later"""
+    return {
+        "name": name,
+        "temp": None,
+        "rh": None,
+        "dewPoint": None,
+        "wind": None,
+        "gust": None,
+        "dangerClass": None,
+        "source": "unavailable"
+    }
+
+
+def stale_county(name, previous):
+    """
+    The county's entry from the previous county_data.json, flagged stale with
+    the time it was last fetched; unavailable if there is nothing to reuse
+    """
+    prev = {c['name']: c for c in previous.get('counties', [])}.get(name)
+    if not prev or prev.get('temp') is None:
+        return unavailable_county(name)
+    entry = dict(prev, source="stale")
+    entry["asOf"] = prev.get("asOf") or previous.get("lastUpdated")
+    return entry
+
+
+def load_previous(path='county_data.json'):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
 def main():
     """Main execution"""
     print("Fetching weather data for Five Forks counties...")
+    deadline.start(default=RUN_BUDGET_S)
     
+    started = datetime.utcnow()
     county_data = []
+    stale = []
+    fetch_times = {}
+    previous = load_previous()
+    store = ObservationStore()
     
     for county in COUNTIES:
+        if deadline.expired():
+            # Out of time: reuse the last published values for the rest
+            county_data.append(stale_county(county['name'], previous))
+            stale.append(county['name'])
+            continue
+        
         print(f"Fetching data for {county['name']}...")
-        weather = fetch_nws_data(county['lat'], county['lon'])
+        try:
+            weather = fetch_nws_data(county['lat'], county['lon'])
+            out_of_time = False
+        except DeadlineExceeded:
+            # Too little budget left for a request: carry forward, don't interpolate
+            weather, out_of_time = None, True
         
         if weather:
+            fetch_times[county['name']] = datetime.utcnow()
+            # Out-of-range / inconsistent values are dropped, not scored
+            weather, failed = obs_qc.screen(weather)
+            if failed:
+                rejected = ", ".join(f"{k} ({'/'.join(v)})" for k, v in failed.items())
+                print(f"  QC rejected {rejected}")
             danger_class = calculate_fire_danger_class(
                 weather['temp'], weather['rh'], weather['wind'], weather['gust'])
             
@@ -144,22 +338,43 @@ def main():
                 "dewPoint": weather['dewPoint'],
                 "wind": weather['wind'],
                 "gust": weather['gust'],
-                "dangerClass": danger_class
+                "dangerClass": danger_class,
+                "source": "observed",
+                "observedAt": weather['observedAt'],
+                **({"qc": failed} if failed else {})
             })
+            if weather.get('station') and not deadline.expired():
+                try:
+                    store_history(store, county, weather['station'])
+                except DeadlineExceeded:
+                    print(f"  ⏰ Deadline reached; history for {weather['station']} fetched next run")
+        elif out_of_time or deadline.expired():
+            print(f"  ⏰ Deadline reached while fetching {county['name']}")
+            county_data.append(stale_county(county['name'], previous))
+            stale.append(county['name'])
         else:
             print(f"  Warning: Could not fetch data for {county['name']}")
-                        # Still add county with None values so it appears in dashboard
-            county_data.append({
-                "name": county['name'],
-                "temp": None,
-                "rh": None,
-                "dewPoint": None,
-                "wind": None,
-                "gust": None,
-                "dangerClass": 1  # Default to low danger when data unavailable
-            })
+            # Still add the county; values are interpolated from neighbours below
+            county_data.append(unavailable_county(county['name']))
         
-        time.sleep(1)
+        deadline.sleep(1)
+    
+    # Flag stored history (step, stuck-sensor and buddy checks need the series)
+    with span("obs_qc"):
+        end = int(time.time())
+        qc = obs_qc.run(store, end - HISTORY_BACKFILL_HOURS * 3600, end)
+    if qc["flagged"]:
+        print("QC flagged: " + "; ".join(
+            f"{field} " + ", ".join(f"{name} {n}" for name, n in counts.items())
+            for field, counts in qc["flagged"].items()))
+    store.close()
+    if stale:
+        print(f"⚠️  Partial run: kept previous values for {', '.join(stale)}")
+    
+    # Gap-fill unobserved counties from the ones we could see
+    filled = fill_missing_counties(county_data, {c['name']: c for c in COUNTIES})
+    if filled:
+        print(f"Interpolated from neighbouring stations: {', '.join(filled)}")
     
     alerts = check_alerts(county_data)
     if alerts:
@@ -167,17 +382,40 @@ def main():
         for alert in alerts:
             print(f"  - {alert}")
     
+    # Official NWS fire weather products from the last nws_alerts.py poll
+    official = nws_alerts.alert_lines(nws_alerts.apply_to_counties(county_data))
+    for line in official:
+        print(f"  🚩 {line}")
+    
+    with span("delta_feed.stage"):
+        pending = delta_feed.stage("counties", county_data, delta_feed.county_key, "county_data.json")
+    
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    with span("freshness"):
+        fresh = freshness.track_nws(county_data, fetch_times, started, timestamp)
+    if fresh["stale"]:
+        print(f"⚠️  Observations older than {fresh['staleThresholdMinutes']} min: "
+              f"{', '.join(fresh['staleCounties'])}")
+    
     output = {
-        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "lastUpdated": timestamp,
+        "seq": pending.seq,
+        "complete": not stale,
+        "staleCounties": stale,
+        "freshness": fresh,
         "counties": county_data,
-        "alerts": alerts
+        "alerts": alerts,
+        "nwsAlerts": official
     }
     
     with open('county_data.json', 'w') as f:
         json.dump(output, f, indent=2)
+    # Deltas advance only once the snapshot carrying the new seq is written
+    pending.commit()
     
     print(f"\n✅ Successfully updated data for {len(county_data)} counties")
     print(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == "__main__":
-    main()
+    with profile("fetch_weather"):
+        main()
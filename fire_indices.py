@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Hourly Fosberg Fire Weather Index (FFWI) and Hot-Dry-Windy Index (HDW)
+The danger classes score one daily max temp / min RH / wind value. These two
+indices are computed for every hour of the NWS gridpoint forecast instead, so
+a dry, windy afternoon is not averaged away and the brief can say when it
+peaks.
+
+  FFWI  Fosberg (1978): equilibrium moisture (Simard's piecewise fit) damped
+        by eta = 1 - 2(m/30) + 1.5(m/30)^2 - 0.5(m/30)^3, times
+        sqrt(1 + U^2) / 0.3002 with U the 20-ft wind in mph (0-~100).
+  HDW   Srock et al. (2018): vapor pressure deficit (hPa) x wind (m/s).
+        The published index takes the max over the lowest 50 hPa; NWS
+        gridpoints only carry surface values, so this is the surface form.
+
+Both are plain array expressions over (counties or grid cells, hours), so a
+statewide 7-day hourly pass is a handful of NumPy ops. Daily peaks and their
+hour are reduced on a (cells, days, 24) view; the last 24 h of observations in
+data/observations.db get the same treatment when present. Results go into the
+"indices" section of forecasts/forecast_data.json.
+
+Usage:
+  python fire_indices.py              # fetch NWS forecasts, add "indices" to forecasts/forecast_data.json
+  python fire_indices.py --benchmark  # 95 counties x 168 h (--cells for a grid)
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import deadline
+from profiling import profile, span
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+FORECAST_FILE = os.path.join(REPO_ROOT, "forecasts", "forecast_data.json")
+OBS_DB = os.path.join(REPO_ROOT, "data", "observations.db")
+
+FORECAST_HOURS = 168
+OBSERVED_HOURS = 24
+
+# Daily windows run midnight to midnight local standard time (same as ensemble.daily_inputs)
+TZ_OFFSET_HOURS = -5
+
+# FFWI at or above this is flagged in the briefs (Goodrick 2002 "critical")
+FFWI_CRITICAL = 50
+
+# Time budget for the forecast fetches (seconds; FIREWX_DEADLINE overrides)
+RUN_BUDGET_S = 300
+
+MPH_TO_MS = 0.44704
+
+
+# ---------------------------------------------------------------------------
+# Indices (any array shape; NaN = missing)
+# ---------------------------------------------------------------------------
+
+def fosberg_emc(temp_f, rh):
+    """Equilibrium moisture content (%) from Simard's (1968) three-part fit"""
+    T = np.asarray(temp_f, dtype=float)
+    h = np.clip(np.asarray(rh, dtype=float), 0, 100)
+    return np.where(h < 10, 0.03229 + 0.281073 * h - 0.000578 * h * T,
+           np.where(h < 50, 2.22749 + 0.160107 * h - 0.01478 * T,
+                    21.0606 + 0.005565 * h ** 2 - 0.00035 * h * T - 0.483199 * h))
+
+
+def ffwi(temp_f, rh, wind_mph):
+    """Fosberg Fire Weather Index"""
+    x = np.clip(fosberg_emc(temp_f, rh) / 30, 0, 1)
+    eta = 1 - 2 * x + 1.5 * x ** 2 - 0.5 * x ** 3
+    u = np.maximum(np.asarray(wind_mph, dtype=float), 0)
+    return eta * np.sqrt(1 + u ** 2) / 0.3002
+
+
+def vapor_pressure_deficit(temp_f, rh):
+    """VPD (hPa) from temperature and RH (Bolton 1980 saturation vapor pressure)"""
+    tc = (np.asarray(temp_f, dtype=float) - 32) * 5 / 9
+    es = 6.112 * np.exp(17.67 * tc / (tc + 243.5))
+    return es * (1 - np.clip(np.asarray(rh, dtype=float), 0, 100) / 100)
+
+
+def hdw(temp_f, rh, wind_mph):
+    """Surface Hot-Dry-Windy Index: VPD (hPa) x wind (m/s)"""
+    u = np.maximum(np.asarray(wind_mph, dtype=float), 0) * MPH_TO_MS
+    return vapor_pressure_deficit(temp_f, rh) * u
+
+
+INDICES = {"ffwi": ffwi, "hdw": hdw}
+
+
+# ---------------------------------------------------------------------------
+# Peaks
+# ---------------------------------------------------------------------------
+
+def day_view(values, start, tz_offset_hours=TZ_OFFSET_HOURS):
+    """
+    (cells, hours) series starting at `start` (UTC) -> ((cells, days, 24), lead, dates)
+    The series is NaN-padded so each row of the view is one local calendar day;
+    `lead` is the padding in front and `dates` the local date of each day.
+    """
+    values = np.asarray(values, dtype=float)
+    local = start + timedelta(hours=tz_offset_hours)
+    lead = local.hour
+    days = -(-(lead + values.shape[1]) // 24)
+    padded = np.full((values.shape[0], days * 24), np.nan)
+    padded[:, lead:lead + values.shape[1]] = values
+    dates = [(local.date() + timedelta(days=d)).isoformat() for d in range(days)]
+    return padded.reshape(values.shape[0], days, 24), lead, dates
+
+
+def peaks(values, axis=-1):
+    """(max, argmax) along `axis`, ignoring NaN; all-NaN slices give (NaN, -1)"""
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    idx = np.where(missing, -np.inf, values).argmax(axis=axis)
+    empty = missing.all(axis=axis)
+    top = np.take_along_axis(values, np.expand_dims(idx, axis), axis).squeeze(axis)
+    return np.where(empty, np.nan, top), np.where(empty, -1, idx)
+
+
+@span()
+def compute(temp_f, rh, wind_mph):
+    """{'ffwi': (cells, hours), 'hdw': (cells, hours)} for hourly input arrays"""
+    return {name: fn(temp_f, rh, wind_mph) for name, fn in INDICES.items()}
+
+
+def _peak_entry(value, hour, start):
+    if hour < 0:
+        return None
+    at = start + timedelta(hours=int(hour))
+    return {"peak": round(float(value), 1), "at": at.isoformat() + "Z"}
+
+
+@span()
+def summarize(names, start, series, tz_offset_hours=TZ_OFFSET_HOURS):
+    """
+    Per-county daily and period peaks from compute() output
+    Returns {county: {'days': [{'date', 'ffwi': {'peak', 'at'}, 'hdw': ...}],
+    'ffwi': {'peak', 'at'}, 'hdw': ...}}; missing days hold None.
+    """
+    reduced = {}
+    for name, values in series.items():
+        view, lead, dates = day_view(values, start, tz_offset_hours)
+        day_peak, day_hour = peaks(view)
+        # hour within the padded view -> hour offset into the series
+        day_hour = np.where(day_hour < 0, -1, day_hour + np.arange(len(dates)) * 24 - lead)
+        reduced[name] = (day_peak, day_hour, *peaks(values))
+
+    out = {}
+    for i, county in enumerate(names):
+        entry = {"days": [{"date": d} for d in dates]}
+        for name, (day_peak, day_hour, top, top_hour) in reduced.items():
+            for d, day in enumerate(entry["days"]):
+                day[name] = _peak_entry(day_peak[i, d], day_hour[i, d], start)
+            entry[name] = _peak_entry(top[i], top_hour[i], start)
+        out[county] = entry
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+@span()
+def fetch_forecasts(counties, hours=FORECAST_HOURS):
+    """(start, temp, rh, wind) hourly (counties, hours) arrays from the NWS gridpoint forecast"""
+    from fetch_weather import fetch_hourly_forecast
+    temp, rh, wind = (np.full((len(counties), hours), np.nan) for _ in range(3))
+    # One start for every row, even if the run crosses an hour boundary
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    fetched = 0
+    deadline.start(default=RUN_BUDGET_S)
+    for i, county in enumerate(counties):
+        if deadline.expired():
+            print(f"  ⏰ Deadline reached; no forecast for {county['name']}")
+            continue
+        try:
+            fc = fetch_hourly_forecast(county["lat"], county["lon"], hours, start)
+        except deadline.DeadlineExceeded:
+            print(f"  ⏰ Deadline reached at {county['name']}")
+            break
+        if not fc:
+            print(f"  Warning: no forecast for {county['name']}")
+            continue
+        fetched += 1
+        temp[i] = np.array(fc["temp_f"], dtype=float)
+        rh[i] = np.array(fc["rh"], dtype=float)
+        wind[i] = np.array(fc["wind_mph"], dtype=float)
+    return (start if fetched else None), temp, rh, wind
+
+
+def observed_series(counties, hours=OBSERVED_HOURS, now=None):
+    """(start, temp, rh, wind) for the last `hours` of stored observations, or None"""
+    if not os.path.exists(OBS_DB):
+        return None
+    from obs_store import ObservationStore
+    end = int(now if now is not None else time.time()) // 3600 * 3600
+    start = end - hours * 3600
+    temp, rh, wind = (np.full((len(counties), hours), np.nan) for _ in range(3))
+    with ObservationStore(OBS_DB) as store:
+        for i, county in enumerate(counties):
+            for station in store.stations_for(county["name"]):
+                rows = store.series(station, start=start, end=end - 1,
+                                    fields=("temp_f", "rh", "wind_mph"))
+                if not rows:
+                    continue
+                data = np.array(rows, dtype=float)
+                hour = ((data[:, 0] - start) // 3600).astype(int)
+                temp[i, hour], rh[i, hour], wind[i, hour] = data[:, 1], data[:, 2], data[:, 3]
+                break
+    if np.isnan(temp).all():
+        return None
+    return datetime.utcfromtimestamp(start), temp, rh, wind
+
+
+def observed_peaks(counties):
+    """{county: {'ffwi': {'peak', 'at'}, 'hdw': ...}} over the observed window"""
+    obs = observed_series(counties)
+    if obs is None:
+        return {}
+    start, temp, rh, wind = obs
+    series = compute(temp, rh, wind)
+    out = {}
+    for name, values in series.items():
+        top, hour = peaks(values)
+        for i, county in enumerate(counties):
+            entry = _peak_entry(top[i], hour[i], start)
+            if entry:
+                out.setdefault(county["name"], {})[name] = entry
+    return out
+
+
+def benchmark(cells=95, hours=FORECAST_HOURS, seed=0):
+    rng = np.random.default_rng(seed)
+    temp = rng.uniform(35, 95, (cells, hours))
+    rh = rng.uniform(8, 100, (cells, hours))
+    wind = rng.uniform(0, 35, (cells, hours))
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    t0 = time.perf_counter()
+    series = compute(temp, rh, wind)
+    for values in series.values():
+        peaks(day_view(values, start)[0])
+        peaks(values)
+    elapsed = time.perf_counter() - t0
+    print(f"⏱  FFWI + HDW + daily peaks, {cells} cells × {hours} h: {elapsed * 1000:.1f} ms")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hourly Fosberg FFWI and Hot-Dry-Windy Index")
+    parser.add_argument("--hours", type=int, default=FORECAST_HOURS)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time a synthetic 95-county, 168 h pass and exit")
+    parser.add_argument("--cells", type=int, default=95, help="benchmark cells (counties or grid cells)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.cells, args.hours)
+        return 0
+
+    from fetch_weather import COUNTIES
+    print(f"Fetching hourly NWS forecasts for {len(COUNTIES)} counties...")
+    start, temp, rh, wind = fetch_forecasts(COUNTIES, args.hours)
+    if start is None:
+        print("❌ ERROR: no hourly forecasts fetched")
+        return 1
+
+    t0 = time.perf_counter()
+    names = [c["name"] for c in COUNTIES]
+    counties = summarize(names, start, compute(temp, rh, wind))
+    elapsed = (time.perf_counter() - t0) * 1000
+    for name, obs in observed_peaks(COUNTIES).items():
+        counties[name]["observed24h"] = obs
+
+    try:
+        with open(FORECAST_FILE) as f:
+            forecast = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        forecast = {}
+    forecast["indices"] = {
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "start": start.isoformat() + "Z",
+        "hours": args.hours,
+        "tzOffsetHours": TZ_OFFSET_HOURS,
+        "ffwiCritical": FFWI_CRITICAL,
+        "counties": counties,
+    }
+    os.makedirs(os.path.dirname(FORECAST_FILE), exist_ok=True)
+    with open(FORECAST_FILE, "w") as f:
+        json.dump(forecast, f, indent=2)
+
+    print(f"✅ FFWI/HDW: {len(counties)} counties × {args.hours} h in {elapsed:.1f} ms → {FORECAST_FILE}")
+    for name, entry in counties.items():
+        f_peak, h_peak = entry["ffwi"], entry["hdw"]
+        if f_peak:
+            flag = " ⚠️" if f_peak["peak"] >= FFWI_CRITICAL else ""
+            print(f"   {name:15s} FFWI {f_peak['peak']:5.1f} at {f_peak['at']}  "
+                  f"HDW {h_peak['peak']:6.1f} at {h_peak['at']}{flag}")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("fire_indices"):
+        sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+firewx - single command-line entry point for the Five Forks fire weather pipeline
+Wraps fetch_firms, fetch_weather, the forecast/brief generators, alert checks and
+diagnostics as subcommands.
+
+Startup is kept deliberately light: this module imports only the standard library
+needed to parse arguments. Each subcommand imports its own module (and with it
+requests, urllib3 or python-docx) only when it actually runs, so `--help`,
+`alerts` and `diagnose` never pay for the heavy imports.
+
+Usage:
+  python firewx.py <command> [options]
+  python firewx.py --timing alerts     # print startup/run time to stderr
+  python firewx.py --profile fetch-firms  # write cProfile/spans to profiles/
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(REPO_ROOT, "scripts")
+
+# Commands that are called from shell loops/hooks and must start fast
+LIGHT_COMMANDS = {"alerts", "nws-alerts", "diagnose"}
+
+# Cold-start budget for light commands, in milliseconds (argument parsing only)
+STARTUP_BUDGET_MS = 50
+
+
+def load_module(name):
+    """Import a pipeline module by name from the repo root or scripts/"""
+    for path in (SCRIPTS_DIR, REPO_ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return importlib.import_module(name)
+
+
+# ---------------------------------------------------------------------------
+# Subcommand handlers (each imports only what it needs)
+# ---------------------------------------------------------------------------
+
+def cmd_fetch_firms(args):
+    load_module("fetch_firms").main(["--scheduled"] if args.scheduled else [])
+    return 0
+
+
+def cmd_firms_schedule(args):
+    argv = ["--cron-minutes", str(args.cron_minutes)]
+    if args.simulate:
+        argv += ["--simulate", str(args.simulate)]
+    return load_module("overpass").main(argv)
+
+
+def cmd_heat(args):
+    argv = ["--zooms", args.zooms, "--format", args.format]
+    for path in args.input or []:
+        argv += ["--input", path]
+    if args.half_life_days is not None:
+        argv += ["--half-life-days", str(args.half_life_days)]
+    return load_module("heat_raster").main(argv)
+
+
+def cmd_backfill(args):
+    argv = ["--start", args.start, "--workers", str(args.workers),
+            "--days-per-chunk", str(args.days_per_chunk)]
+    if args.end:
+        argv += ["--end", args.end]
+    return load_module("firms_backfill").main(argv)
+
+
+def cmd_fetch_weather(args):
+    load_module("fetch_weather").main()
+    return 0
+
+
+def cmd_drought(args):
+    return load_module("drought_index").main()
+
+
+def cmd_qc(args):
+    argv = ["--days", str(args.days)]
+    if args.benchmark:
+        argv.append("--benchmark")
+    return load_module("obs_qc").main(argv)
+
+
+def cmd_fuel_moisture(args):
+    return load_module("fuel_moisture").main()
+
+
+def cmd_danger_grid(args):
+    return load_module("spatial_interp").main(
+        ["--method", args.method, "--resolution-km", str(args.resolution_km)])
+
+
+def cmd_forecast(args):
+    load_module("generate_forecast").main()
+    return 0
+
+
+def cmd_ensemble(args):
+    argv = ["--samples", str(args.samples)]
+    if args.errors:
+        argv += ["--errors", args.errors]
+    if args.seed is not None:
+        argv += ["--seed", str(args.seed)]
+    if args.benchmark:
+        argv.append("--benchmark")
+    return load_module("ensemble").main(argv)
+
+
+def cmd_indices(args):
+    argv = ["--hours", str(args.hours)]
+    if args.benchmark:
+        argv += ["--benchmark", "--cells", str(args.cells)]
+    return load_module("fire_indices").main(argv)
+
+
+def cmd_brief(args):
+    if args.html:
+        load_module("generate_briefs").main()
+        return 0
+    if not args.input or not args.output:
+        print("❌ ERROR: brief requires <input.json> <output.docx> (or --html)")
+        return 1
+    load_module("build_five_forks_brief").main([args.input, args.output])
+    return 0
+
+
+def cmd_brief_archive(args):
+    argv = ["--backtest"] if args.backtest else []
+    if args.workers:
+        argv += ["--workers", str(args.workers)]
+    return load_module("extract_brief_archive").main(argv)
+
+
+def cmd_brief_index(args):
+    argv = ["--query", args.query] if args.query is not None else []
+    return load_module("build_brief_index").main(argv)
+
+
+def cmd_publish(args):
+    load_module("publish_api").main()
+    return 0
+
+
+def cmd_prerender(args):
+    load_module("prerender").main()
+    return 0
+
+
+def cmd_profile_diff(args):
+    return load_module("profiling").main(["diff", args.old, args.new, "--top", str(args.top)])
+
+
+def cmd_freshness(args):
+    return load_module("freshness").main(args.sources)
+
+
+def cmd_alerts(args):
+    load_module("check_alerts").main()
+    return 0
+
+
+def cmd_nws_alerts(args):
+    argv = ["--build-index"] if args.build_index else []
+    return load_module("nws_alerts").main(argv)
+
+
+def cmd_loadtest(args):
+    argv = ["--clients", str(args.clients), "--retry-scale", str(args.retry_scale)]
+    for name in args.sequence or ():
+        argv += ["--sequence", name]
+    if args.gate:
+        argv.append("--gate")
+    if args.gate_latency:
+        argv.append("--gate-latency")
+    return load_module("loadtest").main(argv)
+
+
+def cmd_diagnose(args):
+    ok = load_module("diagnostic_check").run_checks()
+    return 0 if ok else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="firewx",
+        description="Five Forks fire weather pipeline")
+    parser.add_argument(
+        "--timing", action="store_true",
+        default=bool(os.environ.get("FIREWX_TIMING")),
+        help="report startup and run time on stderr (or set FIREWX_TIMING=1)")
+    parser.add_argument(
+        "--profile", action="store_true",
+        default=os.environ.get("FIREWX_PROFILE", "").strip().lower() not in ("", "0", "false", "no"),
+        help="write cProfile stats and timing spans to profiles/ (or set FIREWX_PROFILE=1)")
+    parser.add_argument(
+        "--profile-memory", type=int, default=None, metavar="N",
+        help="with --profile, also record the top N allocation sites (tracemalloc)")
+    sub = parser.add_subparsers(dest="command", metavar="<command>")
+    sub.required = True
+
+    p = sub.add_parser("fetch-firms", help="fetch FIRMS hotspots from all satellites")
+    p.add_argument("--scheduled", action="store_true",
+                   help="only poll satellites whose overpass data should now be available")
+    p.set_defaults(func=cmd_fetch_firms)
+
+    p = sub.add_parser("firms-schedule", help="show predicted FIRMS overpasses and what is due")
+    p.add_argument("--simulate", type=int, metavar="DAYS", default=None,
+                   help="compare fixed and adaptive polling over DAYS days")
+    p.add_argument("--cron-minutes", type=int, default=30)
+    p.set_defaults(func=cmd_firms_schedule)
+
+    p = sub.add_parser("heat", help="render FRP / detection-density heat tiles under data/heat/")
+    p.add_argument("--input", action="append", metavar="FILE",
+                   help="hotspot snapshot or archive (repeatable)")
+    p.add_argument("--zooms", default="5-10", metavar="MIN-MAX")
+    p.add_argument("--half-life-days", type=float, default=None)
+    p.add_argument("--format", choices=["png", "u8"], default="png")
+    p.set_defaults(func=cmd_heat)
+
+    p = sub.add_parser("backfill", help="resumable multi-day FIRMS backfill into data/firms_archive.json")
+    p.add_argument("--start", required=True, help="first day (YYYY-MM-DD)")
+    p.add_argument("--end", help="last day, inclusive (default: today UTC)")
+    p.add_argument("--workers", type=int, default=4, help="max concurrent FIRMS requests")
+    p.add_argument("--days-per-chunk", type=int, default=10)
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser("fetch-weather", help="fetch latest NWS observations per county")
+    p.set_defaults(func=cmd_fetch_weather)
+
+    p = sub.add_parser("drought", help="advance days-since-rain/rolling rain/KBDI state")
+    p.set_defaults(func=cmd_drought)
+
+    p = sub.add_parser("qc", help="quality-control stored station observations")
+    p.add_argument("--days", type=float, default=7, help="window to (re)check")
+    p.add_argument("--benchmark", action="store_true",
+                   help="time a synthetic 200-station season and exit")
+    p.set_defaults(func=cmd_qc)
+
+    p = sub.add_parser("fuel-moisture", help="precompute hourly 1/10/100-hr fuel moisture")
+    p.set_defaults(func=cmd_fuel_moisture)
+
+    p = sub.add_parser("danger-grid", help="render the interpolated danger-class grid overlay")
+    p.add_argument("--method", choices=["idw", "kriging"], default="idw")
+    p.add_argument("--resolution-km", type=float, default=1.0)
+    p.set_defaults(func=cmd_danger_grid)
+
+    p = sub.add_parser("forecast", help="write forecasts/forecast_data.json")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser("ensemble", help="Monte Carlo class probabilities into forecast_data.json")
+    p.add_argument("--samples", type=int, default=10000)
+    p.add_argument("--errors", help='error spec, e.g. "temp=normal:3,rh=normal:7,wind=normal:3"')
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--benchmark", action="store_true",
+                   help="time 10k samples x 95 counties x 3 days and exit")
+    p.set_defaults(func=cmd_ensemble)
+
+    p = sub.add_parser("indices", help="hourly FFWI/HDW peaks into forecast_data.json")
+    p.add_argument("--hours", type=int, default=168)
+    p.add_argument("--benchmark", action="store_true",
+                   help="time a synthetic hourly pass and exit")
+    p.add_argument("--cells", type=int, default=95, help="benchmark counties or grid cells")
+    p.set_defaults(func=cmd_indices)
+
+    p = sub.add_parser("brief", help="build the Five Forks DOCX brief (or HTML briefs)")
+    p.add_argument("input", nargs="?", help="brief input JSON")
+    p.add_argument("output", nargs="?", help="output DOCX path")
+    p.add_argument("--html", action="store_true",
+                   help="generate the daily HTML brief instead of a DOCX")
+    p.set_defaults(func=cmd_brief)
+
+    p = sub.add_parser("brief-archive", help="extract class tables from all archived briefs")
+    p.add_argument("--workers", type=int, default=None, help="parser processes")
+    p.add_argument("--backtest", action="store_true", help="print local-vs-DOF agreement")
+    p.set_defaults(func=cmd_brief_archive)
+
+    p = sub.add_parser("brief-index", help="update the brief archive search index (or --query it)")
+    p.add_argument("--query", help='e.g. "dinwiddie dof:4 from:2026-03-01"')
+    p.set_defaults(func=cmd_brief_index)
+
+    p = sub.add_parser("publish", help="write the sharded static API under api/")
+    p.set_defaults(func=cmd_publish)
+
+    p = sub.add_parser("prerender", help="render county cards and forecast grid into index.html")
+    p.set_defaults(func=cmd_prerender)
+
+    p = sub.add_parser("profile-diff", help="compare two .pstats profiles")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--top", type=int, default=25)
+    p.set_defaults(func=cmd_profile_diff)
+
+    p = sub.add_parser("freshness", help="data age and detection latency report")
+    p.add_argument("sources", nargs="*", help="firms, nws (default: all)")
+    p.set_defaults(func=cmd_freshness)
+
+    p = sub.add_parser("alerts", help="check county_data.json against alert thresholds")
+    p.set_defaults(func=cmd_alerts)
+
+    p = sub.add_parser("nws-alerts", help="poll NWS Red Flag / Fire Weather Watch products")
+    p.add_argument("--build-index", action="store_true",
+                   help="rebuild the UGC/SAME zone index from NWS /points")
+    p.set_defaults(func=cmd_nws_alerts)
+
+    p = sub.add_parser("loadtest", help="replay page fetches against the published data")
+    p.add_argument("--clients", type=int, default=50)
+    p.add_argument("--sequence", action="append", help="dashboard, forecast, briefs (default: all)")
+    p.add_argument("--retry-scale", type=float, default=1.0)
+    p.add_argument("--gate", action="store_true", help="exit 1 when a size or parse budget is exceeded")
+    p.add_argument("--gate-latency", action="store_true", help="also gate on the ready p95 budget")
+    p.set_defaults(func=cmd_loadtest)
+
+    p = sub.add_parser("diagnose", help="run dashboard diagnostics")
+    p.set_defaults(func=cmd_diagnose)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    startup_ms = (time.perf_counter() - _T0) * 1000
+    t1 = time.perf_counter()
+    code = 0
+    try:
+        if args.profile and args.command != "profile-diff":
+            profiling = load_module("profiling")
+            with profiling.profile(f"firewx-{args.command}", enabled=True,
+                                   memory_top=args.profile_memory):
+                code = args.func(args)
+        else:
+            code = args.func(args)
+    except SystemExit as e:
+        # Wrapped scripts signal their status through sys.exit()
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        if args.timing:
+            run_ms = (time.perf_counter() - t1) * 1000
+            print(f"⏱  firewx {args.command}: startup {startup_ms:.1f} ms, "
+                  f"run {run_ms:.1f} ms", file=sys.stderr)
+            if args.command in LIGHT_COMMANDS and startup_ms > STARTUP_BUDGET_MS:
+                print(f"⚠️  startup exceeded {STARTUP_BUDGET_MS} ms budget", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Resumable multi-day FIRMS backfill
+Splits a date range into day-range chunks (FIRMS allows up to 10 days per
+area request) for every satellite and fetches them in parallel under a
+concurrency cap.
+
+FIRMS keeps the near-real-time (_NRT) products only for a recent window;
+days older than NRT_WINDOW_DAYS are fetched from the standard (_SP)
+products instead. Chunks are never split across that boundary.
+
+Every completed chunk is written to data/backfill/chunks/ and recorded in
+data/backfill/checkpoint.json before the next is counted, so a killed run
+picks up where it stopped. When all chunks are present they are merged and
+deduplicated into data/firms_archive.json.
+
+Usage:
+  python firms_backfill.py --start 2025-10-01 --end 2025-12-31 [--workers 4]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import fetch_firms
+from hotspots import HotspotTable, write_json
+from profiling import profile, span
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKFILL_DIR = os.path.join(REPO_ROOT, "data", "backfill")
+CHUNK_DIR = os.path.join(BACKFILL_DIR, "chunks")
+CHECKPOINT_FILE = os.path.join(BACKFILL_DIR, "checkpoint.json")
+ARCHIVE_FILE = os.path.join(REPO_ROOT, "data", "firms_archive.json")
+
+MAX_DAY_RANGE = 10      # FIRMS area API limit per request
+DEFAULT_WORKERS = 4     # be polite to the FIRMS API / MAP_KEY rate limit
+
+# Days of history FIRMS serves from the NRT products; older days come from
+# the standard science-quality products
+NRT_WINDOW_DAYS = 60
+STANDARD_PRODUCTS = {
+    'MODIS': 'MODIS_SP',
+    'VIIRS_SNPP': 'VIIRS_SNPP_SP',
+    'VIIRS_NOAA20': 'VIIRS_NOAA20_SP',
+}
+
+
+def plan_chunks(start, end, satellites=None, days_per_chunk=MAX_DAY_RANGE, today=None):
+    """
+    Split [start, end] (dates, inclusive) into (sat_name, sat_id, date_str,
+    day_range) chunks, one series per satellite; days before the NRT window
+    use the satellite's standard product
+    """
+    satellites = satellites or fetch_firms.SATELLITES
+    days_per_chunk = max(1, min(MAX_DAY_RANGE, days_per_chunk))
+    nrt_start = (today or datetime.utcnow().date()) - timedelta(days=NRT_WINDOW_DAYS)
+    chunks = []
+    for sat_name, sat_id in satellites.items():
+        day = start
+        while day <= end:
+            standard = day < nrt_start and sat_name in STANDARD_PRODUCTS
+            last = min(end, nrt_start - timedelta(days=1)) if standard else end
+            days = min(days_per_chunk, (last - day).days + 1)
+            product = STANDARD_PRODUCTS[sat_name] if standard else sat_id
+            chunks.append((sat_name, product, day.strftime('%Y-%m-%d'), days))
+            day += timedelta(days=days)
+    return chunks
+
+
+def chunk_key(chunk):
+    sat_name, sat_id, date_str, days = chunk
+    suffix = "_SP" if sat_id.endswith("_SP") else ""
+    return f"{sat_name}_{date_str}_{days}{suffix}"
+
+
+def chunk_final(chunk, today=None):
+    """False while the chunk covers today: later passes can still add detections"""
+    _, _, date_str, days = chunk
+    last = datetime.strptime(date_str, '%Y-%m-%d').date() + timedelta(days=days - 1)
+    return last < (today or datetime.utcnow().date())
+
+
+class Checkpoint:
+    """Thread-safe record of completed chunk keys, rewritten atomically"""
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                self.done = set(json.load(f).get("completed", []))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.done = set()
+
+    def mark(self, key):
+        with self.lock:
+            self.done.add(key)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"updated": datetime.utcnow().isoformat() + "Z",
+                           "completed": sorted(self.done)}, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+@span()
+def fetch_chunk(chunk):
+    """Fetch one chunk and persist its hotspots; raises on API failure"""
+    sat_name, sat_id, date_str, days = chunk
+    # Tiles run one at a time here; the backfill pool already caps concurrency
+    hotspots = fetch_firms.fetch_satellite_region(sat_id, date_str, day_range=days,
+                                                  raise_on_failure=True, workers=1)
+    path = os.path.join(CHUNK_DIR, chunk_key(chunk) + ".json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(hotspots.to_records(), f)
+    os.replace(tmp, path)
+    return len(hotspots)
+
+
+def run_backfill(start, end, workers=DEFAULT_WORKERS, days_per_chunk=MAX_DAY_RANGE):
+    """Fetch every missing chunk; returns (planned chunks, failed keys)"""
+    os.makedirs(CHUNK_DIR, exist_ok=True)
+    checkpoint = Checkpoint()
+    chunks = plan_chunks(start, end, days_per_chunk=days_per_chunk)
+    todo = [c for c in chunks if chunk_key(c) not in checkpoint.done]
+    print(f"📅 {start} → {end}: {len(chunks)} chunks, "
+          f"{len(chunks) - len(todo)} already done, {len(todo)} to fetch "
+          f"({workers} workers)")
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(fetch_chunk, c): c for c in todo}
+        for future in as_completed(futures):
+            key = chunk_key(futures[future])
+            try:
+                count = future.result()
+                if chunk_final(futures[future]):
+                    checkpoint.mark(key)
+                    print(f"  ✅ {key}: {count} hotspots")
+                else:
+                    print(f"  ✅ {key}: {count} hotspots (includes today; fetched again next run)")
+            except Exception as e:
+                failed.append(key)
+                print(f"  ❌ {key}: {e}")
+    return chunks, failed
+
+
+@span()
+def merge_archive(chunks, path=ARCHIVE_FILE):
+    """Merge chunk files (plus any existing archive) into one deduplicated archive"""
+    parts = []
+    try:
+        with open(path, "r") as f:
+            parts.append(HotspotTable.from_records(json.load(f).get("hotspots", [])))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    for chunk in chunks:
+        chunk_path = os.path.join(CHUNK_DIR, chunk_key(chunk) + ".json")
+        if os.path.exists(chunk_path):
+            with open(chunk_path, "r") as f:
+                parts.append(HotspotTable.from_records(json.load(f)))
+
+    # Chunks fetched at different times may hold a URT detection and its later NRT record
+    unique = HotspotTable.concat(parts).reconcile_tiers().deduplicate(by_date=True)
+    unique = unique.sort('acq_date', 'acq_time')
+    dates = unique.data['acq_date']
+    dates = dates[~np.isnat(dates)]
+    output = {
+        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "start": str(dates.min()) if dates.size else None,
+        "end": str(dates.max()) if dates.size else None,
+        "count": len(unique),
+    }
+    write_json(path, unique, output)
+    return len(unique)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable FIRMS backfill")
+    parser.add_argument("--start", required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=datetime.utcnow().strftime('%Y-%m-%d'),
+                        help="last day, inclusive (default: today UTC)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="max concurrent FIRMS requests")
+    parser.add_argument("--days-per-chunk", type=int, default=MAX_DAY_RANGE)
+    args = parser.parse_args(argv)
+
+    if not fetch_firms.FIRMS_API_KEY:
+        print("❌ ERROR: FIRMS_MAP_KEY environment variable not set")
+        return 1
+    try:
+        start = datetime.strptime(args.start, '%Y-%m-%d').date()
+        end = datetime.strptime(args.end, '%Y-%m-%d').date()
+    except ValueError as e:
+        print(f"❌ ERROR: Invalid date: {e}")
+        return 1
+    if end < start:
+        print("❌ ERROR: --end is before --start")
+        return 1
+
+    chunks, failed = run_backfill(start, end, args.workers, args.days_per_chunk)
+    count = merge_archive(chunks)
+    print(f"\n📦 {ARCHIVE_FILE}: {count} unique hotspots")
+    if failed:
+        print(f"⚠️  {len(failed)} chunks failed; re-run the same command to resume")
+        return 1
+    print("✅ Backfill complete")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("firms_backfill"):
+        code = main()
+    sys.exit(code)
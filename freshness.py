@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+End-to-end data freshness and detection latency
+`lastUpdated` only says when a script ran. This module measures how old the
+data itself is at each stage, per record, on every run:
+
+  firms  acq_to_fetch      satellite acquisition -> our fetch (new detections;
+                           FIRMS availability plus polling delay)
+         fetch_to_publish  fetch start -> snapshot written
+         acq_to_publish    acquisition -> snapshot written (new detections)
+         age_at_publish    age of every detection on the map
+         acq_to_publish_<tier>  the same per FIRMS latency tier (urt/rt/nrt)
+  nws    obs_to_fetch      station observation time -> our fetch (per county)
+         fetch_to_publish  fetch start -> county_data.json written
+         obs_to_publish    observation time -> county_data.json written
+
+Latencies (minutes) go into rolling per-day histograms with fixed bins, kept
+for RETAIN_DAYS days in data/freshness/<source>.json together with a
+p50/p95/max summary (percentiles are the upper edge of their bin). Each
+snapshot also gets a "freshness" header with the current data age and a
+`stale` flag against the source's threshold.
+
+Usage:
+  python freshness.py            # report for every source
+  python freshness.py firms      # one source
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(REPO_ROOT, "data", "freshness")
+
+# Histogram bin upper edges (minutes); the last bin is open-ended
+BINS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 360, 480, 720,
+        1080, 1440, 2880, 4320)
+RETAIN_DAYS = 7
+
+# Published data older than this is flagged stale (minutes)
+STALE_MINUTES = {
+    # a satellite not fetched in full for longer than the overpass
+    # scheduler's maximum interval plus one pass
+    "firms": 14 * 60,
+    # NWS stations report hourly
+    "nws": 120,
+}
+
+
+def parse_time(value):
+    """Naive UTC datetime from an ISO-8601 string ('Z' or offset) or None"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = (dt - dt.utcoffset()).replace(tzinfo=None)
+    return dt
+
+
+def minutes(later, earlier):
+    return (later - earlier).total_seconds() / 60
+
+
+def acquired_at(rec):
+    """Acquisition time of a FIRMS record (acq_date + HHMM acq_time, UTC)"""
+    try:
+        return datetime.strptime(f"{rec['acq_date']} {int(rec['acq_time']):04d}", "%Y-%m-%d %H%M")
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _bin(value):
+    for i, edge in enumerate(BINS):
+        if value <= edge:
+            return i
+    return len(BINS)
+
+
+def _percentile(counts, q):
+    """Upper bin edge holding the q-th quantile (None for the open bin)"""
+    total = sum(counts)
+    if not total:
+        return None
+    target = q * total
+    running = 0
+    for i, c in enumerate(counts):
+        running += c
+        if running >= target:
+            return BINS[i] if i < len(BINS) else None
+    return None
+
+
+class FreshnessStore:
+    """Rolling per-day latency histograms for one source"""
+
+    def __init__(self, source, path=None):
+        self.source = source
+        self.path = path or os.path.join(STORE_DIR, f"{source}.json")
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if data.get("bins") != list(BINS):
+            data = {}               # bin layout changed: start over
+        self.metrics = data.get("metrics", {})
+        self.last_run = data.get("lastRun")
+
+    def record(self, metric, values, day):
+        """Add latency values (minutes) for `metric` to the histogram for `day`"""
+        values = [v for v in values if v is not None and v >= 0]
+        if not values:
+            return
+        days = self.metrics.setdefault(metric, {})
+        entry = days.setdefault(day, {"counts": [0] * (len(BINS) + 1), "max": 0})
+        for v in values:
+            entry["counts"][_bin(v)] += 1
+        entry["max"] = round(max(entry["max"], max(values)), 1)
+
+    def summary(self, metric):
+        """{'n', 'p50', 'p95', 'max'} in minutes over the retained days"""
+        days = self.metrics.get(metric, {})
+        counts = [0] * (len(BINS) + 1)
+        for entry in days.values():
+            counts = [a + b for a, b in zip(counts, entry["counts"])]
+        top = max((e["max"] for e in days.values()), default=None)
+
+        def pct(q):
+            edge = _percentile(counts, q)
+            return top if edge is None or (top is not None and edge > top) else edge
+
+        return {"n": sum(counts), "p50": pct(0.50), "p95": pct(0.95), "max": top}
+
+    def save(self, run):
+        """Drop days outside the window and write the store with a summary"""
+        cutoff = (parse_time(run["publishedAt"]) - timedelta(days=RETAIN_DAYS - 1)).strftime("%Y-%m-%d")
+        for days in self.metrics.values():
+            for day in [d for d in days if d < cutoff]:
+                del days[day]
+        self.last_run = run
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "source": self.source,
+                "bins": list(BINS),
+                "retainDays": RETAIN_DAYS,
+                "lastRun": run,
+                "summary": {m: self.summary(m) for m in sorted(self.metrics)},
+                "metrics": self.metrics,
+            }, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def _stats(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {"p50": round(values[len(values) // 2], 1), "max": round(values[-1], 1)}
+
+
+def track_firms(records, fetched_at, published_at, source_updated, new_keys=None, store=None):
+    """
+    Record FIRMS latencies for one run and return the snapshot's freshness header
+    records: published hotspot dicts; new_keys: (lat, lon, date, time) of
+    detections first seen this run (None = treat all as new).
+    """
+    store = store or FreshnessStore("firms")
+    published = parse_time(published_at)
+    fetched = parse_time(fetched_at)
+    day = published.strftime("%Y-%m-%d")
+
+    ages, new_fetch, new_publish = [], [], []
+    by_tier = {}
+    newest = None
+    for rec in records:
+        acq = acquired_at(rec)
+        if acq is None:
+            continue
+        newest = acq if newest is None or acq > newest else newest
+        ages.append(minutes(published, acq))
+        key = (rec.get("latitude"), rec.get("longitude"), rec.get("acq_date"), rec.get("acq_time"))
+        if new_keys is None or key in new_keys:
+            new_fetch.append(minutes(fetched, acq))
+            new_publish.append(minutes(published, acq))
+            by_tier.setdefault(rec.get("tier") or "NRT", []).append(minutes(published, acq))
+
+    store.record("age_at_publish", ages, day)
+    store.record("acq_to_fetch", new_fetch, day)
+    store.record("acq_to_publish", new_publish, day)
+    store.record("fetch_to_publish", [minutes(published, fetched)], day)
+    for tier, values in by_tier.items():
+        store.record(f"acq_to_publish_{tier.lower()}", values, day)
+
+    source_age = {name: (round(minutes(published, parse_time(ts)), 1) if parse_time(ts) else None)
+                  for name, ts in (source_updated or {}).items()}
+    threshold = STALE_MINUTES["firms"]
+    header = {
+        "publishedAt": published_at,
+        "newestAcquisition": newest.isoformat() + "Z" if newest else None,
+        "newestAgeMinutes": round(minutes(published, newest), 1) if newest else None,
+        "newDetections": len(new_publish),
+        "detectionLatencyMinutes": _stats(new_publish),
+        "detectionLatencyByTier": {tier: _stats(v) for tier, v in sorted(by_tier.items())},
+        "sourceAgeMinutes": source_age,
+        "staleThresholdMinutes": threshold,
+        "stale": any(a is None or a > threshold for a in source_age.values()),
+    }
+    store.save(header)
+    return header
+
+
+def track_nws(counties, fetch_times, started_at, published_at, store=None):
+    """
+    Record NWS latencies for one run and return county_data.json's freshness header
+    counties: county entries (with "observedAt"); fetch_times: {name: datetime}
+    for the counties fetched this run.
+    """
+    store = store or FreshnessStore("nws")
+    published = parse_time(published_at)
+    day = published.strftime("%Y-%m-%d")
+    threshold = STALE_MINUTES["nws"]
+
+    to_fetch, to_publish, ages = [], [], {}
+    for c in counties:
+        observed = parse_time(c.get("observedAt"))
+        if observed is None:
+            ages[c["name"]] = None
+            continue
+        ages[c["name"]] = round(minutes(published, observed), 1)
+        if c["name"] in fetch_times:
+            to_fetch.append(minutes(fetch_times[c["name"]], observed))
+            to_publish.append(minutes(published, observed))
+
+    store.record("obs_to_fetch", to_fetch, day)
+    store.record("obs_to_publish", to_publish, day)
+    store.record("fetch_to_publish", [minutes(published, started_at)], day)
+
+    known = [a for a in ages.values() if a is not None]
+    header = {
+        "publishedAt": published_at,
+        "observationAgeMinutes": ages,
+        "oldestAgeMinutes": max(known) if known else None,
+        "staleThresholdMinutes": threshold,
+        "staleCounties": sorted(n for n, a in ages.items() if a is None or a > threshold),
+    }
+    header["stale"] = bool(header["staleCounties"])
+    store.save(header)
+    return header
+
+
+def report(sources=None):
+    """Print each source's latency summary and last-run flags"""
+    if not sources and os.path.isdir(STORE_DIR):
+        sources = sorted(os.path.splitext(f)[0] for f in os.listdir(STORE_DIR) if f.endswith(".json"))
+    if not sources:
+        print("No freshness data yet (data/freshness/ is empty)")
+        return
+    for source in sources:
+        store = FreshnessStore(source)
+        run = store.last_run or {}
+        flag = "⚠️  STALE" if run.get("stale") else "✅ fresh"
+        print(f"\n{source}: {flag} (last run {run.get('publishedAt', 'never')}, "
+              f"threshold {STALE_MINUTES.get(source, '?')} min)")
+        print(f"  {'metric':18s} {'n':>7s} {'p50':>7s} {'p95':>7s} {'max':>8s}   (minutes, last {RETAIN_DAYS} days)")
+        for metric in sorted(store.metrics):
+            s = store.summary(metric)
+            fmt = lambda v: "-" if v is None else f"{v:g}"
+            print(f"  {metric:18s} {s['n']:7d} {fmt(s['p50']):>7s} {fmt(s['p95']):>7s} {fmt(s['max']):>8s}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    report(argv or None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Server-side fuel moisture model (port of fuel-calculator.js)
+Same EMC and exponential time-lag equations as computeEMC/stepMoisture/runModel,
+vectorized with NumPy so every county's hourly NWS forecast is stepped at once
+for 1-hr, 10-hr and 100-hr fuels.
+
+Initial moisture is spun up from the last 72 h of observed history in the local
+observation store when available, otherwise the calculator defaults are used.
+Writes a compact per-county forecast to data/fuel_moisture.json that the
+dashboard only has to display.
+
+Usage:
+  python fuel_moisture.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+import deadline
+from profiling import profile
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_FILE = os.path.join(REPO_ROOT, "data", "fuel_moisture.json")
+
+# Fuel classes and their time lags (hours)
+TIME_LAGS = {"1hr": 1.0, "10hr": 10.0, "100hr": 100.0}
+
+# Starting moisture (%) when there is no observed history to spin up from
+DEFAULT_INITIAL = {"1hr": 8.0, "10hr": 10.0, "100hr": 15.0}
+
+# 1-hr moisture at or below this is flagged as critical drying (matches the JS)
+CRITICAL_1HR = 6.0
+
+FORECAST_HOURS = 168
+
+# Time budget for the forecast fetches (seconds; FIREWX_DEADLINE overrides)
+RUN_BUDGET_S = 300
+SPINUP_HOURS = 72
+
+
+def compute_emc(temp_f, rh):
+    """Equilibrium moisture content (%) - same empirical form as computeEMC()"""
+    T = np.asarray(temp_f, dtype=float)
+    RH = np.clip(np.asarray(rh, dtype=float), 0, 100)
+    emc = (0.942 * RH ** 0.679
+           + 11 * np.exp((RH - 100) / 10)
+           + 0.18 * (21.1 - T) * (1 - np.exp(-0.115 * RH)))
+    return np.maximum(0.1, np.round(emc, 1))
+
+
+def step_moisture(initial, emc, hours, time_lag):
+    """m_t = EMC + (m0 - EMC) * exp(-hours / timeLag) - same as stepMoisture()"""
+    k = np.exp(-np.asarray(hours, dtype=float) / np.maximum(0.0001, time_lag))
+    return np.round(emc + (np.asarray(initial, dtype=float) - emc) * k, 1)
+
+
+def run_model(initial1hr, initial10hr, forecast_entries):
+    """Daily model with the same inputs/outputs as runModel() in fuel-calculator.js"""
+    entries = list(forecast_entries)
+    results = {
+        "initial1hr": float(initial1hr),
+        "initial10hr": float(initial10hr),
+        "dailyResults": [],
+        "summary": {},
+    }
+    if not entries:
+        results["summary"]["firstCritical1HrDay"] = None
+        return results
+
+    emc = compute_emc([d["temp"] for d in entries], [d["rh"] for d in entries])
+    prev1, prev10 = float(initial1hr), float(initial10hr)
+    for i, day in enumerate(entries):
+        hours = day.get("hours") or 12
+        m1 = float(step_moisture(prev1, emc[i], hours, 1))
+        m10 = float(step_moisture(prev10, emc[i], hours, 10))
+        results["dailyResults"].append({
+            "day": day.get("label") or f"Day {i + 1}",
+            "temp": day["temp"],
+            "rh": day["rh"],
+            "wind": day.get("wind") or 0,
+            "hours": hours,
+            "moisture1Hr": m1,
+            "moisture10Hr": m10,
+        })
+        prev1, prev10 = m1, m10
+
+    first = next((r["day"] for r in results["dailyResults"] if r["moisture1Hr"] <= CRITICAL_1HR), None)
+    results["summary"]["firstCritical1HrDay"] = first
+    return results
+
+
+def forward_fill(a):
+    """Fill NaN gaps along the last axis with the previous valid value"""
+    a = np.asarray(a, dtype=float)
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(a, idx, axis=-1)
+
+
+def moisture_series(temp_f, rh, initial, time_lags=TIME_LAGS, step_hours=1.0):
+    """
+    Step every fuel class for every county through an hourly series
+    temp_f, rh: (counties, hours); initial: (classes, counties)
+    Returns (classes, counties, hours). Hours without data hold moisture
+    steady; counties with no data at all (forecast not fetched) come back NaN
+    rather than as the initial moisture carried forward.
+    """
+    emc = compute_emc(forward_fill(temp_f), forward_fill(rh))
+    lags = np.array(list(time_lags.values()), dtype=float)
+    k = np.exp(-step_hours / lags)[:, None]
+    m = np.array(initial, dtype=float)
+    out = np.empty((len(lags),) + emc.shape)
+    # The time-lag recurrence is sequential in time; each step is one array op
+    # across all counties and fuel classes.
+    for h in range(emc.shape[1]):
+        e = emc[:, h]
+        m = np.where(np.isnan(e), m, e + (m - e) * k)
+        out[:, :, h] = m
+    out[:, np.isnan(emc).all(axis=1), :] = np.nan
+    return out
+
+
+def observed_initial(counties, now=None):
+    """Spin up (classes, counties) initial moisture from stored observations"""
+    initial = np.array([[DEFAULT_INITIAL[c]] * len(counties) for c in TIME_LAGS])
+    db = os.path.join(REPO_ROOT, "data", "observations.db")
+    if not os.path.exists(db):
+        return initial
+
+    from obs_store import ObservationStore
+    end = int(now if now is not None else time.time()) // 3600 * 3600
+    start = end - SPINUP_HOURS * 3600
+    temp = np.full((len(counties), SPINUP_HOURS), np.nan)
+    rh = np.full((len(counties), SPINUP_HOURS), np.nan)
+    with ObservationStore(db) as store:
+        for i, county in enumerate(counties):
+            for station in store.stations_for(county["name"]):
+                rows = store.series(station, start=start, end=end - 1, fields=("temp_f", "rh"))
+                if not rows:
+                    continue
+                data = np.array(rows, dtype=float)
+                hour = ((data[:, 0] - start) // 3600).astype(int)
+                temp[i, hour] = data[:, 1]
+                rh[i, hour] = data[:, 2]
+                break
+
+    seen = ~np.all(np.isnan(temp) | np.isnan(rh), axis=1)
+    if seen.any():
+        spun = moisture_series(temp, rh, initial)[:, :, -1]
+        initial = np.where(seen & ~np.isnan(spun), spun, initial)
+    return initial
+
+
+def build_output(counties, start, moisture):
+    """Compact per-county JSON payload (values rounded to 0.1 %)"""
+    out = {
+        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "start": start.isoformat() + "Z",
+        "stepHours": 1,
+        "criticalThreshold": CRITICAL_1HR,
+        "counties": {},
+    }
+    one_hr = list(TIME_LAGS).index("1hr")
+    for i, county in enumerate(counties):
+        entry = {}
+        for j, name in enumerate(TIME_LAGS):
+            vals = np.round(moisture[j, i], 1)
+            entry[name] = [None if np.isnan(v) else float(v) for v in vals]
+        series = moisture[one_hr, i]
+        if np.isnan(series).all():
+            entry["min1hr"] = None
+            entry["firstCritical1hr"] = None
+        else:
+            entry["min1hr"] = round(float(np.nanmin(series)), 1)
+            crit = np.flatnonzero(series <= CRITICAL_1HR)
+            entry["firstCritical1hr"] = int(crit[0]) if crit.size else None
+        out["counties"][county["name"]] = entry
+    return out
+
+
+def main():
+    from fetch_weather import COUNTIES, fetch_hourly_forecast
+
+    print(f"Fetching hourly NWS forecasts for {len(COUNTIES)} counties...")
+    temp = np.full((len(COUNTIES), FORECAST_HOURS), np.nan)
+    rh = np.full((len(COUNTIES), FORECAST_HOURS), np.nan)
+    # One start for every row, even if the run crosses an hour boundary
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    fetched = 0
+    deadline.start(default=RUN_BUDGET_S)
+    for i, county in enumerate(COUNTIES):
+        if deadline.expired():
+            print(f"  ⏰ Deadline reached; no forecast for {county['name']}")
+            continue
+        try:
+            fc = fetch_hourly_forecast(county["lat"], county["lon"], FORECAST_HOURS, start)
+        except deadline.DeadlineExceeded:
+            print(f"  ⏰ Deadline reached at {county['name']}")
+            break
+        if not fc:
+            print(f"  Warning: no forecast for {county['name']}")
+            continue
+        fetched += 1
+        temp[i] = np.array(fc["temp_f"], dtype=float)
+        rh[i] = np.array(fc["rh"], dtype=float)
+    if not fetched:
+        print("❌ ERROR: no hourly forecasts fetched")
+        return 1
+
+    t0 = time.perf_counter()
+    moisture = moisture_series(temp, rh, observed_initial(COUNTIES))
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    output = build_output(COUNTIES, start, moisture)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(output, f, separators=(",", ":"))
+
+    print(f"✅ Fuel moisture forecast written to {OUTPUT_FILE} ({elapsed:.1f} ms model time)")
+    for name, entry in output["counties"].items():
+        print(f"  {name}: min 1-hr {entry['min1hr']}%")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("fuel_moisture"):
+        code = main()
+    sys.exit(code)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Small geometry helpers shared by the spatial stages
+- Virginia boundary polygon (data/virginia_boundary.geojson)
+- Vectorized point-in-polygon and bounding boxes
+- Local equirectangular projection to kilometres
+- Polygon/box clipping and a tiling planner for API-sized bounding boxes
+"""
+import json
+import math
+import os
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+BOUNDARY_FILE = os.path.join(REPO_ROOT, "data", "virginia_boundary.geojson")
+
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG_LON_EQ = 111.32
+
+
+def load_boundary(path=BOUNDARY_FILE):
+    """Outer ring of the Virginia outline as an (N, 2) array of lon, lat"""
+    with open(path, "r", encoding="utf-8") as fh:
+        feature = json.load(fh)
+    geom = feature.get("geometry", feature)
+    return np.asarray(geom["coordinates"][0], dtype=float)
+
+
+def polygon_bbox(ring):
+    """(min_lat, min_lon, max_lat, max_lon) of a lon/lat ring"""
+    return (float(ring[:, 1].min()), float(ring[:, 0].min()),
+            float(ring[:, 1].max()), float(ring[:, 0].max()))
+
+
+def points_in_polygon(lon, lat, ring):
+    """
+    Even-odd ray casting for many points at once
+    Loops over polygon edges (tens), vectorized over points (up to millions).
+    """
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    inside = np.zeros(np.broadcast(lon, lat).shape, dtype=bool)
+    x0, y0 = ring[-1]
+    for x1, y1 in ring:
+        if y0 != y1:
+            crosses = (y1 > lat) != (y0 > lat)
+            x_at = x1 + (lat - y1) * (x0 - x1) / (y0 - y1)
+            inside ^= crosses & (lon < x_at)
+        x0, y0 = x1, y1
+    return inside
+
+
+def project_km(lon, lat, ref_lat=37.5):
+    """Project lon/lat to x/y kilometres (equirectangular about ref_lat)"""
+    kx = KM_PER_DEG_LON_EQ * math.cos(math.radians(ref_lat))
+    return np.asarray(lon, dtype=float) * kx, np.asarray(lat, dtype=float) * KM_PER_DEG_LAT
+
+
+def clip_ring_to_box(ring, box):
+    """
+    Sutherland-Hodgman clip of a lon/lat ring to box (west, south, east, north)
+    Returns the clipped vertices as an (M, 2) array (M == 0 if disjoint)
+    """
+    west, south, east, north = box
+    edges = (
+        (lambda p: p[0] >= west, lambda a, b: _cross_x(a, b, west)),
+        (lambda p: p[0] <= east, lambda a, b: _cross_x(a, b, east)),
+        (lambda p: p[1] >= south, lambda a, b: _cross_y(a, b, south)),
+        (lambda p: p[1] <= north, lambda a, b: _cross_y(a, b, north)),
+    )
+    pts = [tuple(p) for p in ring]
+    for inside, cross in edges:
+        if not pts:
+            break
+        out = []
+        prev = pts[-1]
+        for cur in pts:
+            if inside(cur):
+                if not inside(prev):
+                    out.append(cross(prev, cur))
+                out.append(cur)
+            elif inside(prev):
+                out.append(cross(prev, cur))
+            prev = cur
+        pts = out
+    return np.asarray(pts, dtype=float).reshape(-1, 2)
+
+
+def _cross_x(a, b, x):
+    t = (x - a[0]) / (b[0] - a[0])
+    return (x, a[1] + t * (b[1] - a[1]))
+
+
+def _cross_y(a, b, y):
+    t = (y - a[1]) / (b[1] - a[1])
+    return (a[0] + t * (b[0] - a[0]), y)
+
+
+def box_area(box):
+    west, south, east, north = box
+    return max(0.0, east - west) * max(0.0, north - south)
+
+
+def plan_tiles(ring, max_width=2.0, max_height=1.5):
+    """
+    Cover a lon/lat polygon with a small set of boxes no larger than
+    max_width x max_height degrees, as (west, south, east, north) tuples.
+
+    The polygon's bounding box is cut into a regular grid of cells, each cell
+    is shrunk to the bounding box of the polygon inside it (empty cells are
+    dropped), then neighbours are merged while the merged box stays within
+    the size limit and covers no more area than the two tiles did.
+    """
+    min_lat, min_lon, max_lat, max_lon = polygon_bbox(ring)
+    cols = int(np.ceil((max_lon - min_lon) / max_width))
+    rows = int(np.ceil((max_lat - min_lat) / max_height))
+    col_w = (max_lon - min_lon) / cols
+    row_h = (max_lat - min_lat) / rows
+
+    tiles = []
+    for r in range(rows):
+        for c in range(cols):
+            cell = (min_lon + c * col_w, min_lat + r * row_h,
+                    min_lon + (c + 1) * col_w, min_lat + (r + 1) * row_h)
+            part = clip_ring_to_box(ring, cell)
+            if len(part) < 3:
+                continue
+            tiles.append((float(part[:, 0].min()), float(part[:, 1].min()),
+                          float(part[:, 0].max()), float(part[:, 1].max())))
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(tiles)):
+            for j in range(i + 1, len(tiles)):
+                a, b = tiles[i], tiles[j]
+                union = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                if (union[2] - union[0] <= max_width + 1e-9
+                        and union[3] - union[1] <= max_height + 1e-9
+                        and box_area(union) <= box_area(a) + box_area(b) + 1e-9):
+                    tiles[i] = union
+                    del tiles[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return tiles
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution FRP / detection-density heat tiles from FIRMS hotspots
+The dashboard draws every hotspot as its own marker, which gives no sense of
+where fire activity concentrates and gets slow over a season of detections.
+This stage bins the detections into a Web-Mercator tile pyramid that Leaflet
+can show as an ordinary tile layer:
+
+  frp      fire radiative power (MW) x confidence weight
+  density  confidence weight only (detections per area)
+
+Optionally each detection decays with age (half-life in days, counted back
+from the newest acquisition), so a season archive shows where it is burning
+now without dropping older activity entirely.
+
+Each zoom level is one pass of whole-array work: project to global pixel
+coordinates, accumulate per pixel (sparse 2-D histogram via unique keys +
+merge-sort reduce), smooth with a separable Gaussian, quantize to LEVELS
+steps (sqrt scale, per-zoom 99.5th-percentile ceiling) and cut into 256 px
+tiles. Only tiles with any heat are written. Tiles are indexed PNGs, or
+zlib-compressed raw uint8 arrays (--format u8) for clients that colour the
+values themselves; the few distinct levels keep either form small.
+
+Output: data/heat/<layer>/<z>/<x>/<y>.png plus data/heat/index.json (tile
+list per zoom, scale per zoom for de-quantizing, bounds).
+
+Usage:
+  python heat_raster.py                              # firms_data.json (+ archive)
+  python heat_raster.py --half-life-days 3 --zooms 5-10
+  python heat_raster.py --input data/firms_archive.json --format u8
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from hotspots import HotspotTable, decode
+from profiling import profile
+from spatial_interp import write_png
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(REPO_ROOT, "data", "heat")
+INDEX_FILE = os.path.join(OUTPUT_DIR, "index.json")
+DEFAULT_INPUTS = ("firms_data.json", os.path.join("data", "firms_archive.json"))
+
+LAYERS = ("frp", "density")
+TILE = 256
+DEFAULT_ZOOMS = (5, 10)
+RADIUS_PX = 6                 # Gaussian kernel half-width (screen pixels at every zoom)
+CEILING_PERCENTILE = 99.5     # heat at or above this percentile is full colour
+LEVELS = 32                   # quantization steps (0 = no heat)
+ZLIB_LEVEL = 6
+
+# Detection weight by confidence: VIIRS classes (word or letter); MODIS
+# reports 0-100, used as a fraction
+CONFIDENCE_WEIGHT = {"low": 0.3, "l": 0.3, "nominal": 0.7, "n": 0.7, "high": 1.0, "h": 1.0}
+DEFAULT_CONFIDENCE = 0.5
+FRP_FLOOR = 1.0               # MW; detections without FRP still count a little
+
+
+def _ramp():
+    """LEVELS + 1 entry heat palette (index 0 transparent): pale yellow -> red -> dark red"""
+    stops = [(0.0, (255, 255, 178), 70), (0.35, (254, 178, 76), 150),
+             (0.65, (240, 59, 32), 200), (1.0, (128, 0, 38), 235)]
+    t = np.linspace(0, 1, LEVELS)
+    pos = [s[0] for s in stops]
+    rgb = np.stack([np.interp(t, pos, [s[1][c] for s in stops]) for c in range(3)], axis=1)
+    alpha = np.interp(t, pos, [s[2] for s in stops])
+    palette = [(0, 0, 0)] + [tuple(int(round(v)) for v in row) for row in rgb]
+    return palette, [0] + [int(round(a)) for a in alpha]
+
+
+HEAT_PALETTE, HEAT_ALPHA = _ramp()
+
+
+def load_hotspots(paths):
+    """Concatenate hotspot snapshots/archives, dropping exact repeats"""
+    parts, used = [], []
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                records = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        if isinstance(records, dict):
+            records = records.get("hotspots", [])
+        parts.append(HotspotTable.from_records(records))
+        used.append(os.path.relpath(path, REPO_ROOT))
+    return HotspotTable.concat(parts).unique_exact(), used
+
+
+def confidence_weights(table):
+    """Per-detection weight in (0, 1] from the confidence column"""
+    codes = table.data["confidence"]
+    if not len(codes):
+        return np.empty(0)
+    uniq, inv = np.unique(codes, return_inverse=True)
+    lookup = []
+    for label in decode(uniq):
+        label = label.strip().lower()
+        try:
+            lookup.append(min(max(float(label) / 100, 0.05), 1.0))
+        except ValueError:
+            lookup.append(CONFIDENCE_WEIGHT.get(label, DEFAULT_CONFIDENCE))
+    return np.asarray(lookup)[inv]
+
+
+def acquisition_days(table):
+    """Acquisition time as fractional days since the epoch (NaN when unknown)"""
+    d = table.data
+    days = d["acq_date"].astype("M8[D]").astype("f8")
+    days[np.isnat(d["acq_date"])] = np.nan
+    t = d["acq_time"].astype("f8")
+    frac = np.where(t >= 0, (t // 100 * 60 + t % 100) / 1440, 0.5)
+    return days + frac
+
+
+def detection_weights(table, half_life_days=None):
+    """
+    (N, 2) weights for the frp and density layers, plus the reference time
+    the decay counts back from (None without decay)
+    """
+    conf = confidence_weights(table)
+    frp = np.nan_to_num(table.data["frp"], nan=0.0)
+    weights = np.stack([np.maximum(frp, FRP_FLOOR) * conf, conf], axis=1)
+    reference = None
+    if half_life_days:
+        days = acquisition_days(table)
+        if np.isfinite(days).any():
+            reference = np.nanmax(days)
+            age = np.nan_to_num(reference - days, nan=0.0)
+            weights *= (0.5 ** (age / half_life_days))[:, None]
+    return weights, reference
+
+
+def world_coords(lat, lon):
+    """Web-Mercator coordinates in [0, 1) (x east, y south)"""
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    x = (lon + 180.0) / 360.0
+    s = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * math.pi)
+    return x, y
+
+
+def _reduce(keys, values):
+    """
+    Sum value rows that share a key (sparse histogram): (sorted unique keys, sums)
+    The blur feeds in a few already-sorted runs, which a stable (merge) sort
+    handles in close to linear time.
+    """
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(values[order], starts, axis=0)
+
+
+def _kernel(radius=RADIUS_PX):
+    offsets = np.arange(-radius, radius + 1)
+    k = np.exp(-0.5 * (offsets / (radius / 2)) ** 2)
+    return offsets, k / k.sum()
+
+
+def _blur(keys, values, width, radius=RADIUS_PX):
+    """Separable Gaussian over sparse pixels keyed py * width + px"""
+    offsets, k = _kernel(radius)
+    for stride in (1, width):
+        # offset-major, so the input is len(offsets) sorted runs
+        keys = (keys[None, :] + offsets[:, None] * stride).ravel()
+        values = (k[:, None, None] * values[None, :, :]).reshape(-1, values.shape[1])
+        keys, values = _reduce(keys, values)
+    return keys, values
+
+
+def render_level(x, y, weights, zoom):
+    """
+    Heat for one zoom level
+    Returns (pixel keys, quantized levels per layer (M, L) uint8, ceiling per layer)
+    """
+    width = TILE << zoom
+    px = np.minimum((x * width).astype(np.int64), width - 1)
+    py = np.minimum((y * width).astype(np.int64), width - 1)
+    keys, values = _reduce(py * width + px, weights)
+    keys, values = _blur(keys, values, width)
+    ceilings = np.array([np.percentile(v[v > 0], CEILING_PERCENTILE) if (v > 0).any() else 0.0
+                         for v in values.T])
+    safe = np.where(ceilings > 0, ceilings, 1.0)
+    q = np.rint(LEVELS * np.sqrt(np.clip(values / safe, 0.0, 1.0))).astype(np.uint8)
+    keep = q.any(axis=1)
+    return keys[keep], q[keep], ceilings
+
+
+def tiles(keys, q, zoom):
+    """Yield (x, y, (256, 256, L) uint8) for every tile touched by the pixels"""
+    width = TILE << zoom
+    px, py = keys % width, keys // width
+    tile_id = (py // TILE) * (1 << zoom) + px // TILE
+    order = np.argsort(tile_id, kind="stable")
+    tile_id, px, py, q = tile_id[order], px[order], py[order], q[order]
+    starts = np.flatnonzero(np.r_[True, tile_id[1:] != tile_id[:-1]])
+    ends = np.r_[starts[1:], len(tile_id)]
+    for s, e in zip(starts, ends):
+        tid = int(tile_id[s])
+        arr = np.zeros((TILE, TILE, q.shape[1]), dtype=np.uint8)
+        arr[py[s:e] % TILE, px[s:e] % TILE] = q[s:e]
+        yield tid % (1 << zoom), tid >> zoom, arr
+
+
+def write_tile(path, grid, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == "png":
+        return write_png(path, grid, HEAT_PALETTE, HEAT_ALPHA, ZLIB_LEVEL)
+    data = zlib.compress(grid.tobytes(), ZLIB_LEVEL)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def build(table, zooms=DEFAULT_ZOOMS, half_life_days=None, fmt="png", out_dir=OUTPUT_DIR):
+    """Render every layer and zoom into out_dir; returns the index dict"""
+    weights, reference = detection_weights(table, half_life_days)
+    lat, lon = table.data["latitude"], table.data["longitude"]
+    ok = np.isfinite(lat) & np.isfinite(lon)
+    lat, lon, weights = lat[ok], lon[ok], weights[ok]
+    x, y = world_coords(lat, lon)
+
+    for layer in LAYERS:
+        shutil.rmtree(os.path.join(out_dir, layer), ignore_errors=True)
+
+    ext = "png" if fmt == "png" else "u8"
+    layers = {name: {"url": f"{os.path.relpath(out_dir, REPO_ROOT)}/{name}/{{z}}/{{x}}/{{y}}.{ext}",
+                     "scale": {}, "tiles": {}} for name in LAYERS}
+    total_bytes = 0
+    if lat.size:
+        for zoom in range(zooms[0], zooms[1] + 1):
+            keys, q, ceilings = render_level(x, y, weights, zoom)
+            for j, name in enumerate(LAYERS):
+                layers[name]["scale"][str(zoom)] = round(float(ceilings[j]), 4)
+                layers[name]["tiles"][str(zoom)] = []
+            for tx, ty, arr in tiles(keys, q, zoom):
+                for j, name in enumerate(LAYERS):
+                    grid = arr[:, :, j]
+                    if not grid.any():
+                        continue
+                    path = os.path.join(out_dir, name, str(zoom), str(tx), f"{ty}.{ext}")
+                    total_bytes += write_tile(path, grid, fmt)
+                    layers[name]["tiles"][str(zoom)].append(f"{tx}/{ty}")
+
+    bounds = ([[float(lat.min()), float(lon.min())], [float(lat.max()), float(lon.max())]]
+              if lat.size else None)
+    return {
+        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "detections": int(lat.size),
+        "reference": (str(np.datetime64(int(reference * 1440), "m")) + "Z"
+                      if reference is not None else None),
+        "halfLifeDays": half_life_days,
+        "format": fmt,
+        "tileSize": TILE,
+        "minZoom": zooms[0],
+        "maxZoom": zooms[1],
+        "bounds": bounds,
+        # value ~= scale * (q / levels) ** 2 for a quantized pixel q (0 = no heat)
+        "quantization": "sqrt",
+        "levels": LEVELS,
+        "weights": {"frp": "max(frp, %g MW) x confidence" % FRP_FLOOR, "density": "confidence"},
+        "layers": layers,
+        "bytes": total_bytes,
+    }
+
+
+def parse_zooms(spec):
+    lo, _, hi = spec.partition("-")
+    lo, hi = int(lo), int(hi or lo)
+    if not 0 <= lo <= hi <= 14:
+        raise argparse.ArgumentTypeError(f"bad zoom range {spec!r} (expected e.g. 5-10)")
+    return lo, hi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render FRP / density heat tiles from FIRMS hotspots")
+    parser.add_argument("--input", action="append", default=None, metavar="FILE",
+                        help="hotspot snapshot or archive (repeatable; default: firms_data.json "
+                             "and data/firms_archive.json when present)")
+    parser.add_argument("--zooms", type=parse_zooms, default=DEFAULT_ZOOMS, metavar="MIN-MAX",
+                        help="zoom levels to render (default: %d-%d)" % DEFAULT_ZOOMS)
+    parser.add_argument("--half-life-days", type=float, default=None,
+                        help="decay each detection by half per this many days before the newest")
+    parser.add_argument("--format", choices=["png", "u8"], default="png")
+    args = parser.parse_args(argv)
+
+    paths = [os.path.join(REPO_ROOT, p) for p in (args.input or DEFAULT_INPUTS)]
+    t0 = time.perf_counter()
+    table, used = load_hotspots(paths)
+    t1 = time.perf_counter()
+    index = build(table, args.zooms, args.half_life_days, args.format)
+    t2 = time.perf_counter()
+    index["sources"] = used
+    os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+    with open(INDEX_FILE, "w") as f:
+        json.dump(index, f, indent=2)
+
+    counts = {name: sum(len(t) for t in layer["tiles"].values()) for name, layer in index["layers"].items()}
+    print(f"🔥 {index['detections']} detections from {', '.join(used) or 'no inputs'} "
+          f"(loaded in {(t1 - t0) * 1000:.0f} ms)")
+    print(f"✅ zooms {args.zooms[0]}-{args.zooms[1]}: "
+          + ", ".join(f"{n} {c} tiles" for n, c in counts.items())
+          + f" ({index['bytes'] / 1024:.0f} KB) in {(t2 - t1) * 1000:.0f} ms → {INDEX_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("heat_raster"):
+        code = main()
+    sys.exit(code)
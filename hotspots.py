@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Compact columnar container for FIRMS hotspots
+One NumPy structured array holds every detection (47 bytes a row
+instead of a dict of boxed values), with the two repeated strings
+(confidence, satellite) stored as small integer codes. Filtering, sorting and
+deduplication run as whole-array operations, and the JSON / GeoJSON writers
+stream rows straight from the columns without building a dict per hotspot
+up front.
+
+Each row carries its FIRMS latency tier (URT / RT / NRT, from the CSV
+`version` column). reconcile_tiers() drops a fast-tier detection once the
+slower, better-processed record of the same detection is present.
+
+Hotspot is a read-only row view (h['latitude'], h.get('acq_date')) so code
+written against the old per-row dicts keeps working.
+"""
+import json
+import threading
+
+import numpy as np
+
+# Field order of the published hotspot records
+FIELDS = ("latitude", "longitude", "brightness", "acq_date", "acq_time",
+          "confidence", "satellite", "frp", "tier")
+
+DTYPE = np.dtype([
+    ("latitude", "f8"),
+    ("longitude", "f8"),
+    ("brightness", "f8"),
+    ("acq_date", "M8[D]"),   # NaT when missing
+    ("acq_time", "i2"),      # HHMM, -1 when missing
+    ("confidence", "u2"),    # code into the shared vocabulary
+    ("satellite", "u2"),
+    ("frp", "f8"),
+    ("tier", "u1"),          # index into TIERS
+])
+
+# FIRMS latency tiers, best-processed first: near-real-time (~3 h),
+# real-time and ultra-real-time (US/Canada VIIRS, minutes after the pass).
+# URT/RT records are superseded by the NRT record of the same detection.
+TIERS = ("NRT", "RT", "URT")
+
+# Same satellite and scan, within one neighbouring cell of this size
+# (degrees, ~400 m; VIIRS pixels are 375 m): the same detection
+MATCH_CELL_DEG = 0.004
+
+# Higher wins when two detections collapse onto the same spot
+CONFIDENCE_ORDER = {'low': 1, 'nominal': 2, 'high': 3}
+
+# Shared string vocabulary for the coded columns (grows as new values appear)
+_VOCAB = []
+_CODES = {}
+_VOCAB_LOCK = threading.Lock()
+
+
+def encode(values):
+    """Map strings to vocabulary codes (uint16 array)"""
+    out = np.empty(len(values), dtype="u2")
+    with _VOCAB_LOCK:
+        for i, v in enumerate(values):
+            code = _CODES.get(v)
+            if code is None:
+                code = _CODES[v] = len(_VOCAB)
+                _VOCAB.append(v)
+            out[i] = code
+    return out
+
+
+def decode(codes):
+    """Vocabulary strings for an array of codes (list)"""
+    vocab = _VOCAB
+    return [vocab[c] for c in codes.tolist()]
+
+
+def tier_code(version):
+    """TIERS index for a FIRMS version string ('2.0URT', '6.1NRT'; NRT otherwise)"""
+    v = (version or "").strip().upper()
+    if v.endswith("URT") or v == "URT":
+        return TIERS.index("URT")
+    if v.endswith("RT") and not v.endswith("NRT"):
+        return TIERS.index("RT")
+    return TIERS.index("NRT")
+
+
+def _tier_codes(values):
+    uniq, inv = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return np.array([tier_code(v) for v in uniq.tolist()], dtype="u1")[inv]
+
+
+def _numbers(values, dtype, default):
+    """Bulk-convert strings; returns (array, ok mask), bad items set to default"""
+    try:
+        return np.asarray(values).astype(dtype), np.ones(len(values), dtype=bool)
+    except (ValueError, TypeError):
+        out = np.full(len(values), default, dtype=dtype)
+        ok = np.ones(len(values), dtype=bool)
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.asarray(v).astype(dtype)
+            except (ValueError, TypeError):
+                ok[i] = False
+        return out, ok
+
+
+class Hotspot:
+    """Read-only view of one row of a HotspotTable"""
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, field):
+        return self._table.value(field, self._i)
+
+    def get(self, field, default=None):
+        return self._table.value(field, self._i) if field in FIELDS else default
+
+    def as_dict(self):
+        return {f: self._table.value(f, self._i) for f in FIELDS}
+
+    def __repr__(self):
+        return f"Hotspot({self.as_dict()})"
+
+
+class HotspotTable:
+    """Column-backed collection of hotspots"""
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else np.empty(0, dtype=DTYPE)
+
+    # -- construction ---------------------------------------------------
+
+    @classmethod
+    def from_csv(cls, text, satellite_id):
+        """Parse a FIRMS area CSV response (rows with bad numbers are dropped)"""
+        lines = text.strip().split('\n')
+        if len(lines) < 2:
+            return cls()
+        headers = lines[0].split(',')
+        rows = [values for values in (line.split(',') for line in lines[1:])
+                if len(values) >= len(headers)]
+        if not rows:
+            return cls()
+        columns = dict(zip(headers, zip(*rows)))
+        n = len(rows)
+
+        def column(name, fill):
+            return columns.get(name, (fill,) * n)
+
+        data = np.empty(n, dtype=DTYPE)
+        keep = np.ones(n, dtype=bool)
+        for field in ("latitude", "longitude", "brightness", "frp"):
+            data[field], ok = _numbers(column(field, "0"), "f8", np.nan)
+            keep &= ok
+        data["acq_date"] = _numbers(column("acq_date", "NaT"), "M8[D]", np.datetime64("NaT"))[0]
+        data["acq_time"] = _numbers(column("acq_time", "-1"), "i2", -1)[0]
+        data["confidence"] = encode(column("confidence", ""))
+        data["satellite"] = encode((satellite_id,))[0]
+        data["tier"] = _tier_codes(column("version", ""))
+        return cls(data if keep.all() else data[keep])
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from hotspot dicts (or rows of another table)"""
+        records = list(records)
+        n = len(records)
+        data = np.empty(n, dtype=DTYPE)
+        if not n:
+            return cls(data)
+        for field in ("latitude", "longitude", "brightness", "frp"):
+            data[field] = [float(r.get(field, 0) or 0) for r in records]
+        data["acq_date"] = _numbers([r.get("acq_date") or "NaT" for r in records],
+                                    "M8[D]", np.datetime64("NaT"))[0]
+        data["acq_time"] = _numbers([r.get("acq_time") or "-1" for r in records], "i2", -1)[0]
+        data["confidence"] = encode([r.get("confidence", "") for r in records])
+        data["satellite"] = encode([r.get("satellite", "") for r in records])
+        data["tier"] = _tier_codes([r.get("tier") or "" for r in records])
+        return cls(data)
+
+    @classmethod
+    def coerce(cls, hotspots):
+        return hotspots if isinstance(hotspots, cls) else cls.from_records(hotspots)
+
+    @classmethod
+    def concat(cls, tables):
+        parts = [t.data for t in tables if len(t)]
+        return cls(np.concatenate(parts) if parts else None)
+
+    # -- row access -----------------------------------------------------
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return (Hotspot(self, i) for i in range(len(self.data)))
+
+    def __getitem__(self, i):
+        return Hotspot(self, i)
+
+    def value(self, field, i):
+        v = self.data[field][i]
+        if field in ("confidence", "satellite"):
+            return _VOCAB[v]
+        if field == "acq_date":
+            return "" if np.isnat(v) else str(v)
+        if field == "acq_time":
+            return "" if v < 0 else f"{v:04d}"
+        if field == "tier":
+            return TIERS[v]
+        return float(v)
+
+    # -- bulk operations ------------------------------------------------
+
+    def take(self, index):
+        """Rows selected by a boolean mask or index array"""
+        return HotspotTable(self.data[index])
+
+    def sort(self, *fields):
+        """Stable sort by the given fields, first field most significant"""
+        order = np.lexsort([self.data[f] for f in reversed(fields)])
+        return self.take(order)
+
+    @staticmethod
+    def _group_starts(order, keys):
+        """Start offsets of runs of equal keys along a lexsort order"""
+        change = np.zeros(len(order), dtype=bool)
+        change[0] = True
+        for k in keys:
+            ks = k[order]
+            change[1:] |= ks[1:] != ks[:-1]
+        return np.flatnonzero(change)
+
+    def unique_exact(self):
+        """Drop repeated (lat, lon, date, time) rows, keeping the first"""
+        if len(self) < 2:
+            return self
+        d = self.data
+        keys = (d["latitude"], d["longitude"], d["acq_date"].view("i8"), d["acq_time"])
+        order = np.lexsort((np.arange(len(d)),) + keys[::-1])
+        first = order[self._group_starts(order, keys)]
+        return self.take(np.sort(first))
+
+    def deduplicate(self, by_date=False):
+        """
+        One detection per spot (lat/lon to 4 decimals, optionally per day),
+        keeping the highest confidence; ties keep the earliest row and spots
+        stay in order of first appearance
+        """
+        n = len(self)
+        if n < 2:
+            return self
+        d = self.data
+        # lat/lon in 1e-4 degree units packed into one int64 key
+        lat = np.round(d["latitude"] * 1e4).astype(np.int64)
+        lon = np.round(d["longitude"] * 1e4).astype(np.int64)
+        keys = ((lat + 900_000) * 3_600_001 + (lon + 1_800_000),)
+        if by_date:
+            keys += (d["acq_date"].view("i8"),)
+
+        with _VOCAB_LOCK:
+            rank_of = np.array([CONFIDENCE_ORDER.get(v, 0) for v in _VOCAB] or [0])
+        rank = rank_of[d["confidence"]]
+        index = np.arange(n)
+        order = np.lexsort((index, -rank) + keys[::-1])
+        starts = self._group_starts(order, keys)
+        best = order[starts]                                  # highest rank, then earliest
+        first_seen = np.minimum.reduceat(order, starts)       # group's first appearance
+        return self.take(best[np.argsort(first_seen, kind="stable")])
+
+    def reconcile_tiers(self):
+        """
+        Drop URT/RT detections that a better-processed record (RT or NRT) of
+        the same detection supersedes: same satellite, date and scan time,
+        within one MATCH_CELL_DEG cell. Row order is kept.
+        """
+        d = self.data
+        if len(self) < 2 or not (d["tier"] > 0).any():
+            return self
+        days = d["acq_date"].view("i8") & 0xFFFF
+        scan = ((d["satellite"].astype(np.int64) << 32) | (days << 16)
+                | (d["acq_time"].astype(np.int64) & 0xFFFF))
+        group = np.unique(scan, return_inverse=True)[1].astype(np.int64)
+        cy = np.floor((d["latitude"] + 90) / MATCH_CELL_DEG).astype(np.int64)
+        cx = np.floor((d["longitude"] + 180) / MATCH_CELL_DEG).astype(np.int64)
+        ny, nx = int(180 / MATCH_CELL_DEG) + 2, int(360 / MATCH_CELL_DEG) + 2
+
+        def cell_key(dy, dx):
+            return (group * ny + cy + dy) * nx + cx + dx
+
+        keep = np.ones(len(self), dtype=bool)
+        for tier in range(1, len(TIERS)):
+            fast = d["tier"] == tier
+            better = cell_key(0, 0)[d["tier"] < tier]
+            if not fast.any() or not better.size:
+                continue
+            superseded = np.zeros(len(self), dtype=bool)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    superseded |= fast & np.isin(cell_key(dy, dx), better)
+            keep &= ~superseded
+        return self if keep.all() else self.take(keep)
+
+    def tier_counts(self):
+        """{tier: detections} for the tiers present"""
+        counts = np.bincount(self.data["tier"], minlength=len(TIERS))
+        return {t: int(c) for t, c in zip(TIERS, counts.tolist()) if c}
+
+    # -- export ---------------------------------------------------------
+
+    def columns(self):
+        """Plain Python lists per field (one bulk conversion each)"""
+        d = self.data
+        dates = np.datetime_as_string(d["acq_date"], unit="D")
+        return {
+            "latitude": d["latitude"].tolist(),
+            "longitude": d["longitude"].tolist(),
+            "brightness": d["brightness"].tolist(),
+            "acq_date": ["" if s == "NaT" else s for s in dates.tolist()],
+            "acq_time": ["" if t < 0 else f"{t:04d}" for t in d["acq_time"].tolist()],
+            "confidence": decode(d["confidence"]),
+            "satellite": decode(d["satellite"]),
+            "frp": d["frp"].tolist(),
+            "tier": [TIERS[t] for t in d["tier"].tolist()],
+        }
+
+    def iter_dicts(self):
+        """Yield one record dict at a time in the published field order"""
+        cols = self.columns()
+        for values in zip(*(cols[f] for f in FIELDS)):
+            yield dict(zip(FIELDS, values))
+
+    def iter_features(self):
+        """Yield GeoJSON Point features one at a time"""
+        for rec in self.iter_dicts():
+            lon = rec.pop("longitude")
+            lat = rec.pop("latitude")
+            yield {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": rec,
+            }
+
+    def to_records(self):
+        return list(self.iter_dicts())
+
+
+def _write_stream(f, header, key, items):
+    """Write {header..., key: [items]} with one compact item per line"""
+    f.write("{\n")
+    for k, v in header.items():
+        f.write(f"  {json.dumps(k)}: {json.dumps(v)},\n")
+    f.write(f"  {json.dumps(key)}: [")
+    sep = "\n    "
+    for item in items:
+        f.write(sep + json.dumps(item))
+        sep = ",\n    "
+    f.write("\n  ]\n}\n" if sep != "\n    " else "]\n}\n")
+
+
+def write_json(path, table, header, key="hotspots"):
+    """Stream a hotspot snapshot (header fields + record list) to path"""
+    with open(path, "w") as f:
+        _write_stream(f, header, key, table.iter_dicts())
+
+
+def write_geojson(path, table):
+    """Stream a GeoJSON FeatureCollection of the hotspots to path"""
+    with open(path, "w") as f:
+        _write_stream(f, {"type": "FeatureCollection"}, "features", table.iter_features())
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Load test for the published static site
+Serves the repo (what GitHub Pages publishes) from a local HTTP server in a
+separate process and replays the pages' fetch sequences from N concurrent
+simulated clients:
+
+  dashboard  index.html + style/scripts, then danger_grid.json, heat index,
+             data/counties.json (dashboard.js retry/backoff; skipped when
+             index.html has pre-rendered cards), fuel_moisture.json and
+             the counties delta feed (snapshot on a client's first visit);
+             ready once the county cards are current
+  forecast   forecast.html and scripts/forecast.js, api/manifest.json,
+             then the shards of the counties forecast.js lists
+  briefs     briefs/index.html, brief-search.js and the search index
+
+Each client uses one keep-alive connection. The report covers each artifact:
+- bytes on the wire, plus the gzip size a CDN would send;
+- latency p50/p95/max;
+- JSON parse cost, measured single-threaded after the run.
+
+Each visit also gets a time-to-ready figure, along with its retries and
+missing artifacts. With --gate the exit code is 1 when a size or parse
+budget (BUDGETS) is exceeded, so publishing can be gated on it. Time-to-ready
+depends on the machine running the test, so a slow p95 is only reported
+unless --gate-latency is given too.
+
+Usage:
+  python loadtest.py                          # 50 clients, 2 visits each, all sequences
+  python loadtest.py --clients 300 --sequence dashboard
+  python loadtest.py --gate --retry-scale 0   # CI: size/parse budgets, no real backoff sleeps
+  python loadtest.py --gate --gate-latency    # also fail on the ready p95 budget
+  python loadtest.py --url https://example.github.io/site/   # an existing server
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CLIENTS = 50
+DEFAULT_VISITS = 2
+
+# dashboard.js loadCountyList(): maxRetries = 3, delay 2^attempt s
+COUNTY_LIST_RETRIES = 3
+
+# scripts/forecast.js `counties` (the shards the forecast page fetches)
+FORECAST_COUNTIES = ("Amelia", "Brunswick", "Dinwiddie", "Greensville", "Nottoway", "Prince George")
+
+# Gate thresholds
+BUDGETS = {
+    "ready_p95_ms": 1500,       # per sequence, time until the page can render (--gate-latency)
+    "artifact_gzip_kb": 512,    # any single artifact, compressed
+    "parse_ms": 50,             # any single JSON artifact
+}
+
+PERCENTILES = (0.50, 0.95)
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive, like a CDN
+    disable_nagle_algorithm = True     # headers and body are separate writes
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory, port):
+    """Serve `directory` until killed (run in its own process)"""
+    handler = lambda *a, **kw: QuietHandler(*a, directory=directory, **kw)
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    with ThreadingHTTPServer(("127.0.0.1", port), handler) as httpd:
+        httpd.serve_forever()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(directory):
+    """(process, base URL) for a server subprocess once it accepts connections"""
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", directory,
+                             "--port", str(port)])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("local server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class Client:
+    """One simulated browser: a keep-alive connection and a request log"""
+
+    def __init__(self, base):
+        self.base = base
+        parts = urlsplit(base)
+        self.https = parts.scheme == "https"
+        self.host = parts.netloc
+        self.conn = None
+        self.log = []          # (path, status, bytes, seconds)
+        self.bodies = {}       # path -> body of the last 200 (for parse timing)
+        self.feed_seq = None   # counties feed seq held by delta-client.js
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conn = cls(self.host, timeout=30)
+
+    def get(self, path):
+        """(status, body) for a path relative to the site root"""
+        url = urlsplit(urljoin(self.base, path))
+        target = url.path + (f"?{url.query}" if url.query else "")
+        t0 = time.perf_counter()
+        for attempt in range(2):               # one reconnect if keep-alive dropped
+            try:
+                if self.conn is None:
+                    self._connect()
+                self.conn.request("GET", target, headers={"Accept-Encoding": "identity"})
+                resp = self.conn.getresponse()
+                body = resp.read()
+                status = resp.status
+                break
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    status, body = 0, b""
+        key = path.split("?", 1)[0]
+        self.log.append((key, status, len(body), time.perf_counter() - t0))
+        if status == 200:
+            self.bodies[key] = body
+        return status, body
+
+    def get_json(self, path):
+        status, body = self.get(path)
+        if status != 200:
+            return status, None
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+def load_county_list(client, stats, retry_scale):
+    """dashboard.js loadCountyList(): 2, 4, 8 s backoff, then the built-in list"""
+    for attempt in range(1, COUNTY_LIST_RETRIES + 2):
+        if client.get_json("data/counties.json")[1] is not None:
+            return
+        if attempt > COUNTY_LIST_RETRIES:
+            stats["missing"].append("data/counties.json")
+            return
+        stats["retries"] += 1
+        time.sleep(2 ** attempt * retry_scale)
+
+
+def sync_counties_feed(client, stats):
+    """delta-client.js syncFeed('counties'): latest.json, then deltas or the snapshot"""
+    _, latest = client.get_json("data/deltas/counties/latest.json")
+    if not latest:
+        stats["missing"].append("data/deltas/counties/latest.json")
+        return
+    if client.feed_seq is not None and client.feed_seq + 1 >= latest["deltas"]["first"]:
+        for seq in range(client.feed_seq + 1, latest["seq"] + 1):
+            client.get_json(f"data/deltas/counties/delta-{seq}.json")
+    elif client.get_json(latest["snapshot"])[1] is None:
+        stats["missing"].append(latest["snapshot"])
+        return
+    client.feed_seq = latest["seq"]      # kept in localStorage between visits
+
+
+def dashboard_visit(client, retry_scale):
+    """index.html -> assets -> DOMContentLoaded fetches (dashboard.js order)"""
+    stats = {"retries": 0, "missing": []}
+    _, page = client.get("index.html")
+    for path in ("style.css", "fuel-calculator.js", "scripts/delta-client.js", "dashboard.js"):
+        client.get(path)
+    _, grid = client.get_json("data/danger_grid.json")
+    client.get_json("data/heat/index.json")
+    # Cards pre-rendered by scripts/prerender.py replace the county list fetch
+    if b"data-prerendered" not in page:
+        load_county_list(client, stats, retry_scale)
+    if client.get_json("data/fuel_moisture.json")[1] is None:
+        stats["missing"].append("data/fuel_moisture.json")
+    sync_counties_feed(client, stats)
+    if grid and grid.get("image"):
+        client.get(grid["image"])
+    return stats
+
+
+def forecast_visit(client, retry_scale):
+    """forecast.html -> forecast.js -> api/manifest.json -> its counties' shards"""
+    stats = {"retries": 0, "missing": []}
+    client.get("forecast.html")
+    client.get("scripts/forecast.js")
+    _, manifest = client.get_json("api/manifest.json")
+    if not manifest:
+        stats["missing"].append("api/manifest.json")
+        return stats
+    for name in FORECAST_COUNTIES:
+        slug = (manifest.get("counties") or {}).get(name)
+        if slug is None:
+            stats["missing"].append(f"api/counties/<{name}>")
+            continue
+        path = f"counties/{slug}/{manifest.get('latestDate')}.json"
+        digest = (manifest.get("files") or {}).get(path)
+        if digest is None or client.get_json(f"api/{path}?v={digest}")[1] is None:
+            stats["missing"].append(f"api/{path}")
+    return stats
+
+
+def briefs_visit(client, retry_scale):
+    """brief list page plus the search index it loads on first search"""
+    stats = {"retries": 0, "missing": []}
+    client.get("briefs/index.html")
+    client.get("scripts/brief-search.js")
+    if client.get_json("briefs/search-index.json")[1] is None:
+        stats["missing"].append("briefs/search-index.json")
+    return stats
+
+
+SEQUENCES = {"dashboard": dashboard_visit, "forecast": forecast_visit, "briefs": briefs_visit}
+
+
+# ---------------------------------------------------------------------------
+# Run and report
+# ---------------------------------------------------------------------------
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(base, sequences, clients, visits, retry_scale):
+    """Replay `visits` visits of each sequence from `clients` concurrent clients"""
+    lock = threading.Lock()
+    log, bodies, visits_log = [], {}, []
+
+    def worker(i):
+        client = Client(base)
+        mine = []
+        for v in range(visits):
+            # stagger sequences so clients are not all on the same page at once
+            for name in sequences[i % len(sequences):] + sequences[:i % len(sequences)]:
+                t0 = time.perf_counter()
+                stats = SEQUENCES[name](client, retry_scale)
+                mine.append((name, time.perf_counter() - t0, stats))
+        client.close()
+        with lock:
+            log.extend(client.log)
+            bodies.update(client.bodies)
+            visits_log.extend(mine)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, range(clients)))
+    elapsed = time.perf_counter() - t0
+    return log, bodies, visits_log, elapsed
+
+
+def parse_cost(body, repeat=5):
+    """Median json.loads time (ms) for one artifact, single-threaded"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        json.loads(body)
+        times.append((time.perf_counter() - t0) * 1000)
+    return sorted(times)[len(times) // 2]
+
+
+def summarize(log, bodies, visits_log, elapsed, clients):
+    artifacts = {}
+    for path, status, size, seconds in log:
+        a = artifacts.setdefault(path, {"requests": 0, "status": {}, "bytes": 0, "latency": []})
+        a["requests"] += 1
+        a["status"][str(status)] = a["status"].get(str(status), 0) + 1
+        a["bytes"] += size
+        a["latency"].append(seconds * 1000)
+
+    report = {"generated": datetime.utcnow().isoformat() + "Z", "clients": clients,
+              "elapsedSeconds": round(elapsed, 2), "requests": len(log),
+              "bytes": sum(a["bytes"] for a in artifacts.values()),
+              "artifacts": {}, "sequences": {}}
+    for path, a in sorted(artifacts.items()):
+        body = bodies.get(path)
+        entry = {
+            "requests": a["requests"],
+            "status": a["status"],
+            "size": len(body) if body is not None else None,
+            "gzipSize": len(gzip.compress(body, 6)) if body is not None else None,
+            "bytes": a["bytes"],
+            "latencyMs": {f"p{int(q * 100)}": round(percentile(a["latency"], q), 2) for q in PERCENTILES},
+        }
+        entry["latencyMs"]["max"] = round(max(a["latency"]), 2)
+        if body is not None and path.endswith(".json"):
+            try:
+                entry["parseMs"] = round(parse_cost(body), 3)
+            except ValueError:
+                entry["parseMs"] = None
+        report["artifacts"][path] = entry
+
+    for name in sorted({v[0] for v in visits_log}):
+        runs = [v for v in visits_log if v[0] == name]
+        ready = [v[1] * 1000 for v in runs]
+        missing = sorted({m for v in runs for m in v[2]["missing"]})
+        report["sequences"][name] = {
+            "visits": len(runs),
+            "readyMs": {f"p{int(q * 100)}": round(percentile(ready, q), 1) for q in PERCENTILES},
+            "retries": sum(v[2]["retries"] for v in runs),
+            "missing": missing,
+        }
+        report["sequences"][name]["readyMs"]["max"] = round(max(ready), 1)
+    return report
+
+
+def check_latency(report, budgets=BUDGETS):
+    """Time-to-ready violations (depend on the machine; gated only with --gate-latency)"""
+    return [f"{name}: ready p95 {seq['readyMs']['p95']:.0f} ms > {budgets['ready_p95_ms']} ms"
+            for name, seq in report["sequences"].items()
+            if seq["readyMs"]["p95"] > budgets["ready_p95_ms"]]
+
+
+def check_budgets(report, budgets=BUDGETS):
+    """Size and parse budget violations (empty = pass)"""
+    failures = []
+    for path, a in report["artifacts"].items():
+        if a["gzipSize"] is not None and a["gzipSize"] > budgets["artifact_gzip_kb"] * 1024:
+            failures.append(f"{path}: {a['gzipSize'] / 1024:.0f} KB gzipped > {budgets['artifact_gzip_kb']} KB")
+        if (a.get("parseMs") or 0) > budgets["parse_ms"]:
+            failures.append(f"{path}: parse {a['parseMs']:.1f} ms > {budgets['parse_ms']} ms")
+    return failures
+
+
+def print_report(report):
+    print(f"\n📦 {report['requests']:,} requests, {report['bytes'] / 1e6:.1f} MB from "
+          f"{report['clients']} clients in {report['elapsedSeconds']:.1f} s")
+    print(f"  {'artifact':36s} {'reqs':>6s} {'size':>9s} {'gzip':>9s} {'p50 ms':>8s} "
+          f"{'p95 ms':>8s} {'max ms':>8s} {'parse ms':>9s}")
+    fmt = lambda v, spec: "-" if v is None else format(v, spec)
+    for path, a in report["artifacts"].items():
+        bad = "" if set(a["status"]) == {"200"} else f"  ⚠️  {a['status']}"
+        print(f"  {path[:36]:36s} {a['requests']:6d} {fmt(a['size'], ','):>9s} {fmt(a['gzipSize'], ','):>9s} "
+              f"{a['latencyMs']['p50']:8.1f} {a['latencyMs']['p95']:8.1f} {a['latencyMs']['max']:8.1f} "
+              f"{fmt(a.get('parseMs'), '.2f'):>9s}{bad}")
+    print(f"\n  {'sequence':12s} {'visits':>7s} {'ready p50':>10s} {'p95':>8s} {'max':>8s} {'retries':>8s}")
+    for name, s in report["sequences"].items():
+        print(f"  {name:12s} {s['visits']:7d} {s['readyMs']['p50']:10.1f} {s['readyMs']['p95']:8.1f} "
+              f"{s['readyMs']['max']:8.1f} {s['retries']:8d}")
+        if s["missing"]:
+            print(f"    ⚠️  missing: {', '.join(s['missing'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the published static data")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument("--visits", type=int, default=DEFAULT_VISITS, help="visits per sequence per client")
+    parser.add_argument("--sequence", action="append", choices=sorted(SEQUENCES),
+                        help="page sequence to replay (repeatable; default all)")
+    parser.add_argument("--retry-scale", type=float, default=1.0,
+                        help="multiplier on dashboard.js backoff delays (0 = no sleeping)")
+    parser.add_argument("--url", help="test an existing server instead of serving the repo")
+    parser.add_argument("--root", default=REPO_ROOT, help="directory to serve")
+    parser.add_argument("--report", help="write the JSON report here")
+    parser.add_argument("--gate", action="store_true",
+                        help="exit 1 when a size or parse budget is exceeded")
+    parser.add_argument("--gate-latency", action="store_true",
+                        help="with --gate, also exit 1 when the ready p95 budget is exceeded")
+    parser.add_argument("--serve", metavar="DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return 0
+
+    proc = None
+    base = args.url
+    if not base:
+        proc, base = start_server(args.root)
+    elif not base.endswith("/"):
+        base += "/"
+    sequences = args.sequence or list(SEQUENCES)
+    print(f"🚦 {args.clients} clients × {args.visits} visits of {', '.join(sequences)} against {base}")
+    try:
+        log, bodies, visits_log, elapsed = run(base, sequences, args.clients, args.visits, args.retry_scale)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    report = summarize(log, bodies, visits_log, elapsed, args.clients)
+    report["budgets"] = BUDGETS
+    report["failures"] = check_budgets(report)
+    report["latencyWarnings"] = check_latency(report)
+    if args.gate_latency:
+        report["failures"] += report["latencyWarnings"]
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.report}")
+
+    if report["latencyWarnings"] and not args.gate_latency:
+        print("\n⚠️  Slow on this machine (not gated):")
+        for warning in report["latencyWarnings"]:
+            print(f"  - {warning}")
+    if report["failures"]:
+        print("\n❌ Budgets exceeded:" if args.gate else "\n⚠️  Over budget:")
+        for failure in report["failures"]:
+            print(f"  - {failure}")
+        return 1 if args.gate else 0
+    print("\n✅ Within size and parse budgets" if report["latencyWarnings"] and not args.gate_latency
+          else "\n✅ Within budgets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Official NWS fire weather products (Red Flag Warning, Fire Weather Watch, ...)
+Polls api.weather.gov/alerts/active for the state, keeps only fire weather
+event types and joins each alert to our counties through a prebuilt zone
+index (data/nws_zone_index.json): alert UGC codes (VAC### county, VAZ###
+forecast / fire weather zone) and SAME codes (0 + state + county FIPS) map
+straight to county names, so no geometry is parsed on the polling path.
+
+The poll is conditional: the ETag / Last-Modified of the last answer are kept
+in data/nws_alerts.json and sent back as If-None-Match / If-Modified-Since,
+so an unchanged alert set costs one 304 and no writes. When the set changes
+(or an alert expires) the active alerts are written to data/nws_alerts.json,
+the only file this poll writes. fetch_weather.py merges them into
+county_data.json ("nwsAlerts" per county) on its runs, scripts/prerender.py
+applies them to the dashboard cards, and the briefs read the file directly,
+so the 5-minute poll never rewrites county_data.json or the counties delta
+feed that the weather workflows own.
+
+Usage:
+  python nws_alerts.py                 # poll
+  python nws_alerts.py --build-index   # rebuild the zone index from /points (once per season)
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import requests
+
+import deadline
+from profiling import profile, span
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_FILE = os.path.join(REPO_ROOT, "data", "nws_alerts.json")
+ZONE_INDEX_FILE = os.path.join(REPO_ROOT, "data", "nws_zone_index.json")
+
+NWS_API = os.environ.get("NWS_API_BASE", "https://api.weather.gov").rstrip("/")
+NWS_HEADERS = {"User-Agent": "(Five Forks Fire Weather Dashboard, contact@example.com)",
+               "Accept": "application/geo+json"}
+
+STATE = "VA"
+STATE_FIPS = "51"
+
+# Event types kept, most severe first (briefs list a county's alerts in this order)
+FIRE_EVENTS = ("Fire Warning", "Red Flag Warning", "Extreme Fire Danger", "Fire Weather Watch")
+
+REQUEST_TIMEOUT_S = 10
+# A poll should finish in seconds; the budget only matters for --build-index
+RUN_BUDGET_S = 120
+
+
+# ---------------------------------------------------------------------------
+# Zone index
+# ---------------------------------------------------------------------------
+
+def _code(url):
+    """Trailing zone code of an api.weather.gov zone URL (…/zones/fire/VAZ065 -> VAZ065)"""
+    return url.rstrip("/").rsplit("/", 1)[-1] if url else None
+
+
+def same_code(ugc):
+    """SAME code for a county UGC (VAC053 -> 051053); None for zones"""
+    if len(ugc) == 6 and ugc[2] == "C" and ugc[:2] == STATE:
+        return "0" + STATE_FIPS + ugc[3:]
+    return None
+
+
+@span()
+def build_zone_index(counties):
+    """
+    {'ugc': {code: [county, ...]}, 'same': {code: [county, ...]}} from the
+    county, forecast zone and fire weather zone of each county centroid
+    """
+    ugc = {}
+    deadline.start(default=RUN_BUDGET_S)
+    for county in counties:
+        if deadline.expired():
+            print(f"  ⏰ Deadline reached; {county['name']} not indexed")
+            continue
+        try:
+            r = requests.get(f"{NWS_API}/points/{county['lat']},{county['lon']}",
+                             headers=NWS_HEADERS, timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+            r.raise_for_status()
+            props = r.json()["properties"]
+        except Exception as e:
+            print(f"  Warning: no /points answer for {county['name']}: {e}")
+            continue
+        for key in ("county", "forecastZone", "fireWeatherZone"):
+            code = _code(props.get(key))
+            if code:
+                names = ugc.setdefault(code, [])
+                if county["name"] not in names:
+                    names.append(county["name"])
+    same = {same_code(code): names for code, names in ugc.items() if same_code(code)}
+    return {
+        "generated": datetime.utcnow().isoformat() + "Z",
+        "state": STATE,
+        "ugc": dict(sorted(ugc.items())),
+        "same": dict(sorted(same.items())),
+    }
+
+
+def load_zone_index(path=ZONE_INDEX_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"ugc": {}, "same": {}}
+
+
+def alert_counties(props, index):
+    """Our counties an alert covers, via its UGC and SAME geocodes"""
+    geocode = props.get("geocode") or {}
+    names = []
+    for table, codes in (("ugc", geocode.get("UGC", [])), ("same", geocode.get("SAME", []))):
+        for code in codes:
+            for name in index.get(table, {}).get(code, ()):
+                if name not in names:
+                    names.append(name)
+    return names
+
+
+# ---------------------------------------------------------------------------
+# Poll
+# ---------------------------------------------------------------------------
+
+def load_state(path=OUTPUT_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+@span()
+def fetch_active(etag=None, last_modified=None):
+    """
+    (status, features, headers) for the state's active fire weather alerts
+    status is 304 when the set is unchanged since `etag` / `last_modified`.
+    """
+    headers = dict(NWS_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    r = requests.get(f"{NWS_API}/alerts/active",
+                     params={"area": STATE, "event": ",".join(FIRE_EVENTS)},
+                     headers=headers, timeout=deadline.timeout(REQUEST_TIMEOUT_S))
+    if r.status_code == 304:
+        return 304, None, r.headers
+    r.raise_for_status()
+    return r.status_code, r.json().get("features", []), r.headers
+
+
+def compact(props, counties):
+    """The fields the dashboard and briefs need from one alert"""
+    return {
+        "id": props.get("id"),
+        "event": props.get("event"),
+        "severity": props.get("severity"),
+        "headline": props.get("headline"),
+        "sent": props.get("sent"),
+        "onset": props.get("onset") or props.get("effective"),
+        "ends": props.get("ends") or props.get("expires"),
+        "senderName": props.get("senderName"),
+        "counties": counties,
+    }
+
+
+def select(features, index):
+    """Actual, non-cancelled fire weather alerts touching our counties, most severe first"""
+    alerts = []
+    for feature in features:
+        props = feature.get("properties") or {}
+        if props.get("event") not in FIRE_EVENTS or props.get("status") != "Actual":
+            continue
+        if props.get("messageType") == "Cancel":
+            continue
+        counties = alert_counties(props, index)
+        if counties:
+            alerts.append(compact(props, counties))
+    alerts.sort(key=lambda a: (FIRE_EVENTS.index(a["event"]), a["onset"] or "", a["id"] or ""))
+    return alerts
+
+
+def unexpired(alerts, now=None):
+    """Drop alerts whose end time has passed (the feed only refreshes on change)"""
+    from freshness import parse_time
+    now = now or datetime.utcnow()
+    return [a for a in alerts if not parse_time(a.get("ends")) or parse_time(a["ends"]) > now]
+
+
+def by_county(alerts):
+    """{county: [alert summary, ...]} for county_data.json entries"""
+    out = {}
+    for a in alerts:
+        for name in a["counties"]:
+            out.setdefault(name, []).append(
+                {k: a[k] for k in ("id", "event", "severity", "headline", "onset", "ends")})
+    return out
+
+
+def alert_lines(alerts):
+    """'County: Red Flag Warning until …' lines for alert output"""
+    return [f"{name}: NWS {a['event']} until {a['ends'] or 'further notice'}"
+            for a in alerts for name in a["counties"]]
+
+
+def apply_to_counties(county_data, alerts=None):
+    """Set each county entry's "nwsAlerts" from `alerts` (default: data/nws_alerts.json)"""
+    if alerts is None:
+        alerts = unexpired(load_state().get("alerts", []))
+    mapping = by_county(alerts)
+    for county in county_data:
+        county["nwsAlerts"] = mapping.get(county["name"], [])
+    return alerts
+
+
+def poll():
+    """One conditional poll; returns 0 (unchanged or updated) or 1 on failure"""
+    state = load_state()
+    index = load_zone_index()
+    if not index.get("ugc"):
+        print("❌ ERROR: zone index is empty; run nws_alerts.py --build-index")
+        return 1
+
+    previous = state.get("alerts", [])
+    try:
+        status, features, headers = fetch_active(state.get("etag"), state.get("lastModified"))
+    except Exception as e:
+        print(f"❌ Error polling NWS alerts: {e}")
+        return 1
+
+    if status == 304:
+        alerts = unexpired(previous)
+        if len(alerts) == len(previous):
+            print(f"✅ NWS fire weather alerts unchanged (304); {len(alerts)} active")
+            return 0
+        print(f"  {len(previous) - len(alerts)} alert(s) expired")
+    else:
+        alerts = unexpired(select(features, index))
+        state["etag"] = headers.get("ETag")
+        state["lastModified"] = headers.get("Last-Modified")
+        print(f"  {len(features)} fire weather alert(s) statewide, {len(alerts)} for our counties")
+
+    changed = alerts != previous
+    if changed:
+        state["updated"] = datetime.utcnow().isoformat() + "Z"
+    state["alerts"] = alerts
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+    if alerts:
+        print("\n🚩 ACTIVE NWS FIRE WEATHER PRODUCTS:")
+        for line in alert_lines(alerts):
+            print(f"  - {line}")
+    else:
+        print("✅ No NWS fire weather products for our counties")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NWS Red Flag / Fire Weather Watch ingestion")
+    parser.add_argument("--build-index", action="store_true",
+                        help="rebuild data/nws_zone_index.json from NWS /points lookups")
+    args = parser.parse_args(argv)
+
+    if args.build_index:
+        from fetch_weather import COUNTIES
+        index = build_zone_index(COUNTIES)
+        if not index["ugc"]:
+            print("❌ ERROR: no zones resolved; index not written")
+            return 1
+        with open(ZONE_INDEX_FILE, "w") as f:
+            json.dump(index, f, indent=2)
+        print(f"✅ Zone index: {len(index['ugc'])} UGC and {len(index['same'])} SAME codes → {ZONE_INDEX_FILE}")
+        return 0
+    return poll()
+
+
+if __name__ == "__main__":
+    with profile("nws_alerts"):
+        sys.exit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Batch quality control for stored NWS station observations
+Every station's series in a window is loaded into flat, (station, time)-sorted
+NumPy columns and checked at once. No per-observation Python loop is involved:
+
+  range     outside physical limits (RANGE_LIMITS)
+  internal  dew point above temperature, gust below sustained wind
+  step      spike: jumps by more than STEP_LIMITS to and from its neighbours
+            (or to the newest value) within STEP_MAX_GAP_H hours
+  stuck     the same value for STUCK_HOURS or longer (calm wind, zero precip
+            and saturated RH are exempt)
+  buddy     more than BUDDY_LIMITS from the median of up to BUDDY_MAX
+            neighbouring stations within BUDDY_RADIUS_KM in the same hour
+            (stations carry their county centroid, so buddies are by county)
+
+Flags are packed per field into the observation store's `qc` column
+(obs_store.QC_BITS bits each). Store queries then return flagged values as
+NULL, so min RH, max wind, rain totals, drought, fuel moisture and the briefs
+only see values that passed. Zero stays zero and missing stays None.
+
+Usage:
+  python obs_qc.py               # re-check the last 7 days
+  python obs_qc.py --days 180    # a whole season
+  python obs_qc.py --benchmark   # synthetic season, 200 stations
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from obs_store import DEFAULT_DB, OBS_FIELDS, QC_BITS, ObservationStore
+from profiling import profile, span
+
+FLAGS = {"range": 1, "internal": 2, "step": 4, "stuck": 8, "buddy": 16}
+
+# Physical limits per field (inclusive)
+RANGE_LIMITS = {
+    "temp_f": (-40, 125),
+    "rh": (1, 100),
+    "dew_f": (-60, 90),
+    "wind_mph": (0, 120),
+    "gust_mph": (0, 160),
+    "precip_in": (0, 6),
+}
+
+# Largest believable change between consecutive observations
+STEP_LIMITS = {"temp_f": 20, "rh": 55, "dew_f": 20, "wind_mph": 40}
+STEP_MAX_GAP_H = 2
+
+# Hours of one unchanged value that mean a stuck sensor, and values that may
+# legitimately persist (calm, no rain, fog)
+STUCK_HOURS = {"temp_f": 6, "rh": 8, "dew_f": 8, "wind_mph": 12, "precip_in": 12}
+STUCK_EXEMPT = {"rh": lambda v: v >= 98, "wind_mph": lambda v: v == 0,
+                "precip_in": lambda v: v == 0}
+STUCK_MAX_GAP_H = 3
+
+# Spatial buddy check (fields that vary smoothly across counties)
+BUDDY_LIMITS = {"temp_f": 15, "rh": 35, "dew_f": 15}
+BUDDY_RADIUS_KM = 80
+BUDDY_MAX = 6
+BUDDY_MIN = 2
+
+DEFAULT_DAYS = 7
+# Extra history loaded ahead of the window so step/stuck checks have context
+LOOKBACK_H = 24
+
+COLUMN = {f: i for i, f in enumerate(OBS_FIELDS)}
+
+
+# ---------------------------------------------------------------------------
+# Checks: sid (n,), ts (n,) sorted by (sid, ts); values (n, fields) with NaN
+# for missing. Each returns uint8 flags (n, fields).
+# ---------------------------------------------------------------------------
+
+def range_flags(values):
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    for field, (lo, hi) in RANGE_LIMITS.items():
+        v = values[:, COLUMN[field]]
+        flags[:, COLUMN[field]] = ((v < lo) | (v > hi)) * FLAGS["range"]
+    return flags
+
+
+def internal_flags(values, bad=None):
+    """`bad` (n, fields) marks values already failed; they do not implicate the other field"""
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    if bad is not None:
+        values = np.where(bad, np.nan, values)
+    t, d = values[:, COLUMN["temp_f"]], values[:, COLUMN["dew_f"]]
+    w, g = values[:, COLUMN["wind_mph"]], values[:, COLUMN["gust_mph"]]
+    flags[:, COLUMN["dew_f"]] = (d > t + 1) * FLAGS["internal"]
+    flags[:, COLUMN["gust_mph"]] = (g < w) * FLAGS["internal"]
+    return flags
+
+
+def _valid(sid, ts, v):
+    """Indices of non-missing values and whether each follows its predecessor
+    (same station) within `gap` hours, as a function of the gap"""
+    idx = np.flatnonzero(~np.isnan(v))
+    same = sid[idx][1:] == sid[idx][:-1]
+    dt = np.diff(ts[idx])
+    return idx, lambda gap: same & (dt <= gap * 3600)
+
+
+def step_flags(sid, ts, values):
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    for field, limit in STEP_LIMITS.items():
+        v = values[:, COLUMN[field]]
+        idx, linked = _valid(sid, ts, v)
+        if idx.size < 2:
+            continue
+        near = linked(STEP_MAX_GAP_H)
+        jump = near & (np.abs(np.diff(v[idx])) > limit)
+        jump_in = np.concatenate(([False], jump))
+        jump_out = np.concatenate((jump, [False]))
+        has_next = np.concatenate((near, [False]))
+        spike = jump_in & (jump_out | ~has_next)
+        flags[idx[spike], COLUMN[field]] = FLAGS["step"]
+    return flags
+
+
+def stuck_flags(sid, ts, values):
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    for field, hours in STUCK_HOURS.items():
+        v = values[:, COLUMN[field]]
+        idx, linked = _valid(sid, ts, v)
+        if idx.size < 2:
+            continue
+        vv, tt = v[idx], ts[idx]
+        new_run = np.concatenate(([True], ~linked(STUCK_MAX_GAP_H) | (vv[1:] != vv[:-1])))
+        starts = np.flatnonzero(new_run)
+        ends = np.append(starts[1:], len(vv)) - 1
+        duration = np.repeat(tt[ends] - tt[starts], np.diff(np.append(starts, len(vv))))
+        stuck = duration >= hours * 3600
+        if field in STUCK_EXEMPT:
+            stuck &= ~STUCK_EXEMPT[field](vv)
+        flags[idx[stuck], COLUMN[field]] = FLAGS["stuck"]
+    return flags
+
+
+def buddies(coords, radius_km=BUDDY_RADIUS_KM, k=BUDDY_MAX):
+    """(stations, k) indices of the nearest other stations within radius; -1 pads"""
+    lat, lon = np.asarray(coords, dtype=float).T
+    x = np.radians(lon)[:, None] - np.radians(lon)[None, :]
+    y = np.radians(lat)[:, None] - np.radians(lat)[None, :]
+    x *= np.cos(np.radians((lat[:, None] + lat[None, :]) / 2))
+    dist = 6371 * np.hypot(x, y)
+    np.fill_diagonal(dist, np.inf)
+    dist[np.isnan(dist)] = np.inf
+    order = np.argsort(dist, axis=1)[:, :k]
+    near = np.take_along_axis(dist, order, axis=1) <= radius_km
+    return np.where(near, order, -1)
+
+
+def buddy_flags(sid, ts, values, coords, bad):
+    """`bad` (n, fields) marks values already failed, kept out of the medians"""
+    flags = np.zeros(values.shape, dtype=np.uint8)
+    if len(coords) < BUDDY_MIN + 1 or not len(ts):
+        return flags
+    nbr = buddies(coords)
+    hour = ts // 3600
+    h0 = hour.min()
+    col = hour - h0
+    shape = (len(coords), int(col.max()) + 1)
+    for field, limit in BUDDY_LIMITS.items():
+        v = np.where(bad[:, COLUMN[field]], np.nan, values[:, COLUMN[field]])
+        grid = np.full(shape, np.nan)
+        grid[sid, col] = v
+        near = grid[np.maximum(nbr, 0)]                      # (stations, k, hours)
+        near[nbr < 0] = np.nan
+        count = (~np.isnan(near)).sum(axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN hours
+            median = np.nanmedian(near, axis=1)
+        dev = np.abs(values[:, COLUMN[field]] - median[sid, col])
+        fail = (count[sid, col] >= BUDDY_MIN) & (dev > limit)
+        flags[fail, COLUMN[field]] = FLAGS["buddy"]
+    return flags
+
+
+@span()
+def check(sid, ts, values, coords):
+    """All checks over one batch -> uint8 flags (n, fields)"""
+    sid = np.asarray(sid, dtype=np.int64)
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    with np.errstate(invalid="ignore"):
+        flags = range_flags(values) | step_flags(sid, ts, values) | stuck_flags(sid, ts, values)
+        flags |= internal_flags(values, flags != 0)
+        flags |= buddy_flags(sid, ts, values, coords, flags != 0)
+    return flags
+
+
+def pack(flags):
+    """(n, fields) uint8 flags -> (n,) packed qc integers (obs_store layout)"""
+    shifts = np.arange(flags.shape[1], dtype=np.int64) * QC_BITS
+    return (flags.astype(np.int64) << shifts).sum(axis=1)
+
+
+def unpack(qc, field):
+    """Flag names set for `field` in a packed qc integer"""
+    bits = (int(qc or 0) >> (COLUMN[field] * QC_BITS)) & ((1 << QC_BITS) - 1)
+    return [name for name, bit in FLAGS.items() if bits & bit]
+
+
+def screen(obs, keys=None):
+    """
+    Range and internal checks for one current observation (fetch_weather
+    shape by default). Returns (obs with failed values set to None,
+    {key: [flag names]}).
+    """
+    keys = keys or {"temp": "temp_f", "rh": "rh", "dewPoint": "dew_f",
+                    "wind": "wind_mph", "gust": "gust_mph"}
+    row = np.full((1, len(OBS_FIELDS)), np.nan)
+    for key, field in keys.items():
+        if obs.get(key) is not None:
+            row[0, COLUMN[field]] = obs[key]
+    with np.errstate(invalid="ignore"):
+        flags = (range_flags(row) | internal_flags(row))[0]
+    out, failed = dict(obs), {}
+    for key, field in keys.items():
+        bits = int(flags[COLUMN[field]])
+        if bits:
+            out[key] = None
+            failed[key] = [name for name, bit in FLAGS.items() if bits & bit]
+    return out, failed
+
+
+# ---------------------------------------------------------------------------
+# Store batches
+# ---------------------------------------------------------------------------
+
+@span()
+def load(store, start, end):
+    """(stations, sid, ts, values, stored qc) for every station in [start, end]"""
+    stations, sid, ts, values, stored = [], [], [], [], []
+    for station in store.station_coords():
+        rows = store.series(station, start=start, end=end, raw=True)
+        if not rows:
+            continue
+        data = np.array(rows, dtype=float)
+        sid.append(np.full(len(data), len(stations)))
+        stations.append(station)
+        ts.append(data[:, 0].astype(np.int64))
+        values.append(data[:, 1:-1])
+        stored.append(data[:, -1])
+    if not stations:
+        return [], None, None, None, None
+    return (stations, np.concatenate(sid), np.concatenate(ts),
+            np.concatenate(values), np.concatenate(stored))
+
+
+@span()
+def run(store, start, end):
+    """
+    QC every station's observations in [start, end] and store changed flags
+    Returns {'rows', 'updated', 'flagged': {field: {flag: count}}}.
+    """
+    stations, sid, ts, values, stored = load(store, start - LOOKBACK_H * 3600, end)
+    if not stations:
+        return {"rows": 0, "updated": 0, "flagged": {}}
+    coords = [store.station_coords()[s] for s in stations]
+    coords = [(np.nan, np.nan) if None in c else c for c in coords]
+    flags = check(sid, ts, values, coords)
+    qc = pack(flags)
+
+    inside = ts >= start
+    changed = inside & (np.isnan(stored) | (stored != qc))
+    names = np.array(stations)
+    updated = store.set_qc(zip(qc[changed].tolist(), names[sid[changed]].tolist(),
+                               ts[changed].tolist()))
+    flagged = {}
+    for field in OBS_FIELDS:
+        f = flags[inside, COLUMN[field]]
+        counts = {name: int(np.count_nonzero(f & bit)) for name, bit in FLAGS.items()}
+        counts = {k: v for k, v in counts.items() if v}
+        if counts:
+            flagged[field] = counts
+    return {"rows": int(inside.sum()), "updated": updated, "flagged": flagged}
+
+
+def synthetic(stations=200, days=182, seed=0):
+    """A season of hourly observations with injected faults, for benchmarking"""
+    rng = np.random.default_rng(seed)
+    hours = days * 24
+    lat = rng.uniform(36.6, 39.4, stations)
+    lon = rng.uniform(-83.5, -75.5, stations)
+    t = np.arange(hours)
+    diurnal = 12 * np.sin(2 * np.pi * (t - 9) / 24)
+    temp = 60 + diurnal[None, :] + rng.normal(0, 2, (stations, hours))
+    dew = temp - rng.uniform(8, 18, (stations, 1)) - rng.normal(0, 1.5, (stations, hours))
+    rh = np.clip(100 * np.exp(17.27 * ((dew - 32) / 1.8) / ((dew - 32) / 1.8 + 237.3)
+                              - 17.27 * ((temp - 32) / 1.8) / ((temp - 32) / 1.8 + 237.3)), 1, 100)
+    wind = np.maximum(rng.normal(7, 4, (stations, hours)), 0).round()
+    gust = np.where(wind > 10, wind + rng.uniform(3, 10, (stations, hours)), np.nan)
+    precip = np.where(rng.random((stations, hours)) < 0.05, rng.exponential(0.05, (stations, hours)), 0)
+    values = np.stack([temp, rh, dew, wind, gust, precip], axis=-1).reshape(-1, len(OBS_FIELDS))
+    n = len(values)
+    values[rng.choice(n, n // 2000), COLUMN["temp_f"]] += rng.choice([-60, 60], n // 2000)  # spikes
+    values[rng.choice(n, n // 5000), COLUMN["rh"]] = 0                                       # range
+    sid = np.repeat(np.arange(stations), hours)
+    ts = np.tile(t * 3600, stations) + 1_760_000_000 // 3600 * 3600
+    stuck = rng.choice(stations, 5, replace=False)
+    for s in stuck:                                                                          # stuck
+        values[s * hours + 100:s * hours + 130, COLUMN["temp_f"]] = 55.4
+    return sid, ts, values, list(zip(lat, lon))
+
+
+def benchmark(stations=200, days=182):
+    sid, ts, values, coords = synthetic(stations, days)
+    t0 = time.perf_counter()
+    flags = check(sid, ts, values, coords)
+    pack(flags)
+    elapsed = time.perf_counter() - t0
+    bad = np.count_nonzero(flags.any(axis=1))
+    print(f"⏱  QC {len(ts):,} observations ({stations} stations × {days} days): "
+          f"{elapsed:.2f} s, {bad:,} rows flagged")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quality-control stored NWS observations")
+    parser.add_argument("--days", type=float, default=DEFAULT_DAYS, help="window to (re)check")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time a synthetic 200-station season and exit")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark()
+        return 0
+    if not os.path.exists(DEFAULT_DB):
+        print(f"❌ No observation store at {DEFAULT_DB} (run fetch_weather.py first)")
+        return 1
+
+    end = int(time.time())
+    t0 = time.perf_counter()
+    with ObservationStore() as store:
+        result = run(store, end - int(args.days * 86400), end)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ QC: {result['rows']:,} observations over {args.days:g} days in {elapsed:.2f} s "
+          f"({result['updated']:,} flags updated)")
+    for field, counts in result["flagged"].items():
+        print(f"   {field:10s} " + ", ".join(f"{name} {n}" for name, n in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("obs_qc"):
+        sys.exit(main())
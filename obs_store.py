@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Local time-series observation store for NWS station data
+Append-only SQLite database (WAL mode) keyed by (station, timestamp)
+
+Observations are bulk-inserted after each fetch and never rewritten, so history
+accumulates across runs. Range questions such as "min RH last 24 h" or
+"precip last 48 h" are answered by indexed range scans on the primary key
+instead of reloading JSON snapshots.
+
+Stations send special (SPECI) reports between routine ones, and each repeats
+the precipitation accumulated since the last routine report, so rain totals
+use only the last report of each station-hour.
+
+Each row also carries `qc`, the per-field quality-control flags set by
+obs_qc.py (QC_BITS bits per field, in OBS_FIELDS order; NULL = not checked
+yet). Queries return flagged values as NULL unless asked for raw data.
+
+Usage:
+  python obs_store.py                    # summary of stored stations
+  python obs_store.py --county Dinwiddie # antecedent summary for one county
+"""
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(REPO_ROOT, "data", "observations.db")
+
+# Observation columns (all imperial units, None when not reported)
+OBS_FIELDS = ("temp_f", "rh", "dew_f", "wind_mph", "gust_mph", "precip_in")
+
+# Bits of the packed `qc` column per field (see obs_qc.FLAGS)
+QC_BITS = 5
+
+# Minimum hourly amount that counts as a rain day (inches)
+RAIN_THRESHOLD_IN = 0.01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    station   TEXT    NOT NULL,
+    ts        INTEGER NOT NULL,   -- epoch seconds, UTC
+    temp_f    REAL,
+    rh        REAL,
+    dew_f     REAL,
+    wind_mph  REAL,
+    gust_mph  REAL,
+    precip_in REAL,
+    qc        INTEGER,            -- packed per-field QC flags (obs_qc.py); NULL = unchecked
+    PRIMARY KEY (station, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stations (
+    station TEXT PRIMARY KEY,
+    county  TEXT,
+    lat     REAL,
+    lon     REAL
+);
+
+CREATE INDEX IF NOT EXISTS stations_county ON stations (county);
+"""
+
+
+def qc_shift(field):
+    """Bit offset of a field's flags in the packed `qc` column"""
+    return OBS_FIELDS.index(field) * QC_BITS
+
+
+def _checked(field):
+    """SQL expression for a field that reads NULL when QC flagged it"""
+    mask = (1 << QC_BITS) - 1
+    return f"CASE WHEN (COALESCE(qc, 0) >> {qc_shift(field)}) & {mask} THEN NULL ELSE {field} END"
+
+
+def to_epoch(value):
+    """Convert an ISO-8601 string, datetime or number to epoch seconds (UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class ObservationStore:
+    """Append-only station observation history backed by SQLite"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = [r[1] for r in self.conn.execute("PRAGMA table_info(observations)")]
+        if "qc" not in columns:   # stores created before QC flags existed
+            with self.conn:
+                self.conn.execute("ALTER TABLE observations ADD COLUMN qc INTEGER")
+
+    def close(self):
+        """Checkpoint the WAL into the main file and close"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def register_station(self, station, county=None, lat=None, lon=None):
+        """Record (or update) the county a station reports for"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO stations (station, county, lat, lon) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(station) DO UPDATE SET county=excluded.county, "
+                "lat=COALESCE(excluded.lat, lat), lon=COALESCE(excluded.lon, lon)",
+                (station, county, lat, lon))
+
+    def insert_many(self, station, observations):
+        """
+        Bulk-insert observation dicts for one station
+        Each dict needs a 'timestamp' plus any of OBS_FIELDS. Rows already
+        stored for the same (station, timestamp) are left untouched.
+        Returns the number of new rows.
+        """
+        rows = []
+        for obs in observations:
+            ts = to_epoch(obs.get("timestamp"))
+            if ts is None:
+                continue
+            rows.append((station, ts) + tuple(obs.get(f) for f in OBS_FIELDS))
+        if not rows:
+            return 0
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO observations (station, ts, %s) VALUES (?, ?, %s)"
+                % (", ".join(OBS_FIELDS), ", ".join("?" * len(OBS_FIELDS))),
+                rows)
+            return self.conn.total_changes - before
+
+    def set_qc(self, rows):
+        """Store packed QC flags from (qc, station, ts) tuples; returns rows updated"""
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE observations SET qc = ? WHERE station = ? AND ts = ?", rows)
+            return self.conn.total_changes - before
+
+    # ------------------------------------------------------------------
+    # Range queries (all use the (station, ts) primary key)
+    # ------------------------------------------------------------------
+
+    def latest_timestamp(self, station):
+        """Newest stored observation time for a station (epoch seconds) or None"""
+        row = self.conn.execute(
+            "SELECT MAX(ts) FROM observations WHERE station = ?", (station,)).fetchone()
+        return row[0]
+
+    def aggregate(self, station, field, func, hours, now=None):
+        """Apply MIN/MAX/SUM/AVG/COUNT to one field's QC-passed values over the last `hours`"""
+        if field not in OBS_FIELDS:
+            raise ValueError(f"Unknown observation field: {field}")
+        func = func.upper()
+        if func not in ("MIN", "MAX", "SUM", "AVG", "COUNT"):
+            raise ValueError(f"Unsupported aggregate: {func}")
+        end = to_epoch(now) if now is not None else int(time.time())
+        start = end - int(hours * 3600)
+        row = self.conn.execute(
+            f"SELECT {func}({_checked(field)}) FROM observations "
+            "WHERE station = ? AND ts > ? AND ts <= ?",
+            (station, start, end)).fetchone()
+        return row[0]
+
+    def min_rh(self, station, hours=24, now=None):
+        return self.aggregate(station, "rh", "MIN", hours, now)
+
+    def max_temp(self, station, hours=24, now=None):
+        return self.aggregate(station, "temp_f", "MAX", hours, now)
+
+    def max_wind(self, station, hours=24, now=None):
+        return self.aggregate(station, "wind_mph", "MAX", hours, now)
+
+    def precip_total(self, station, hours=48, now=None):
+        """Rain over the last `hours`, one report (the last) per station-hour"""
+        end = to_epoch(now) if now is not None else int(time.time())
+        start = end - int(hours * 3600)
+        row = self.conn.execute(
+            f"SELECT SUM(p) FROM (SELECT {_checked('precip_in')} AS p, "
+            "ROW_NUMBER() OVER (PARTITION BY ts / 3600 ORDER BY ts DESC) AS n "
+            "FROM observations WHERE station = ? AND ts > ? AND ts <= ?) WHERE n = 1",
+            (station, start, end)).fetchone()
+        return row[0]
+
+    def last_rain(self, station, threshold=RAIN_THRESHOLD_IN, now=None):
+        """Timestamp of the most recent hour with at least `threshold` inches"""
+        end = to_epoch(now) if now is not None else int(time.time())
+        row = self.conn.execute(
+            "SELECT MAX(ts) FROM observations "
+            f"WHERE station = ? AND ts <= ? AND {_checked('precip_in')} >= ?",
+            (station, end, threshold)).fetchone()
+        return row[0]
+
+    def series(self, station, start=None, end=None, fields=OBS_FIELDS, raw=False, hourly=False):
+        """
+        Rows (ts, *fields) for a station between start and end, oldest first
+        QC-flagged values come back as None; `raw=True` returns them as stored
+        with the packed qc column appended. `hourly=True` keeps only the last
+        report of each hour (for summing precip_in).
+        """
+        for f in fields:
+            if f not in OBS_FIELDS:
+                raise ValueError(f"Unknown observation field: {f}")
+        start = to_epoch(start) if start is not None else 0
+        end = to_epoch(end) if end is not None else int(time.time())
+        columns = list(fields) + ["qc"] if raw else [_checked(f) for f in fields]
+        if hourly:
+            return [row[:-1] for row in self.conn.execute(
+                f"SELECT * FROM (SELECT ts, {', '.join(columns)}, ROW_NUMBER() OVER "
+                "(PARTITION BY ts / 3600 ORDER BY ts DESC) AS n FROM observations "
+                "WHERE station = ? AND ts >= ? AND ts <= ?) WHERE n = 1 ORDER BY ts",
+                (station, start, end))]
+        return self.conn.execute(
+            f"SELECT ts, {', '.join(columns)} FROM observations "
+            "WHERE station = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (station, start, end)).fetchall()
+
+    def station_coords(self):
+        """{station: (lat, lon)} for every registered station"""
+        return {r[0]: (r[1], r[2]) for r in self.conn.execute(
+            "SELECT station, lat, lon FROM stations")}
+
+    def stations_for(self, county):
+        return [r[0] for r in self.conn.execute(
+            "SELECT station FROM stations WHERE county = ? ORDER BY station", (county,))]
+
+    def stations(self):
+        return self.conn.execute(
+            "SELECT s.station, s.county, COUNT(o.ts), MIN(o.ts), MAX(o.ts) "
+            "FROM stations s LEFT JOIN observations o ON o.station = s.station "
+            "GROUP BY s.station ORDER BY s.county, s.station").fetchall()
+
+    def county_summary(self, county, now=None):
+        """
+        Antecedent values for a county in the shape generate_briefs expects
+        (days_since_rain, rainfall_inches, temp_f, min_rh, wind_mph).
+        Uses the first registered station with data; None where unknown.
+        """
+        end = to_epoch(now) if now is not None else int(time.time())
+        for station in self.stations_for(county):
+            if self.latest_timestamp(station) is None:
+                continue
+            rain = self.precip_total(station, 48, end)
+            last_rain = self.last_rain(station, now=end)
+            temp = self.max_temp(station, 24, end)
+            rh = self.min_rh(station, 24, end)
+            wind = self.max_wind(station, 24, end)
+            return {
+                "station": station,
+                "days_since_rain": (end - last_rain) // 86400 if last_rain is not None else None,
+                "rainfall_inches": round(rain, 2) if rain is not None else None,
+                "temp_f": round(temp) if temp is not None else None,
+                "min_rh": round(rh) if rh is not None else None,
+                "wind_mph": round(wind) if wind is not None else None,
+            }
+        return None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not os.path.exists(DEFAULT_DB):
+        print(f"❌ No observation store at {DEFAULT_DB} (run fetch_weather.py first)")
+        return 1
+    with ObservationStore() as store:
+        if len(argv) >= 2 and argv[0] == "--county":
+            summary = store.county_summary(argv[1])
+            if summary is None:
+                print(f"No stored observations for {argv[1]}")
+                return 1
+            for key, value in summary.items():
+                print(f"  {key}: {value}")
+            return 0
+        print(f"📦 {DEFAULT_DB}")
+        for station, county, count, first, last in store.stations():
+            span = ""
+            if count:
+                span = (f"{datetime.fromtimestamp(first, timezone.utc):%Y-%m-%d %H:%M} → "
+                        f"{datetime.fromtimestamp(last, timezone.utc):%Y-%m-%d %H:%M}")
+            print(f"  {station} ({county}): {count} obs {span}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Overpass-aware polling schedule for the FIRMS sources
+MODIS (Terra + Aqua), Suomi-NPP and NOAA-20 are sun-synchronous, so they
+cross Virginia at nearly the same UTC times every day and their detections
+reach the FIRMS NRT feed a roughly constant lag later. Polling on a fixed
+clock either waits hours for a pass that already landed or asks again when
+nothing new exists.
+
+This module predicts, per source, when the next batch of detections should
+become available:
+
+  pass times       nominal crossing times over Virginia (from each orbit's
+                   equator-crossing local solar time), replaced by clusters of
+                   the acquisition times we have actually seen once enough
+                   detections are on record
+  availability lag prior NRT latency, replaced by the lag most consistent
+                   with the observed brackets: a scan first seen at poll t,
+                   missing at the previous poll p, became available within
+                   (p - acquired, t - acquired]. Clamped to the prior
+                   +/- LATENCY_BOUND_H
+
+First-seen times alone are only upper bounds, and polls are scheduled from
+the estimate, so learning from them drags the lag upwards run after run.
+Polls go out POLL_LEAD_H before the expected availability instead; a poll
+that misses its pass is retried once, RETRY_AFTER_H later, and the miss
+gives the lower bound that keeps the estimate honest.
+
+`fetch_firms.py --scheduled` asks due_sources() which sources have an
+availability time between their last poll and now, checks the cheap FIRMS
+data_availability endpoint before spending tile requests, and records what
+it saw with observe(). State lives in data/firms_schedule.json.
+
+Usage:
+  python overpass.py                 # next passes and what is due now
+  python overpass.py --simulate 14   # fixed vs adaptive polling: calls, latency, learned lag
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(REPO_ROOT, "data", "firms_schedule.json")
+
+# Nominal pass times over Virginia (UTC hours). Equator-crossing local solar
+# time shifted by Virginia's longitude (~78.7 W, +5.25 h):
+#   Terra 10:30/22:30, Aqua 13:30/01:30, Suomi-NPP 13:25/01:25, NOAA-20 12:35/00:35
+PRIOR_PASSES = {
+    "MODIS": [3.75, 6.75, 15.75, 18.75],
+    "VIIRS_SNPP": [6.67, 18.67],
+    "VIIRS_NOAA20": [5.83, 17.83],
+}
+PRIOR_LATENCY_H = 2.5        # acquisition -> FIRMS NRT availability
+LATENCY_BOUND_H = 1.5        # learned lag stays within the prior +/- this
+
+# Learned values replace the priors once this many scans are on record
+MIN_SAMPLES = 20
+HISTORY = 200                # scans (and lag brackets) kept per source
+CLUSTER_GAP_H = 2.0          # acquisition times further apart start a new pass
+
+POLL_LEAD_H = 0.25           # poll this long before the expected availability
+RETRY_AFTER_H = 0.75         # re-poll a missed pass once, this long after the first try
+GRACE_H = 2.0                # then poll even if the probe says "not yet"
+MAX_INTERVAL_H = 12.0        # never leave a source unpolled longer than this
+
+# Old fixed schedule (firms-sync 06/18 UTC + update-data every 6 h), for --simulate
+FIXED_POLLS_H = [0, 6, 6, 12, 18, 18]
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.rstrip("Z")) if value else None
+
+
+def _iso(dt):
+    return dt.isoformat() + "Z" if dt else None
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        state = {}
+    state.setdefault("version", 1)
+    sources = state.setdefault("sources", {})
+    for name in PRIOR_PASSES:
+        src = sources.setdefault(name, {"lastPolled": None, "acqHours": [], "lagBrackets": []})
+        src.setdefault("lagBrackets", [])
+        # First-seen lags from older versions are biased by the schedule itself
+        src.pop("latencyH", None)
+    return state
+
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Model
+# ---------------------------------------------------------------------------
+
+def pass_clusters(hours, gap=CLUSTER_GAP_H):
+    """Median UTC hour of each group of acquisition times (circular over 24 h)"""
+    hours = sorted(h % 24 for h in hours)
+    if not hours:
+        return []
+    # Start at the widest gap so a pass straddling midnight stays in one group
+    gaps = [b - a for a, b in zip(hours, hours[1:])] + [hours[0] + 24 - hours[-1]]
+    start = (gaps.index(max(gaps)) + 1) % len(hours)
+    ordered = hours[start:] + [h + 24 for h in hours[:start]]
+    groups, current = [], [ordered[0]]
+    for h in ordered[1:]:
+        if h - current[-1] > gap:
+            groups.append(current)
+            current = []
+        current.append(h)
+    groups.append(current)
+    return sorted({round(g[len(g) // 2] % 24, 2) for g in groups})
+
+
+def lag_estimate(brackets):
+    """
+    Midpoint of the span covered by the most (lo, hi] lag brackets, clamped
+    to PRIOR_LATENCY_H +/- LATENCY_BOUND_H; the prior until MIN_SAMPLES
+    """
+    if len(brackets) < MIN_SAMPLES:
+        return PRIOR_LATENCY_H
+    edges = sorted({x for b in brackets for x in b})
+    best, span = -1, None
+    for a, b in zip(edges, edges[1:]):
+        n = sum(1 for lo, hi in brackets if lo <= a and hi >= b)
+        if n > best:
+            best, span = n, [a, b]
+        elif n == best and span[1] == a:
+            span[1] = b
+    estimate = (span[0] + span[1]) / 2 if span else PRIOR_LATENCY_H
+    return round(min(max(estimate, PRIOR_LATENCY_H - LATENCY_BOUND_H),
+                     PRIOR_LATENCY_H + LATENCY_BOUND_H), 2)
+
+
+def model(state, name):
+    """(pass hours, latency hours, 'learned' | 'prior') for one source"""
+    src = state["sources"][name]
+    acq = src.get("acqHours", [])
+    passes = pass_clusters(acq) if len(acq) >= MIN_SAMPLES else []
+    latency = lag_estimate(src.get("lagBrackets", []))
+    if passes:
+        return passes, latency, "learned"
+    return PRIOR_PASSES[name], latency, "prior"
+
+
+def availability_times(state, name, start, end):
+    """[(pass time, poll time)] for passes whose poll time falls in (start, end]"""
+    passes, latency, _ = model(state, name)
+    out = []
+    day = datetime(start.year, start.month, start.day) - timedelta(days=1)
+    while day <= end:
+        for h in passes:
+            acquired = day + timedelta(hours=h)
+            poll_at = acquired + timedelta(hours=latency - POLL_LEAD_H)
+            if start < poll_at <= end:
+                out.append((acquired, poll_at))
+        day += timedelta(days=1)
+    return sorted(out, key=lambda p: p[1])
+
+
+def due_sources(state, now=None):
+    """
+    {source: {'reason', 'pass', 'pollAt'}} for sources that should be polled now
+    A source is due when a batch became available since its last poll, when
+    its last poll missed the pass it was due for (once, RETRY_AFTER_H later),
+    or when it has gone MAX_INTERVAL_H without a poll.
+    """
+    now = now or datetime.utcnow()
+    due = {}
+    for name, src in state["sources"].items():
+        if name not in PRIOR_PASSES:
+            continue
+        last = _parse_time(src.get("lastPolled"))
+        windows = availability_times(state, name, last, now) if last else []
+        if windows:
+            acquired, poll_at = windows[-1]
+            due[name] = {"reason": "overpass", "pass": acquired, "pollAt": poll_at}
+        elif last is None or now - last >= timedelta(hours=MAX_INTERVAL_H):
+            due[name] = {"reason": "interval", "pass": None, "pollAt": now}
+        elif src.get("retry"):
+            acquired = _parse_time(src["retry"])
+            poll_at = acquired + timedelta(hours=model(state, name)[1] - POLL_LEAD_H + RETRY_AFTER_H)
+            if now >= poll_at:
+                due[name] = {"reason": "retry", "pass": acquired, "pollAt": poll_at}
+    return due
+
+
+def gate_on_probe(due, max_dates, now=None):
+    """
+    Drop due sources whose latest FIRMS date is still older than the pass
+    (data not ingested yet), unless the pass is GRACE_H past its poll time
+    max_dates: {source name: 'YYYY-MM-DD'} from the availability probe, or
+    None when the probe failed (nothing is dropped).
+    """
+    if not max_dates:
+        return due, {}
+    now = now or datetime.utcnow()
+    kept, deferred = {}, {}
+    for name, info in due.items():
+        latest = max_dates.get(name)
+        acquired = info.get("pass")
+        if (acquired is not None and latest and latest < acquired.strftime("%Y-%m-%d")
+                and now - info["pollAt"] < timedelta(hours=GRACE_H)):
+            deferred[name] = info
+        else:
+            kept[name] = info
+    return kept, deferred
+
+
+def observe(state, name, records, fetched_at, seen_keys=(), expected=None):
+    """
+    Record a poll of `name`: one acquisition hour and one lag bracket per
+    new scan (distinct acq_date/acq_time), however many detections it holds.
+    seen_keys holds the (lat, lon, date, time) keys already published, so
+    only first sightings count. expected is the pass this poll was due for;
+    if none of its detections showed up, due_sources() retries it once.
+    """
+    src = state["sources"][name]
+    previous = _parse_time(src.get("lastPolled"))
+    src["lastPolled"] = _iso(fetched_at)
+    seen = set(seen_keys)
+    scans = set()
+    for rec in records:
+        key = (rec["latitude"], rec["longitude"], rec.get("acq_date"), rec.get("acq_time"))
+        if key in seen or not rec.get("acq_date") or not rec.get("acq_time"):
+            continue
+        seen.add(key)
+        try:
+            scans.add(datetime.strptime(f"{rec['acq_date']} {int(rec['acq_time']):04d}",
+                                        "%Y-%m-%d %H%M"))
+        except (ValueError, TypeError):
+            continue
+    for acquired in sorted(scans):
+        src["acqHours"].append(round(acquired.hour + acquired.minute / 60, 2))
+        hi = (fetched_at - acquired).total_seconds() / 3600
+        lo = (previous - acquired).total_seconds() / 3600 if previous else 0.0
+        if 0 <= hi <= 48:
+            src["lagBrackets"].append([round(max(lo, 0.0), 2), round(hi, 2)])
+    src["acqHours"] = src["acqHours"][-HISTORY:]
+    src["lagBrackets"] = src["lagBrackets"][-HISTORY:]
+
+    window = timedelta(hours=CLUSTER_GAP_H)
+    if expected is None or any(abs(a - expected) <= window for a in scans):
+        src.pop("retry", None)
+    elif src.get("retry") == _iso(expected):
+        src.pop("retry")            # retried already; the next pass or interval poll picks it up
+    else:
+        src["retry"] = _iso(expected)
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def show(state, now=None):
+    now = now or datetime.utcnow()
+    due = due_sources(state, now)
+    print(f"🛰  FIRMS schedule at {now:%Y-%m-%d %H:%M} UTC")
+    for name in PRIOR_PASSES:
+        passes, latency, kind = model(state, name)
+        upcoming = availability_times(state, name, now, now + timedelta(hours=24))[:2]
+        nxt = ", ".join(f"pass {a:%H:%M} → poll {p:%H:%M}" for a, p in upcoming)
+        flag = f"DUE ({due[name]['reason']})" if name in due else "waiting"
+        print(f"  {name:13s} {kind:7s} passes {', '.join(f'{h:05.2f}' for h in passes)} h, "
+              f"lag {latency:.1f} h | {flag} | next: {nxt}")
+        print(f"  {'':13s} last polled {state['sources'][name].get('lastPolled') or 'never'}")
+
+
+def simulate(days=14, cron_minutes=30, tiles=8, true_lag=2.0, seed=0):
+    """
+    Compare the fixed schedule with adaptive polling against synthetic passes
+    Each pass lands within a few minutes of its nominal time, holds fire
+    detections two times in three, and reaches FIRMS `true_lag` h (+/- 20
+    min) later. Adaptive polling learns from what it sees through observe().
+    Counts FIRMS requests (tiles per source poll, plus one probe per run that
+    has something due) and the availability -> first poll seeing it delay.
+    """
+    import random
+    rng = random.Random(seed)
+    state = load_state(os.devnull)
+    start = datetime(2026, 1, 1)
+    end = start + timedelta(days=days)
+
+    # (acquired, available) of every pass with detections, per source
+    scans = {name: [] for name in PRIOR_PASSES}
+    for name, hours in PRIOR_PASSES.items():
+        for d in range(-1, days):
+            for h in hours:
+                acquired = start + timedelta(days=d, hours=h, minutes=rng.uniform(-5, 5))
+                acquired = acquired.replace(second=0, microsecond=0)
+                available = acquired + timedelta(hours=true_lag + rng.uniform(-1 / 3, 1 / 3))
+                if rng.random() < 2 / 3:
+                    scans[name].append((acquired, available))
+
+    def delays(polls):
+        """availability -> first poll that saw each scan, for scans available in the run"""
+        out = []
+        for name, times in polls.items():
+            times = sorted(times)
+            for _, available in scans[name]:
+                later = [t for t in times if t >= available]
+                if start <= available and later:
+                    out.append((later[0] - available).total_seconds() / 3600)
+        return out
+
+    fixed_runs = [start + timedelta(days=d, hours=h) for d in range(days) for h in FIXED_POLLS_H]
+    fixed_calls = tiles * len(fixed_runs) * len(PRIOR_PASSES)
+    fixed_delay = delays({name: fixed_runs for name in PRIOR_PASSES})
+
+    adaptive_calls, polls = 0, {name: [] for name in PRIOR_PASSES}
+    seen = set()
+    for name in PRIOR_PASSES:
+        state["sources"][name]["lastPolled"] = _iso(start)
+    t = start
+    while t < end:
+        t += timedelta(minutes=cron_minutes)
+        due = due_sources(state, t)
+        if due:
+            adaptive_calls += 1   # availability probe
+        for name, info in due.items():
+            adaptive_calls += tiles
+            polls[name].append(t)
+            records = [{"latitude": 37.0, "longitude": -78.0,
+                        "acq_date": f"{a:%Y-%m-%d}", "acq_time": f"{a:%H%M}"}
+                       for a, available in scans[name] if available <= t]
+            observe(state, name, records, t, seen, info["pass"])
+            seen.update((r["latitude"], r["longitude"], r["acq_date"], r["acq_time"])
+                        for r in records)
+    adaptive_delay = delays(polls)
+
+    def mean(xs):
+        return sum(xs) / len(xs) if xs else 0.0
+
+    print(f"📈 {days} days, {len(PRIOR_PASSES)} sources, {tiles} tiles per poll, "
+          f"true lag {true_lag:.1f} h")
+    print(f"  fixed:    {fixed_calls / days:6.1f} requests/day, "
+          f"availability → poll {mean(fixed_delay):.2f} h mean, {max(fixed_delay, default=0):.2f} h max")
+    print(f"  adaptive: {adaptive_calls / days:6.1f} requests/day, "
+          f"availability → poll {mean(adaptive_delay):.2f} h mean, "
+          f"{max(adaptive_delay, default=0):.2f} h max (runs every {cron_minutes} min)")
+    learned = {name: model(state, name)[1] for name in PRIOR_PASSES}
+    print("  learned lag: " + ", ".join(f"{name} {lag:.2f} h" for name, lag in learned.items()))
+    return {"fixed": (fixed_calls / days, mean(fixed_delay)),
+            "adaptive": (adaptive_calls / days, mean(adaptive_delay)),
+            "learned": learned}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FIRMS overpass-aware polling schedule")
+    parser.add_argument("--simulate", type=int, metavar="DAYS", default=None,
+                        help="compare fixed and adaptive polling over DAYS days")
+    parser.add_argument("--cron-minutes", type=int, default=30)
+    parser.add_argument("--true-lag", type=float, default=2.0,
+                        help="availability lag of the simulated FIRMS feed (hours)")
+    args = parser.parse_args(argv)
+    if args.simulate:
+        simulate(args.simulate, args.cron_minutes, true_lag=args.true_lag)
+    else:
+        show(load_state())
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
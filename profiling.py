@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks shared by the pipeline entry points
+Off by default. Turn on with `python firewx.py --profile <command>` or by
+setting FIREWX_PROFILE=1 before running any entry point directly
+(fetch_firms.py, fetch_weather.py, scripts/generate_briefs.py,
+scripts/build_five_forks_brief.py, ...).
+
+Each profiled run writes to profiles/ (or $FIREWX_PROFILE_DIR):
+  <name>-<stamp>.pstats      cProfile stats of the main thread
+  <name>-<stamp>.spans.json  wall-clock spans from @span / `with span(...)`,
+                             including worker threads
+  <name>-<stamp>.mem.txt     top allocation sites, when FIREWX_PROFILE_MEMORY=N
+                             (or --profile-memory N) asks for the top N
+
+Usage:
+  python profiling.py show profiles/fetch_firms-20261018T060000.pstats [--top 25]
+  python profiling.py diff OLD.pstats NEW.pstats [--top 25]
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(REPO_ROOT, "profiles")
+
+# Raw span events kept per run (aggregates always cover every span)
+MAX_SPAN_EVENTS = 10000
+
+_active = None          # the running _Session, if any
+_lock = threading.Lock()
+
+
+def env_enabled():
+    return os.environ.get("FIREWX_PROFILE", "").strip().lower() not in ("", "0", "false", "no")
+
+
+def env_memory_top():
+    try:
+        return int(os.environ.get("FIREWX_PROFILE_MEMORY", "0"))
+    except ValueError:
+        return 0
+
+
+class _Session:
+    def __init__(self, name):
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.spans = {}
+        self.events = []
+
+    def record(self, label, start, duration):
+        with _lock:
+            agg = self.spans.setdefault(label, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += duration
+            agg[2] = max(agg[2], duration)
+            if len(self.events) < MAX_SPAN_EVENTS:
+                self.events.append([label, round(start - self.t0, 6), round(duration, 6),
+                                    threading.current_thread().name])
+
+
+class span:
+    """
+    Time a block or function as a named span while a profile is running
+    Usable as `@span()`, `@span("label")` or `with span("label"):`; when no
+    profile is active it costs one global lookup.
+    """
+    __slots__ = ("label", "start")
+
+    def __init__(self, label=None):
+        self.label = label
+
+    def __call__(self, func):
+        label = self.label or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = _active
+            if session is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                session.record(label, start, time.perf_counter() - start)
+        return wrapper
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        session = _active
+        if session is not None:
+            session.record(self.label, self.start, time.perf_counter() - self.start)
+        return False
+
+
+@contextmanager
+def profile(name, enabled=None, memory_top=None, out_dir=None):
+    """
+    Profile the enclosed block when enabled (default: FIREWX_PROFILE)
+    Nested calls while a profile is already running are no-ops.
+    """
+    global _active
+    enabled = env_enabled() if enabled is None else enabled
+    if not enabled or _active is not None:
+        yield None
+        return
+
+    import cProfile
+    memory_top = env_memory_top() if memory_top is None else memory_top
+    out_dir = out_dir or os.environ.get("FIREWX_PROFILE_DIR") or DEFAULT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, f"{name}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}")
+
+    if memory_top > 0:
+        import tracemalloc
+        tracemalloc.start()
+    session = _active = _Session(name)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield session
+    finally:
+        profiler.disable()
+        _active = None
+        wall = time.perf_counter() - session.t0
+        profiler.dump_stats(stem + ".pstats")
+        _write_spans(stem + ".spans.json", session, wall)
+        if memory_top > 0:
+            _write_memory(stem + ".mem.txt", memory_top)
+        print(f"\n🔬 Profile {name}: {wall:.2f} s wall → {stem}.pstats", file=sys.stderr)
+        _print_top(profiler, 5)
+
+
+def _write_spans(path, session, wall):
+    spans = {label: {"count": c, "total_s": round(t, 6), "max_s": round(m, 6)}
+             for label, (c, t, m) in sorted(session.spans.items(), key=lambda kv: -kv[1][1])}
+    with open(path, "w") as f:
+        json.dump({
+            "name": session.name,
+            "generated": datetime.utcnow().isoformat() + "Z",
+            "wall_s": round(wall, 6),
+            "spans": spans,
+            "events": session.events,
+        }, f, indent=2)
+
+
+def _write_memory(path, top):
+    import tracemalloc
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = snapshot.statistics("lineno")
+    with open(path, "w") as f:
+        f.write(f"current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+        for stat in stats[:top]:
+            f.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {stat.traceback}\n")
+
+
+def _print_top(profiler, n):
+    import pstats
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda kv: -kv[1][3])
+    for (filename, line, func), (_, calls, _, cumtime, _) in rows[:n]:
+        print(f"   {cumtime:8.3f} s  {calls:7d}×  {os.path.basename(filename)}:{func}",
+              file=sys.stderr)
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def load_stats(path):
+    """{(file basename, function): [calls, tottime, cumtime]} from a pstats file"""
+    import pstats
+    out = {}
+    for (filename, _, func), (_, calls, tottime, cumtime, _) in pstats.Stats(path).stats.items():
+        if os.path.basename(filename) == "profiling.py":
+            continue   # span wrappers
+        key = (os.path.basename(filename), func)
+        agg = out.setdefault(key, [0, 0.0, 0.0])
+        agg[0] += calls
+        agg[1] += tottime
+        agg[2] = max(agg[2], cumtime)   # recursion / same-name functions: keep the outermost
+    return out
+
+
+def _spans_for(pstats_path):
+    path = pstats_path[:-len(".pstats")] + ".spans.json" if pstats_path.endswith(".pstats") else None
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def show(path, top=25):
+    stats = load_stats(path)
+    print(f"{'cumtime':>9} {'tottime':>9} {'calls':>8}  function")
+    for (fname, func), (calls, tt, ct) in sorted(stats.items(), key=lambda kv: -kv[1][2])[:top]:
+        print(f"{ct:9.3f} {tt:9.3f} {calls:8d}  {fname}:{func}")
+    spans = _spans_for(path)
+    if spans:
+        print(f"\nSpans (wall {spans['wall_s']:.2f} s):")
+        for label, s in list(spans["spans"].items())[:top]:
+            print(f"{s['total_s']:9.3f} s {s['count']:6d}×  max {s['max_s']:.3f} s  {label}")
+
+
+def diff(old_path, new_path, top=25):
+    """Functions whose cumulative time moved the most between two profiles"""
+    old, new = load_stats(old_path), load_stats(new_path)
+    rows = []
+    for key in set(old) | set(new):
+        o = old.get(key, [0, 0.0, 0.0])
+        n = new.get(key, [0, 0.0, 0.0])
+        rows.append((n[2] - o[2], n[1] - o[1], key, o, n))
+    rows.sort(key=lambda r: -abs(r[0]))
+
+    total_old = max((v[2] for v in old.values()), default=0.0)
+    total_new = max((v[2] for v in new.values()), default=0.0)
+    print(f"Total: {total_old:.3f} s → {total_new:.3f} s ({total_new - total_old:+.3f} s)\n")
+    print(f"{'Δcum':>9} {'Δtot':>9} {'old cum':>9} {'new cum':>9} {'calls':>15}  function")
+    for dct, dtt, (fname, func), o, n in rows[:top]:
+        calls = f"{o[0]}→{n[0]}"
+        print(f"{dct:+9.3f} {dtt:+9.3f} {o[2]:9.3f} {n[2]:9.3f} {calls:>15}  {fname}:{func}")
+
+    old_spans, new_spans = _spans_for(old_path), _spans_for(new_path)
+    if old_spans and new_spans:
+        print(f"\nSpans (wall {old_spans['wall_s']:.2f} s → {new_spans['wall_s']:.2f} s):")
+        labels = set(old_spans["spans"]) | set(new_spans["spans"])
+        span_rows = []
+        for label in labels:
+            o = old_spans["spans"].get(label, {"total_s": 0.0, "count": 0})
+            n = new_spans["spans"].get(label, {"total_s": 0.0, "count": 0})
+            span_rows.append((n["total_s"] - o["total_s"], label, o, n))
+        for d, label, o, n in sorted(span_rows, key=lambda r: -abs(r[0]))[:top]:
+            print(f"{d:+9.3f} {o['total_s']:9.3f} {n['total_s']:9.3f} "
+                  f"{o['count']:>6}→{n['count']:<6}  {label}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and compare pipeline profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("show", help="top functions and spans of one profile")
+    p.add_argument("path")
+    p.add_argument("--top", type=int, default=25)
+    p = sub.add_parser("diff", help="largest changes between two profiles")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    for path in ([args.path] if args.command == "show" else [args.old, args.new]):
+        if not os.path.exists(path):
+            print(f"❌ ERROR: Profile not found: {path}")
+            return 1
+    if args.command == "show":
+        show(args.path, args.top)
+    else:
+        diff(args.old, args.new, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+// scripts/brief-search.js
+// Client-side search over briefs/search-index.json (scripts/build_brief_index.py).
+// Posting lists are run-length encoded brief numbers; each term is decoded into
+// a bitmap and the bitmaps are ANDed, so a query over the whole archive takes
+// well under a millisecond once the index is loaded. Query rules match
+// build_brief_index.search on the Python side.
+
+(function(global) {
+  'use strict';
+
+  const TOKEN_RE = /[a-z0-9]+/g;
+  const QUERY_RE = /(\w+):"([^"]*)"|(\S+)/g;
+  const STOPWORDS = new Set('a an and are as at be by for from in into is it of on or the to via with'.split(' '));
+  const CLASS_FACETS = ['local', 'dof'];
+
+  function words(text) {
+    return (text.toLowerCase().match(TOKEN_RE) || []);
+  }
+
+  function countyKey(name) {
+    return words(name).join('-');
+  }
+
+  // [gap, length, gap, length, ...] -> bitmap over n briefs
+  function decodeRuns(runs, n) {
+    const bits = new Uint8Array(n);
+    let end = 0;
+    for (let i = 0; i + 1 < (runs || []).length; i += 2) {
+      const start = end + runs[i];
+      bits.fill(1, start, start + runs[i + 1]);
+      end = start + runs[i + 1];
+    }
+    return bits;
+  }
+
+  function classSet(spec) {
+    const m = /^(>=|<=|>|<)?(\d)(?:-(\d))?$/.exec(spec.trim());
+    if (!m) return [];
+    const lo = Number(m[2]);
+    const hi = Number(m[3] || m[2]);
+    const range = (a, b) => Array.from({ length: Math.max(0, b - a + 1) }, (_, i) => a + i);
+    switch (m[1]) {
+      case '>=': return range(lo, 5);
+      case '>': return range(lo + 1, 5);
+      case '<=': return range(1, lo);
+      case '<': return range(1, lo - 1);
+      default: return range(lo, hi);
+    }
+  }
+
+  function csiTest(spec) {
+    const m = /^(>=|<=|>|<)?(\d+(?:\.\d+)?)(?:-(\d+(?:\.\d+)?))?$/.exec(spec.trim());
+    if (!m) return () => false;
+    const lo = Number(m[2]);
+    const hi = m[3] !== undefined ? Number(m[3]) : null;
+    switch (m[1]) {
+      case '>=': return v => v >= lo;
+      case '>': return v => v > lo;
+      case '<=': return v => v <= lo;
+      case '<': return v => v < lo;
+      default: return hi !== null ? v => v >= lo && v <= hi : v => v === lo;
+    }
+  }
+
+  function parseQuery(text, counties) {
+    const q = { words: [], prefixes: [], counties: [], local: null, dof: null, csi: null, from: null, to: null };
+    const bare = [];
+    for (const m of text.matchAll(QUERY_RE)) {
+      let key = m[1] ? m[1] : null;
+      let value = m[1] ? m[2] : m[3];
+      if (key === null && value.includes(':')) {
+        const at = value.indexOf(':');
+        key = value.slice(0, at);
+        value = value.slice(at + 1);
+      }
+      key = (key || '').toLowerCase();
+      if (key === 'county') q.counties.push(countyKey(value));
+      else if (CLASS_FACETS.includes(key)) q[key] = classSet(value);
+      else if (key === 'csi') q.csi = value;
+      else if (key === 'from' || key === 'to') q[key] = value;
+      else if (value.endsWith('*') && /^[a-z0-9]+$/.test(value.slice(0, -1).toLowerCase())) {
+        q.prefixes.push(value.slice(0, -1).toLowerCase());
+      } else bare.push(...words(value));
+    }
+    bare.forEach(w => {
+      // A bare county name also anchors the class facets
+      if (w in counties && !q.counties.length && (q.local || q.dof)) q.counties.push(w);
+      else if (!STOPWORDS.has(w)) q.words.push(w);
+    });
+    return q;
+  }
+
+  // -> [{ file, issued, csi }] newest first
+  function search(index, text) {
+    const docs = index.docs;
+    const n = docs.file.length;
+    const q = parseQuery(text, index.counties);
+    const sets = [];
+    const union = (table, keys) => {
+      const bits = new Uint8Array(n);
+      keys.forEach(k => decodeRuns(table[k], n).forEach((b, i) => { if (b) bits[i] = 1; }));
+      return bits;
+    };
+
+    q.words.forEach(w => sets.push(decodeRuns(index.words[w], n)));
+    q.prefixes.forEach(p => sets.push(union(index.words, index.wordList.filter(w => w.startsWith(p)))));
+    CLASS_FACETS.forEach(facet => {
+      if (q[facet] === null) return;
+      const keys = q.counties.length
+        ? q.counties.flatMap(c => q[facet].map(v => `${facet}:${c}:${v}`))
+        : q[facet].map(v => `${facet}:${v}`);
+      sets.push(union(index.facets, keys));
+    });
+    if (q.counties.length && q.local === null && q.dof === null) {
+      q.counties.forEach(c => sets.push(decodeRuns(index.facets[`county:${c}`], n)));
+    }
+
+    const test = q.csi ? csiTest(q.csi) : null;
+    const hits = [];
+    for (let i = 0; i < n; i++) {
+      if (sets.some(bits => !bits[i])) continue;
+      const issued = docs.issued[i] || '';
+      if ((q.from && issued < q.from) || (q.to && issued > q.to)) continue;
+      if (test && (docs.csi[i] === null || !test(docs.csi[i]))) continue;
+      hits.push({ file: docs.file[i], issued, csi: docs.csi[i] });
+    }
+    hits.sort((a, b) => {
+      const ka = a.issued + a.file;
+      const kb = b.issued + b.file;
+      return ka < kb ? 1 : ka > kb ? -1 : 0;
+    });
+    return hits;
+  }
+
+  async function load(url = 'briefs/search-index.json') {
+    const r = await fetch(url, { cache: 'no-cache' });
+    if (!r.ok) throw new Error(`Failed to fetch ${url}: ${r.status}`);
+    const index = await r.json();
+    index.wordList = Object.keys(index.words);
+    return index;
+  }
+
+  global.BriefSearch = { load, search, parseQuery };
+})(typeof window !== 'undefined' ? window : globalThis);
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Self-test of the brief archive extractor against a current-format brief
+
+- Builds an HTML brief with generate_briefs.make_brief, including every
+  optional table it can add (Local class probabilities from ensemble.py,
+  FFWI/HDW peaks from fire_indices.py)
+- Runs it through extract_brief_archive.extract_html / file_rows and checks
+  that the dataset holds exactly one row per county, with the county table's
+  class and inputs, and nothing from the other tables
+- Builds a DOCX brief with build_five_forks_brief.build_doc (when python-docx
+  is installed) and checks one row per county and day, each carrying that
+  day's CSI from the "Day | CSI" summary
+- Exits 1 on the first failed check
+
+Usage:
+  python scripts/brief_archive_selftest.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(SCRIPTS_DIR, ".."))
+
+COUNTIES = [{"name": "Amelia"}, {"name": "Dinwiddie"}, {"name": "Nottoway"}]
+WEATHER = {c["name"]: {"temp_f": 78, "min_rh": 28, "wind_mph": 12,
+                       "days_since_rain": 6, "rainfall_inches": 0.0} for c in COUNTIES}
+DATE = "2026-04-02"
+DOCX_DATES = ["2026-04-02", "2026-04-03", "2026-04-04"]
+DOCX_CSI = [410, 455, 380]
+
+
+def sample_ensemble():
+    """forecast_data.json "ensemble" section (ensemble.py) for COUNTIES"""
+    day = {"local": {"probabilities": {"1": 0.14, "2": 0.66, "3": 0.2},
+                     "exceedance": {"2": 0.85, "3": 0.2, "4": 0.0, "5": 0.0}}}
+    return {"samples": 500, "counties": {c["name"]: [day] * 3 for c in COUNTIES}}
+
+
+def sample_indices():
+    """forecast_data.json "indices" section (fire_indices.py) for COUNTIES"""
+    days = [{"date": f"2026-04-0{d}",
+             "ffwi": {"peak": 55.0, "at": f"2026-04-0{d}T19:00:00Z"},
+             "hdw": {"peak": 300.0, "at": f"2026-04-0{d}T19:00:00Z"}} for d in (2, 3, 4)]
+    return {"ffwiCritical": 50, "tzOffsetHours": -5,
+            "counties": {c["name"]: {"days": days} for c in COUNTIES}}
+
+
+def sample_docx_input():
+    """build_five_forks_brief input JSON for COUNTIES over DOCX_DATES"""
+    weather = {d: {"temp_max": 78, "rh_min": 28, "wind_20ft": 12} for d in DOCX_DATES}
+    return {
+        "meta": {"dates": DOCX_DATES, "counties": [c["name"] for c in COUNTIES]},
+        "county_inputs": {c["name"]: {"weather": weather} for c in COUNTIES},
+        "csi_summary": [{"day": f"Apr 0{d[-1]}", "csi": csi, "predicted_class_day": "2",
+                         "points": 4} for d, csi in zip(DOCX_DATES, DOCX_CSI)],
+    }
+
+
+def main():
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, SCRIPTS_DIR)
+    import extract_brief_archive as archive
+    import generate_briefs
+
+    html = generate_briefs.make_brief(COUNTIES, WEATHER, DATE, ensemble=sample_ensemble(),
+                                      indices=sample_indices())
+    fname = f"brief-{DATE}.html"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, fname)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(html)
+        rows = archive.file_rows(fname, archive.extract_html(path))
+
+    failures = []
+
+    def check(name, got, want):
+        ok = got == want
+        print(f"  {'PASS' if ok else 'FAIL'} {name}: {got}" + ("" if ok else f" (expected {want})"))
+        if not ok:
+            failures.append(name)
+
+    print(f"🧪 {fname} with {html.count('<table')} tables")
+    check("rows", len(rows), len(COUNTIES))
+    check("counties", [r["county"] for r in rows], [c["name"] for c in COUNTIES])
+    check("rows with a DOF class", sum(r["dof_class"] is not None for r in rows), len(COUNTIES))
+    check("rows with inputs", sum(r["temp_f"] == 78 and r["wind_mph"] == 12 for r in rows),
+          len(COUNTIES))
+
+    try:
+        import docx  # noqa: F401
+    except ImportError:
+        print("⚠️  python-docx not installed; DOCX check skipped")
+    else:
+        import build_five_forks_brief
+        fname = "Five_Forks_Brief_20260402_060000.docx"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, fname)
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_five_forks_brief.build_doc(sample_docx_input(), path)
+            rows = archive.file_rows(fname, archive.extract_docx(path))
+        print(f"🧪 {fname}")
+        check("rows", len(rows), len(COUNTIES) * len(DOCX_DATES))
+        check("dates", sorted({r["date"] for r in rows}), DOCX_DATES)
+        check("CSI by lead", [r["csi"] for r in rows if r["county"] == COUNTIES[0]["name"]],
+              [float(v) for v in DOCX_CSI])
+
+    if failures:
+        print(f"❌ Brief archive self-test failed: {', '.join(failures)}")
+        return 1
+    print("✅ Brief archive self-test passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Full-text and faceted search index over the brief archive.
+
+Every Five_Forks_Brief_*.docx and brief-*.html in briefs/ is reduced to its
+words plus structured facets:
+  issued date, counties, local class and DOF class per county (any forecast
+  day in the brief), and the highest CSI the brief reports
+
+and written to briefs/search-index.json for scripts/brief-search.js, which
+answers queries in the browser with no server:
+
+  dinwiddie dof:4               briefs where Dinwiddie's DOF class was 4
+  county:Amelia local:3-5       Amelia's local class between 3 and 5
+  red flag from:2026-03-01      both words, issued on/after March 1
+  csi:>=50 gust*                CSI at least 50 and a word starting "gust"
+
+Briefs are numbered by kind (DOCX, then HTML) and issue date. Each posting
+list is stored as runs of consecutive brief numbers, flattened to
+[gap, length, gap, length, ...] (gap from the end of the previous run), so
+words and facets present in long stretches of daily briefs cost a few
+integers.
+
+Per-brief terms are cached by content hash in data/brief_index_cache.json
+(git-ignored); a run only parses briefs whose content is new and re-assembles
+the postings from the cache. As in extract_brief_archive, an unchanged size
+and mtime skips even the hashing.
+
+Usage:
+  python scripts/build_brief_index.py                 # update the index
+  python scripts/build_brief_index.py --query "county:Dinwiddie dof:4"
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from html.parser import HTMLParser
+from xml.etree.ElementTree import iterparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import extract_brief_archive as archive  # noqa: E402
+
+REPO_ROOT = archive.REPO_ROOT
+BRIEFS_DIR = archive.BRIEFS_DIR
+INDEX_FILE = os.path.join(BRIEFS_DIR, "search-index.json")
+CACHE_FILE = os.path.join(REPO_ROOT, "data", "brief_index_cache.json")
+
+# Bump when per-brief extraction changes to invalidate the cache
+CACHE_VERSION = 2
+INDEX_VERSION = 1
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+CSI_RE = re.compile(r"\bCSI\b\D{0,12}?(\d{1,3}(?:\.\d+)?)")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to via with".split())
+CLASS_FACETS = ("local", "dof")
+
+
+# ---------------------------------------------------------------------------
+# Per-brief extraction
+# ---------------------------------------------------------------------------
+
+def docx_text(path):
+    """Paragraph and table-cell text of a .docx, one line per paragraph"""
+    lines, text = [], []
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as fh:
+        for _, elem in iterparse(fh):
+            if elem.tag == archive.W + "t":
+                text.append(elem.text or "")
+            elif elem.tag == archive.W + "p":
+                lines.append("".join(text))
+                text = []
+                elem.clear()
+    return "\n".join(lines)
+
+
+class _TextParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts, self._skip = [], 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("style", "script"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("style", "script") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_text(path):
+    parser = _TextParser()
+    with open(path, "r", encoding="utf-8") as fh:
+        parser.feed(fh.read())
+    return " ".join(parser.parts)
+
+
+def tokens(text):
+    """Distinct lower-case words (stopwords and 1-letter words dropped)"""
+    return {t for t in TOKEN_RE.findall(text.lower())
+            if t not in STOPWORDS and (len(t) > 1 or t.isdigit())}
+
+
+def docx_csi_cells(path):
+    """CSI column of the 'Day | CSI | ...' summary table"""
+    for table in archive.docx_tables(path):
+        if table and len(table[0]) > 1 and table[0][1].strip() == "CSI":
+            return [row[1] for row in table[1:] if len(row) > 1]
+    return []
+
+
+def issue_date(fname):
+    """ISO issue date from a brief file name"""
+    m = archive.DOCX_RE.match(fname)
+    if m:
+        return datetime.datetime.strptime(m.group(1), "%Y%m%d").date().isoformat()
+    m = archive.HTML_RE.match(fname)
+    return m.group(1) if m else None
+
+
+def county_key(name):
+    return "-".join(TOKEN_RE.findall(name.lower()))
+
+
+def extract(path):
+    """(sha256, per-brief entry) for one brief"""
+    fname = os.path.basename(path)
+    digest, raw = archive.extract(path)
+    if fname.endswith(".docx"):
+        text, csi_cells = docx_text(path), docx_csi_cells(path)
+    else:
+        text, csi_cells = html_text(path), []
+
+    classes = {facet: {} for facet in CLASS_FACETS}
+    names = {}
+    for row in archive.file_rows(fname, raw):
+        name = row["county"].strip()
+        if not name:
+            continue
+        names[county_key(name)] = name
+        for facet in CLASS_FACETS:
+            value = row.get(f"{facet}_class")
+            if value is not None:
+                classes[facet].setdefault(county_key(name), set()).add(value)
+
+    values = [float(m.group(1)) for m in CSI_RE.finditer(text)]
+    values += [v for v in map(archive.parse_number, csi_cells) if v is not None]
+    return digest, {
+        "issued": issue_date(fname),
+        "kind": "docx" if fname.endswith(".docx") else "html",
+        "csi": max(values) if values else None,
+        "words": sorted(tokens(text)),
+        "counties": names,
+        "classes": {f: {c: sorted(v) for c, v in by_county.items()}
+                    for f, by_county in classes.items()},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Postings
+# ---------------------------------------------------------------------------
+
+def encode_runs(ids):
+    """Sorted brief numbers -> [gap, length, gap, length, ...]"""
+    out, end = [], 0
+    start = prev = None
+    for i in ids:
+        if start is None:
+            start = prev = i
+        elif i == prev + 1:
+            prev = i
+        else:
+            out += [start - end, prev - start + 1]
+            end = prev + 1
+            start = prev = i
+    if start is not None:
+        out += [start - end, prev - start + 1]
+    return out
+
+
+def decode_runs(runs):
+    ids, end = [], 0
+    for gap, length in zip(runs[::2], runs[1::2]):
+        start = end + gap
+        ids.extend(range(start, start + length))
+        end = start + length
+    return ids
+
+
+def build_index(entries):
+    """Search index dict from {file name: entry}, numbered by kind and issue date"""
+    files = sorted(entries, key=lambda f: (entries[f]["kind"], entries[f]["issued"] or "", f))
+    words, facets, counties = {}, {}, {}
+
+    def post(table, key, i):
+        table.setdefault(key, []).append(i)
+
+    for i, fname in enumerate(files):
+        e = entries[fname]
+        for w in e["words"]:
+            post(words, w, i)
+        for key, name in e["counties"].items():
+            counties[key] = name
+            post(facets, f"county:{key}", i)
+        for facet, by_county in e["classes"].items():
+            seen = set()
+            for key, values in by_county.items():
+                for v in values:
+                    post(facets, f"{facet}:{key}:{v}", i)
+                    seen.add(v)
+            for v in sorted(seen):
+                post(facets, f"{facet}:{v}", i)
+
+    return {
+        "version": INDEX_VERSION,
+        "generated": datetime.datetime.utcnow().isoformat() + "Z",
+        "docs": {
+            "file": files,
+            "issued": [entries[f]["issued"] for f in files],
+            "kind": [entries[f]["kind"] for f in files],
+            "csi": [entries[f]["csi"] for f in files],
+        },
+        "counties": dict(sorted(counties.items())),
+        "words": {w: encode_runs(ids) for w, ids in sorted(words.items())},
+        "facets": {k: encode_runs(ids) for k, ids in sorted(facets.items())},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Queries (same rules as scripts/brief-search.js)
+# ---------------------------------------------------------------------------
+
+QUERY_RE = re.compile(r'(\w+):"([^"]*)"|(\S+)')
+
+
+def class_set(spec):
+    """'4', '3-5', '>=3', '<2' -> set of classes 1-5"""
+    m = re.fullmatch(r"(>=|<=|>|<)?(\d)(?:-(\d))?", spec.strip())
+    if not m:
+        return set()
+    op, lo, hi = m.group(1), int(m.group(2)), int(m.group(3) or m.group(2))
+    if op == ">=":
+        return set(range(lo, 6))
+    if op == ">":
+        return set(range(lo + 1, 6))
+    if op == "<=":
+        return set(range(1, lo + 1))
+    if op == "<":
+        return set(range(1, lo))
+    return set(range(lo, hi + 1))
+
+
+def csi_test(spec):
+    m = re.fullmatch(r"(>=|<=|>|<)?(\d+(?:\.\d+)?)(?:-(\d+(?:\.\d+)?))?", spec.strip())
+    if not m:
+        return lambda v: False
+    op, lo = m.group(1), float(m.group(2))
+    hi = float(m.group(3)) if m.group(3) else None
+    tests = {">=": lambda v: v >= lo, ">": lambda v: v > lo,
+             "<=": lambda v: v <= lo, "<": lambda v: v < lo}
+    if op:
+        return tests[op]
+    return (lambda v: lo <= v <= hi) if hi is not None else (lambda v: v == lo)
+
+
+def parse_query(text, counties):
+    """{'words', 'prefixes', 'counties', 'local', 'dof', 'csi', 'from', 'to'}"""
+    q = {"words": [], "prefixes": [], "counties": [], "local": None, "dof": None,
+         "csi": None, "from": None, "to": None}
+    bare = []
+    for m in QUERY_RE.finditer(text):
+        key, value = (m.group(1), m.group(2)) if m.group(1) else (None, m.group(3))
+        if key is None and ":" in value:
+            key, _, value = value.partition(":")
+        key = (key or "").lower()
+        if key == "county":
+            q["counties"].append(county_key(value))
+        elif key in CLASS_FACETS:
+            q[key] = class_set(value)
+        elif key == "csi":
+            q["csi"] = value
+        elif key in ("from", "to"):
+            q[key] = value
+        elif value.endswith("*") and TOKEN_RE.fullmatch(value[:-1].lower()):
+            q["prefixes"].append(value[:-1].lower())
+        else:
+            bare.extend(TOKEN_RE.findall(value.lower()))
+    for w in bare:
+        # A bare county name also anchors the class facets
+        if w in counties and not q["counties"] and (q["local"] or q["dof"]):
+            q["counties"].append(w)
+        elif w not in STOPWORDS:
+            q["words"].append(w)
+    return q
+
+
+def search(index, text):
+    """Matching briefs, newest first: [{'file', 'issued', 'csi'}]"""
+    docs = index["docs"]
+    n = len(docs["file"])
+    q = parse_query(text, index["counties"])
+    sets = []
+
+    def ids(table, key):
+        return set(decode_runs(table.get(key, [])))
+
+    for w in q["words"]:
+        sets.append(ids(index["words"], w))
+    for prefix in q["prefixes"]:
+        sets.append(set().union(*[set(decode_runs(r)) for w, r in index["words"].items()
+                                  if w.startswith(prefix)]))
+    for facet in CLASS_FACETS:
+        wanted = q[facet]
+        if wanted is None:
+            continue
+        keys = [f"{facet}:{c}:{v}" for c in q["counties"] for v in wanted] if q["counties"] \
+            else [f"{facet}:{v}" for v in wanted]
+        sets.append(set().union(*[ids(index["facets"], k) for k in keys]))
+    if q["counties"] and q["local"] is None and q["dof"] is None:
+        for c in q["counties"]:
+            sets.append(ids(index["facets"], f"county:{c}"))
+
+    matched = set.intersection(*sets) if sets else set(range(n))
+    test = csi_test(q["csi"]) if q["csi"] else None
+    out = []
+    for i in sorted(matched, key=lambda i: (docs["issued"][i] or "", docs["file"][i]), reverse=True):
+        issued = docs["issued"][i] or ""
+        if (q["from"] and issued < q["from"]) or (q["to"] and issued > q["to"]):
+            continue
+        if test and (docs["csi"][i] is None or not test(docs["csi"][i])):
+            continue
+        out.append({"file": docs["file"][i], "issued": issued, "csi": docs["csi"][i]})
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Cache and driver
+# ---------------------------------------------------------------------------
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            cache = json.load(fh)
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": CACHE_VERSION, "files": {}, "entries": {}}
+
+
+def update_entries(briefs_dir=BRIEFS_DIR, cache_path=CACHE_FILE):
+    """Parse new/changed briefs; returns ({file: entry}, number parsed)"""
+    cache = load_cache(cache_path)
+    names = archive.list_briefs(briefs_dir)
+    parsed = 0
+    for fname in names:
+        path = os.path.join(briefs_dir, fname)
+        st = os.stat(path)
+        known = cache["files"].get(fname)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime \
+                and known["sha256"] in cache["entries"]:
+            continue
+        digest = archive.file_sha256(path)
+        cache["files"][fname] = {"sha256": digest, "size": st.st_size, "mtime": st.st_mtime}
+        if digest in cache["entries"]:
+            continue
+        cache["entries"][digest] = extract(path)[1]
+        parsed += 1
+
+    cache["files"] = {f: cache["files"][f] for f in names}
+    live = {v["sha256"] for v in cache["files"].values()}
+    cache["entries"] = {h: e for h, e in cache["entries"].items() if h in live}
+    archive.save_cache(cache, cache_path)
+    return {f: cache["entries"][cache["files"][f]["sha256"]] for f in names}, parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the brief archive search index")
+    parser.add_argument("--query", help="search the existing index instead of rebuilding it")
+    args = parser.parse_args(argv)
+
+    if args.query is not None:
+        with open(INDEX_FILE, "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+        t0 = time.perf_counter()
+        hits = search(index, args.query)
+        ms = (time.perf_counter() - t0) * 1000
+        for hit in hits[:25]:
+            csi = f"  CSI {hit['csi']:g}" if hit["csi"] is not None else ""
+            print(f"  {hit['issued']}  {hit['file']}{csi}")
+        print(f"🔎 {len(hits)} of {len(index['docs']['file'])} briefs match in {ms:.1f} ms")
+        return 0
+
+    t0 = time.perf_counter()
+    entries, parsed = update_entries()
+    index = build_index(entries)
+    with open(INDEX_FILE, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, separators=(",", ":"))
+    size = os.path.getsize(INDEX_FILE)
+    print(f"WROTE {INDEX_FILE}: {len(entries)} briefs ({parsed} parsed, {len(entries) - parsed} cached), "
+          f"{len(index['words'])} words, {len(index['facets'])} facet keys, "
+          f"{size / 1024:.0f} KB in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_ROOT)
+    from profiling import profile
+    with profile("build_brief_index"):
+        code = main()
+    sys.exit(code)
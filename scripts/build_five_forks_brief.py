@@ -11,14 +11,10 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 
-try:
-    from docx import Document
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.enum.table import WD_TABLE_ALIGNMENT
-except ImportError:
-    print("ERROR: python-docx not installed. Run: pip install python-docx")
-    sys.exit(1)
+REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+from profiling import profile, span
 
 
 def local_points(temp_f=None, rh_min=None, wind_sust=None):
@@ -89,6 +85,62 @@ def class_from_points(pts):
     return "5 (Extreme)"
 
 
+def class_probabilities(cinputs, counties, days):
+    """
+    Monte Carlo class probabilities for each county/day with numeric inputs
+    Returns {county: [summary per day]} (see ensemble.score_counties), or
+    None when NumPy is missing or no county has forecast inputs.
+    """
+    try:
+        import ensemble
+    except ImportError:
+        return None
+    inputs = {}
+    for county in counties:
+        weather = cinputs.get(county, {}).get("weather", {})
+        rows, prev = [], {}
+        for day in days:
+            w = weather.get(day) or prev
+            rows.append(w)
+            prev = w
+        if any(w.get(k) is not None for w in rows for k in ("temp_max", "rh_min", "wind_20ft")):
+            inputs[county] = rows
+    return ensemble.score_counties(inputs) if inputs else None
+
+
+def index_peaks(data):
+    """
+    The "indices" section (fire_indices.py) from the brief input, falling back
+    to forecasts/forecast_data.json; None when neither has one.
+    """
+    indices = data.get("indices")
+    if indices is None:
+        try:
+            with open(os.path.join(REPO_ROOT, "forecasts", "forecast_data.json")) as f:
+                indices = json.load(f).get("indices")
+        except (OSError, ValueError):
+            return None
+    return indices if indices and indices.get("counties") else None
+
+
+def nws_alert_lines(counties):
+    """Active NWS fire weather products (nws_alerts.py) for the brief counties"""
+    try:
+        with open(os.path.join(REPO_ROOT, "data", "nws_alerts.json")) as f:
+            alerts = json.load(f).get("alerts", [])
+        from nws_alerts import unexpired
+        alerts = unexpired(alerts)
+    except (OSError, ValueError, ImportError):
+        return []
+    lines = []
+    for a in alerts:
+        ours = [c for c in a.get("counties", []) if c in counties]
+        if ours:
+            lines.append(f"🚩 NWS {a['event']}: {', '.join(ours)} until {a.get('ends') or 'further notice'}")
+    return lines
+
+
+@span()
 def build_doc(data, out_docx):
     """
     Build the Five Forks Fire Weather Brief DOCX from JSON input.
@@ -97,6 +149,17 @@ def build_doc(data, out_docx):
         data: Dictionary containing fire weather data
         out_docx: Output path for DOCX file
     """
+    # python-docx is only needed here; keep module import cheap for callers
+    # that just want local_points/class_from_points
+    try:
+        from docx import Document
+        from docx.shared import Pt
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.enum.table import WD_TABLE_ALIGNMENT
+    except ImportError:
+        print("ERROR: python-docx not installed. Run: pip install python-docx")
+        sys.exit(1)
+
     try:
         # Validate required structure
         if "meta" not in data:
@@ -141,6 +204,10 @@ def build_doc(data, out_docx):
         p2 = doc.add_paragraph(subtitle_text)
         p2.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
+        # Official NWS products in effect lead the brief
+        for line in nws_alert_lines(counties):
+            doc.add_paragraph().add_run(line).bold = True
+        
         doc.add_paragraph()
         
         # CSI summary
@@ -242,6 +309,61 @@ def build_doc(data, out_docx):
         
         doc.add_paragraph()
         
+        # Class probabilities from perturbed forecasts (temp/RH/wind error)
+        probs = class_probabilities(cinputs, counties, dates[:3])
+        if probs:
+            doc.add_paragraph("🎲 Local Class Probabilities (forecast uncertainty)")
+            ptable = doc.add_table(rows=1, cols=4)
+            ptable.alignment = WD_TABLE_ALIGNMENT.CENTER
+            for i, h in enumerate(["County"] + [d.strftime('%b %d') for d in (d1_parsed, d2_parsed, d3_parsed)]):
+                cell = ptable.rows[0].cells[i]
+                cell.text = h
+                try:
+                    cell.paragraphs[0].runs[0].font.bold = True
+                except (IndexError, AttributeError):
+                    pass
+            import ensemble
+            for county, days in probs.items():
+                row = ptable.add_row().cells
+                row[0].text = county
+                for i, day in enumerate(days):
+                    local = day["local"]
+                    row[i + 1].text = (f"{ensemble.describe(local)}\n"
+                                       f"P(≥Mod) {local['exceedance']['2'] * 100:.0f}%  "
+                                       f"P(High) {local['exceedance']['3'] * 100:.0f}%")
+            doc.add_paragraph()
+        
+        # Hourly FFWI / HDW peaks for the brief days
+        indices = index_peaks(data)
+        if indices:
+            doc.add_paragraph("🌬️ Fire Weather Indices (hourly forecast peaks, LST)")
+            itable = doc.add_table(rows=1, cols=4)
+            itable.alignment = WD_TABLE_ALIGNMENT.CENTER
+            for i, h in enumerate(["County"] + [d.strftime('%b %d') for d in (d1_parsed, d2_parsed, d3_parsed)]):
+                cell = itable.rows[0].cells[i]
+                cell.text = h
+                try:
+                    cell.paragraphs[0].runs[0].font.bold = True
+                except (IndexError, AttributeError):
+                    pass
+            offset = timedelta(hours=indices.get("tzOffsetHours", -5))
+            for county in counties:
+                entry = indices["counties"].get(county)
+                if not entry:
+                    continue
+                by_date = {d["date"]: d for d in entry["days"]}
+                row = itable.add_row().cells
+                row[0].text = county
+                for i, day in enumerate((d1, d2, d3)):
+                    peak = by_date.get(day, {})
+                    f, h = peak.get("ffwi"), peak.get("hdw")
+                    if not f:
+                        row[i + 1].text = "n/a"
+                        continue
+                    at = datetime.fromisoformat(f["at"].rstrip("Z")) + offset
+                    row[i + 1].text = f"FFWI {f['peak']:.0f} @ {at:%H}00\nHDW {h['peak']:.0f}"
+            doc.add_paragraph()
+        
         # Logic recap (3 columns)
         doc.add_paragraph("🔥 Local vs DOF Class Logic Recap")
         t2 = doc.add_table(rows=1, cols=3)
@@ -325,15 +447,19 @@ def build_doc(data, out_docx):
         sys.exit(1)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3:
+def main(argv=None):
+    """Command-line entry: build_five_forks_brief.py <input.json> <output.docx>"""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if len(argv) < 2:
         print("Usage: python scripts/build_five_forks_brief.py <input.json> <output.docx>")
         print("\nExample:")
         print("  python scripts/build_five_forks_brief.py fire_weather.json briefs/$(date +%Y%m%d).docx")
         sys.exit(1)
     
-    input_json = sys.argv[1]
-    output_docx = sys.argv[2]
+    input_json = argv[0]
+    output_docx = argv[1]
     
     # Validate input file exists
     if not os.path.exists(input_json):
@@ -357,3 +483,8 @@ if __name__ == "__main__":
         print(f"Created directory: {output_dir}")
     
     build_doc(data, output_docx)
+
+
+if __name__ == "__main__":
+    with profile("build_five_forks_brief"):
+        main()
@@ -15,25 +15,30 @@ def check_county_alerts(county_data):
     alerts = []
     
     name = county_data.get('name', 'Unknown')
-    wind = county_data.get('wind', 0)
-    gust = county_data.get('gust', 0)
-    rh = county_data.get('rh', 100)
-    temp = county_data.get('temp_f', 0)
+    # None = not reported (or rejected by QC); 0 is a real reading
+    wind = county_data.get('wind')
+    gust = county_data.get('gust')
+    rh = county_data.get('rh')
+    temp = county_data.get('temp', county_data.get('temp_f'))
     
     # Check wind conditions
-    if gust >= WIND_THRESHOLD:
+    if gust is not None and gust >= WIND_THRESHOLD:
         alerts.append(f"💨 High wind gusts: {gust} mph (threshold: {WIND_THRESHOLD} mph)")
-    elif wind >= WIND_THRESHOLD:
+    elif wind is not None and wind >= WIND_THRESHOLD:
         alerts.append(f"🌬️ High winds: {wind} mph (threshold: {WIND_THRESHOLD} mph)")
     
     # Check humidity
-    if rh <= HUMIDITY_THRESHOLD:
+    if rh is not None and rh <= HUMIDITY_THRESHOLD:
         alerts.append(f"💧 Low humidity: {rh}% (threshold: {HUMIDITY_THRESHOLD}%)")
     
     # Check temperature
-    if temp >= TEMP_THRESHOLD:
+    if temp is not None and temp >= TEMP_THRESHOLD:
         alerts.append(f"🌡️ High temperature: {temp}°F (threshold: {TEMP_THRESHOLD}°F)")
     
+    # Official NWS products merged in by nws_alerts.py
+    for a in county_data.get('nwsAlerts') or []:
+        alerts.append(f"🚩 NWS {a['event']} until {a.get('ends') or 'further notice'}")
+    
     return alerts
 
 def main():
@@ -55,7 +60,7 @@ def main():
                     'county': county.get('name', 'Unknown'),
                     'alerts': alerts,
                     'conditions': {
-                        'temp': county.get('temp_f'),
+                        'temp': county.get('temp', county.get('temp_f')),
                         'rh': county.get('rh'),
                         'wind': county.get('wind'),
                         'gust': county.get('gust')
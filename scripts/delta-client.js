@@ -0,0 +1,86 @@
+// scripts/delta-client.js
+// Keeps a local copy of a published feed ('firms' or 'counties') current by
+// applying delta files from data/deltas/<feed>/, falling back to the full
+// snapshot when the client is too far behind. State is cached in localStorage.
+
+(function(global) {
+  'use strict';
+
+  // Must match delta_feed.hotspot_key / county_key on the Python side
+  const FEED_KEYS = {
+    firms: h => `${h.latitude.toFixed(4)},${h.longitude.toFixed(4)},${h.acq_date || ''},${h.acq_time || ''},${h.satellite || ''}`,
+    counties: c => c.name
+  };
+
+  // Where the record list lives inside each snapshot file
+  const SNAPSHOT_FIELD = { firms: 'hotspots', counties: 'counties' };
+
+  function getJSON(url) {
+    return fetch(url, { cache: 'no-cache' }).then(r => {
+      if (!r.ok) throw new Error(`Failed to fetch ${url}: ${r.status}`);
+      return r.json();
+    });
+  }
+
+  function loadCached(feed) {
+    try {
+      const raw = localStorage.getItem(`feed:${feed}`);
+      return raw ? JSON.parse(raw) : null;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function saveCached(feed, state) {
+    try {
+      localStorage.setItem(`feed:${feed}`, JSON.stringify(state));
+    } catch (e) {
+      console.warn(`Could not cache feed ${feed}:`, e);
+    }
+  }
+
+  function applyDelta(records, delta, keyFn) {
+    delta.removed.forEach(key => { delete records[key]; });
+    delta.added.concat(delta.changed).forEach(rec => { records[keyFn(rec)] = rec; });
+  }
+
+  async function loadSnapshot(feed, latest) {
+    const snap = await getJSON(latest.snapshot);
+    const records = {};
+    (snap[SNAPSHOT_FIELD[feed]] || []).forEach(rec => { records[FEED_KEYS[feed](rec)] = rec; });
+    return { seq: snap.seq || 0, records };
+  }
+
+  // Returns { seq, records: {key: record} }; only changed data is downloaded
+  // when the cached copy is within the retained delta range
+  async function syncFeed(feed) {
+    const keyFn = FEED_KEYS[feed];
+    if (!keyFn) throw new Error(`Unknown feed: ${feed}`);
+    const latest = await getJSON(`data/deltas/${feed}/latest.json`);
+    let state = loadCached(feed);
+
+    if (state && state.seq === latest.seq) return state;
+
+    if (state && state.seq < latest.seq && state.seq + 1 >= latest.deltas.first) {
+      try {
+        for (let seq = state.seq + 1; seq <= latest.seq; seq++) {
+          const delta = await getJSON(`data/deltas/${feed}/delta-${seq}.json`);
+          if (delta.base !== state.seq) throw new Error(`Delta ${seq} does not follow ${state.seq}`);
+          applyDelta(state.records, delta, keyFn);
+          state.seq = delta.seq;
+        }
+        saveCached(feed, state);
+        return state;
+      } catch (err) {
+        console.warn(`Delta sync for ${feed} failed, reloading snapshot:`, err);
+      }
+    }
+
+    state = await loadSnapshot(feed, latest);
+    saveCached(feed, state);
+    return state;
+  }
+
+  global.syncFeed = syncFeed;
+
+})(window);
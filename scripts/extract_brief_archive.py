@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Extract the class tables from every archived brief into one dataset.
+
+- Five_Forks_Brief_*.docx: the County x (Local, DOF) x 3-day table and the
+  per-day CSI of the "Day | CSI | ..." summary, read straight from
+  word/document.xml with zipfile + iterparse (no python-docx)
+- brief-*.html: the County / DOF Readiness / inputs table
+
+Output data/brief_archive.json is columnar, with one list per field and one
+row per brief x forecast day x county:
+  issued, file, source, date, lead, county, local_class, local_points,
+  dof_class, dof_label, csi, temp_f, min_rh, wind_mph, days_since_rain, rain_in
+
+Files are parsed in a process pool. The raw tables are cached by content
+hash in data/brief_archive_cache.json, so a re-run only parses briefs whose
+content is new; an unchanged size and mtime skips even the hashing.
+
+Usage:
+  python scripts/extract_brief_archive.py [--workers N] [--backtest]
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from xml.etree.ElementTree import iterparse
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BRIEFS_DIR = os.path.join(REPO_ROOT, "briefs")
+OUTPUT_FILE = os.path.join(REPO_ROOT, "data", "brief_archive.json")
+CACHE_FILE = os.path.join(REPO_ROOT, "data", "brief_archive_cache.json")
+
+# Bump when the raw extraction format changes to invalidate the cache
+CACHE_VERSION = 3
+
+# Below this many files a process pool costs more than it saves
+MIN_PARALLEL_FILES = 16
+
+COLUMNS = ("issued", "file", "source", "date", "lead", "county",
+           "local_class", "local_points", "dof_class", "dof_label", "csi",
+           "temp_f", "min_rh", "wind_mph", "days_since_rain", "rain_in")
+
+DOCX_RE = re.compile(r"^Five_Forks_Brief_(\d{8})_(\d{6})\.docx$")
+HTML_RE = re.compile(r"^brief-(\d{4}-\d{2}-\d{2})\.html$")
+CLASS_RE = re.compile(r"^\s*(\d)(?:\s*[–-]\s*(\d))?")
+POINTS_RE = re.compile(r"\((\d+) pts\)")
+DAY_HEADER_RE = re.compile(r"^([A-Z][a-z]{2} \d{2}) (Local|DOF)$")
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# ---------------------------------------------------------------------------
+# Raw extraction (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def docx_tables(path):
+    """All tables in a .docx as lists of rows of cell text, streamed"""
+    tables, rows, cells, text = [], [], [], []
+    depth = 0
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as fh:
+        for event, elem in iterparse(fh, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == W + "tbl":
+                    depth += 1
+            elif tag == W + "t":
+                text.append(elem.text or "")
+            elif tag == W + "tc":
+                cells.append("".join(text))
+                text = []
+            elif tag == W + "tr":
+                rows.append(cells)
+                cells = []
+            elif tag == W + "tbl":
+                depth -= 1
+                tables.append(rows)
+                rows = []
+                elem.clear()
+            elif tag == W + "p" and depth == 0:
+                text = []     # paragraph text outside tables is not needed
+                elem.clear()
+    return tables
+
+
+def extract_docx(path):
+    """
+    {"days": ["Aug 22", ...], "rows": [[county, local, dof, ...]],
+     "csi": [[day, csi], ...]} from the county table and the CSI summary
+    """
+    raw = {"days": [], "rows": [], "csi": []}
+    for table in docx_tables(path):
+        if not table or not table[0]:
+            continue
+        header = [h.strip() for h in table[0]]
+        if header[0] == "County" and not raw["days"]:
+            for h in header[1:]:
+                m = DAY_HEADER_RE.match(h)
+                if m and m.group(2) == "Local":
+                    raw["days"].append(m.group(1))
+            raw["rows"] = [r for r in table[1:] if r and r[0].strip()]
+        elif header[:2] == ["Day", "CSI"] and not raw["csi"]:
+            raw["csi"] = [[r[0].strip(), r[1].strip()] for r in table[1:] if len(r) > 1]
+    return raw
+
+
+class _TableParser(HTMLParser):
+    """Header row and body rows of every <table>, with its class attribute"""
+
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        self._row, self._cell, self._in_tbody = None, None, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append({"class": (dict(attrs).get("class") or "").split(),
+                                "headers": [], "rows": []})
+        elif tag == "tbody":
+            self._in_tbody = True
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th"):
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "tbody":
+            self._in_tbody = False
+        elif tag in ("td", "th") and self._cell is not None and self._row is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+        elif tag == "tr" and self._row is not None and self.tables:
+            table = self.tables[-1]
+            if self._in_tbody:
+                table["rows"].append(self._row)
+            elif not table["headers"]:
+                table["headers"] = self._row
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def extract_html(path):
+    """
+    {"headers": [...], "rows": [[...]]} from a generate_briefs HTML brief's
+    county table (class "county-table"; briefs from before the ensemble and
+    indices tables have only that one table, untagged)
+    """
+    parser = _TableParser()
+    with open(path, "r", encoding="utf-8") as fh:
+        parser.feed(fh.read())
+    tables = [t for t in parser.tables if "county-table" in t["class"]] or parser.tables[:1]
+    if not tables:
+        return {"headers": [], "rows": []}
+    return {"headers": tables[0]["headers"], "rows": tables[0]["rows"]}
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def extract(path):
+    """Worker entry point: (sha256, raw tables) for one brief"""
+    raw = extract_docx(path) if path.endswith(".docx") else extract_html(path)
+    return file_sha256(path), raw
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+def parse_class(label):
+    """Class number from '2 (Moderate)', '1 (Low) (0 pts)', '1–2' (ranges: the higher)"""
+    m = CLASS_RE.match(label or "")
+    if not m:
+        return None
+    return max(int(g) for g in m.groups() if g)
+
+
+def parse_points(label):
+    m = POINTS_RE.search(label or "")
+    return int(m.group(1)) if m else None
+
+
+def parse_number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_day(month_day, issued):
+    """'Aug 22' -> ISO date in the year that puts it nearest the issue date"""
+    try:
+        day = datetime.datetime.strptime(f"{month_day} {issued.year}", "%b %d %Y").date()
+    except ValueError:
+        return None
+    if (day - issued).days > 180:
+        day = day.replace(year=day.year - 1)
+    elif (issued - day).days > 180:
+        day = day.replace(year=day.year + 1)
+    return day.isoformat()
+
+
+def csi_by_lead(days, csi_rows):
+    """
+    CSI per forecast day of the county table: summary rows are matched on
+    their day label, or taken in order when the labels are not "Aug 22" style
+    """
+    values = {day: parse_number(csi) for day, csi in csi_rows}
+    if any(day in values for day in days):
+        return [values.get(day) for day in days]
+    return [parse_number(csi_rows[lead][1]) if lead < len(csi_rows) else None
+            for lead in range(len(days))]
+
+
+def file_rows(fname, raw):
+    """Dataset rows (dicts) for one brief's raw tables"""
+    rows = []
+    m = DOCX_RE.match(fname)
+    if m:
+        issued = datetime.datetime.strptime(m.group(1), "%Y%m%d").date()
+        days = raw["days"]
+        csi = csi_by_lead(days, raw.get("csi", []))
+        for cells in raw["rows"]:
+            for lead, month_day in enumerate(days):
+                if len(cells) < 3 + 2 * lead:
+                    break
+                local, dof = cells[1 + 2 * lead], cells[2 + 2 * lead]
+                rows.append({
+                    "issued": issued.isoformat(), "file": fname, "source": "docx",
+                    "date": resolve_day(month_day, issued), "lead": lead,
+                    "county": cells[0].strip(),
+                    "local_class": parse_class(local), "local_points": parse_points(local),
+                    "dof_class": parse_class(dof), "dof_label": dof.strip(),
+                    "csi": csi[lead],
+                })
+        return rows
+
+    m = HTML_RE.match(fname)
+    if m:
+        headers = raw["headers"]
+        for cells in raw["rows"]:
+            values = dict(zip(headers, cells))
+            readiness = values.get("DOF Readiness", "")
+            rows.append({
+                "issued": m.group(1), "file": fname, "source": "html",
+                "date": m.group(1), "lead": 0,
+                "county": values.get("County", ""),
+                "dof_class": parse_class(readiness), "dof_label": readiness,
+                "temp_f": parse_number(values.get("Temp (°F)")),
+                "min_rh": parse_number(values.get("Min RH (%)")),
+                "wind_mph": parse_number(values.get("Wind (mph)")),
+                "days_since_rain": parse_number(values.get("Days since rain")),
+                "rain_in": parse_number(values.get("Rain (in)")),
+            })
+    return rows
+
+
+def to_columns(rows):
+    return {col: [r.get(col) for r in rows] for col in COLUMNS}
+
+
+# ---------------------------------------------------------------------------
+# Cache and driver
+# ---------------------------------------------------------------------------
+
+def load_cache(path=CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            cache = json.load(fh)
+        if cache.get("version") == CACHE_VERSION:
+            return cache
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {"version": CACHE_VERSION, "files": {}, "raw": {}}
+
+
+def save_cache(cache, path=CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(cache, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def list_briefs(briefs_dir=BRIEFS_DIR):
+    return sorted(f for f in os.listdir(briefs_dir) if DOCX_RE.match(f) or HTML_RE.match(f))
+
+
+def build_dataset(workers=None, briefs_dir=BRIEFS_DIR, cache_path=CACHE_FILE):
+    """Parse new/changed briefs and return (columns, stats)"""
+    cache = load_cache(cache_path)
+    names = list_briefs(briefs_dir)
+
+    # Unchanged size/mtime skips a file without reading it; otherwise it is
+    # hashed and only parsed if that content has not been seen (a fresh
+    # checkout resets every mtime but changes no hashes)
+    todo, queued = [], set()
+    for fname in names:
+        path = os.path.join(briefs_dir, fname)
+        st = os.stat(path)
+        known = cache["files"].get(fname)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime \
+                and known["sha256"] in cache["raw"]:
+            continue
+        digest = file_sha256(path)
+        cache["files"][fname] = {"sha256": digest, "size": st.st_size, "mtime": st.st_mtime}
+        if digest in cache["raw"] or digest in queued:
+            continue
+        queued.add(digest)
+        todo.append(fname)
+
+    paths = [os.path.join(briefs_dir, f) for f in todo]
+    if len(paths) >= MIN_PARALLEL_FILES and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(extract, paths, chunksize=8))
+    else:
+        results = [extract(p) for p in paths]
+
+    for fname, (digest, raw) in zip(todo, results):
+        st = os.stat(os.path.join(briefs_dir, fname))
+        cache["files"][fname] = {"sha256": digest, "size": st.st_size, "mtime": st.st_mtime}
+        cache["raw"][digest] = raw
+
+    # Forget deleted files and raw tables nothing points at any more
+    cache["files"] = {f: cache["files"][f] for f in names}
+    live = {entry["sha256"] for entry in cache["files"].values()}
+    cache["raw"] = {h: raw for h, raw in cache["raw"].items() if h in live}
+    save_cache(cache, cache_path)
+
+    rows = []
+    for fname in names:
+        rows.extend(file_rows(fname, cache["raw"][cache["files"][fname]["sha256"]]))
+    rows.sort(key=lambda r: (r["date"] or "", r["county"], r["issued"], r["file"]))
+    return to_columns(rows), {"files": len(names), "parsed": len(todo), "rows": len(rows)}
+
+
+def backtest(columns):
+    """Agreement between local classes and DOF calls across the archive"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from build_five_forks_brief import class_from_points, local_points
+
+    pairs = []
+    for i in range(len(columns["county"])):
+        dof = columns["dof_class"][i]
+        if dof is None:
+            continue
+        if columns["temp_f"][i] is not None:
+            # Inputs recorded: re-run the current local_points on them
+            pts = local_points(columns["temp_f"][i], columns["min_rh"][i], columns["wind_mph"][i])
+            local = parse_class(class_from_points(pts))
+        else:
+            local = columns["local_class"][i]
+        if local is not None:
+            pairs.append((local, dof))
+
+    if not pairs:
+        print("No rows with both a local and a DOF class")
+        return
+    agree = sum(1 for l, d in pairs if l == d)
+    print(f"\n📊 Local vs DOF over {len(pairs)} county-days: "
+          f"{agree / len(pairs):.1%} agree, "
+          f"mean (local − DOF) {sum(l - d for l, d in pairs) / len(pairs):+.2f} classes")
+    classes = sorted({c for pair in pairs for c in pair})
+    print("   local \\ DOF " + " ".join(f"{c:>6}" for c in classes))
+    for lc in classes:
+        counts = [sum(1 for l, d in pairs if l == lc and d == dc) for dc in classes]
+        print(f"   {lc:>11} " + " ".join(f"{n:>6}" for n in counts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract class tables from archived briefs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parser processes (default: CPU count; 1 = no pool)")
+    parser.add_argument("--backtest", action="store_true",
+                        help="print local-vs-DOF agreement over the archive")
+    args = parser.parse_args(argv)
+
+    columns, stats = build_dataset(workers=args.workers)
+    dates = [d for d in columns["date"] if d]
+    output = {
+        "generated": datetime.datetime.utcnow().isoformat() + "Z",
+        "files": stats["files"],
+        "rows": stats["rows"],
+        "start": min(dates) if dates else None,
+        "end": max(dates) if dates else None,
+        "columns": columns,
+    }
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as fh:
+        json.dump(output, fh, separators=(",", ":"))
+
+    print(f"WROTE {OUTPUT_FILE}: {stats['rows']} rows from {stats['files']} briefs "
+          f"({stats['parsed']} parsed, {stats['files'] - stats['parsed']} cached)")
+    if args.backtest:
+        backtest(columns)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_ROOT)
+    from profiling import profile
+    with profile("extract_brief_archive"):
+        code = main()
+    sys.exit(code)
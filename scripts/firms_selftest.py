@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Self-test of the FIRMS latency tiers through fetch_firms.main()
+
+- Starts a stand-in FIRMS area API on localhost and points the fetcher at it
+  with FIRMS_BASE_URL (no network or map key needed)
+- Run 1 serves ultra-real-time (URT) rows only; run 2 adds the NRT records
+  that supersede two of them; run 3 serves NRT for all three
+- Each run writes firms_data.json in a temporary directory (the overpass
+  schedule, delta feed and freshness store are redirected there too) and the
+  tier values and counts are checked against what the run should publish
+- Exits 1 on the first failed check
+
+Usage:
+  python scripts/firms_selftest.py
+"""
+
+import contextlib
+import functools
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CSV_HEADER = ("latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,"
+              "instrument,confidence,version,bright_ti5,frp,daynight")
+
+# Three Suomi-NPP detections inside Virginia, all from one afternoon scan
+DETECTIONS = [(37.2101, -77.6012), (37.5523, -78.9004), (38.0410, -78.4987)]
+SCAN_TIME = "1840"
+NRT_SHIFT_DEG = 0.001        # NRT geolocation differs slightly from URT (< 1 cell)
+
+
+def rows(version, detections, shift=0.0):
+    """CSV rows for `detections` as FIRMS tags them with `version`"""
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    return [f"{lat + shift:.4f},{lon + shift:.4f},340.1,0.39,0.36,{today},{SCAN_TIME},N,VIIRS,"
+            f"nominal,{version},290.5,6.2,D" for lat, lon in detections]
+
+
+class StubFirms(BaseHTTPRequestHandler):
+    """/api/area/csv/KEY/SOURCE/west,south,east,north/DAYS/DATE -> rows in the box"""
+
+    rows = {}                  # {source id: [csv row, ...]}, swapped between runs
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[:3] != ["api", "area", "csv"] or len(parts) < 6:
+            self.send_error(404)
+            return
+        west, south, east, north = (float(v) for v in parts[5].split(","))
+        body = [CSV_HEADER] + [
+            r for r in self.rows.get(parts[4], [])
+            if south <= float(r.split(",")[0]) <= north and west <= float(r.split(",")[1]) <= east]
+        data = ("\n".join(body) + "\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_fetch(fetch_firms, source_rows, expect_tiers, expect_count, failures):
+    """One fetch_firms.main() run against `source_rows`; appends failed checks"""
+    StubFirms.rows = source_rows
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        fetch_firms.main([])
+    with open("firms_data.json") as fh:
+        data = json.load(fh)
+    listed = {}
+    for h in data.get("hotspots", []):
+        listed[h.get("tier")] = listed.get(h.get("tier"), 0) + 1
+    checks = [
+        ("count", data.get("count"), expect_count),
+        ("hotspots listed", len(data.get("hotspots", [])), expect_count),
+        ("tiers", data.get("tiers"), expect_tiers),
+        ("hotspot tier values", listed, expect_tiers),
+    ]
+    for name, got, want in checks:
+        ok = got == want
+        print(f"  {'PASS' if ok else 'FAIL'} {name}: {got}" + ("" if ok else f" (expected {want})"))
+        if not ok:
+            failures.append(name)
+    if failures:
+        print(out.getvalue())
+    return data
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFirms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # fetch_firms reads both at import time
+    os.environ["FIRMS_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["FIRMS_MAP_KEY"] = "selftest"
+    sys.path.insert(0, REPO_ROOT)
+    import delta_feed
+    import fetch_firms
+    import freshness
+    import overpass
+
+    failures = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "firms_schedule.json")
+        with mock.patch.object(overpass, "load_state",
+                               functools.partial(overpass.load_state, path=state_file)), \
+             mock.patch.object(overpass, "save_state",
+                               functools.partial(overpass.save_state, path=state_file)), \
+             mock.patch.object(delta_feed, "stage", functools.partial(
+                 delta_feed.stage, root=os.path.join(tmp, "deltas"))), \
+             mock.patch.object(freshness, "STORE_DIR", os.path.join(tmp, "freshness")):
+            os.chdir(tmp)
+            try:
+                sat = fetch_firms.SATELLITES["VIIRS_SNPP"]
+                print("🧪 Run 1: URT only")
+                run_fetch(fetch_firms, {sat: rows("2.0URT", DETECTIONS)},
+                          {"URT": 3}, 3, failures)
+                print("🧪 Run 2: NRT supersedes two URT detections")
+                run_fetch(fetch_firms, {sat: rows("2.0URT", DETECTIONS)
+                                        + rows("2.0NRT", DETECTIONS[:2], NRT_SHIFT_DEG)},
+                          {"NRT": 2, "URT": 1}, 3, failures)
+                print("🧪 Run 3: NRT for every detection")
+                run_fetch(fetch_firms, {sat: rows("2.0NRT", DETECTIONS, NRT_SHIFT_DEG)},
+                          {"NRT": 3}, 3, failures)
+            finally:
+                os.chdir(cwd)
+    server.shutdown()
+
+    if failures:
+        print(f"❌ FIRMS self-test failed: {', '.join(failures)}")
+        return 1
+    print("✅ FIRMS self-test passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
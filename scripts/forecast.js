@@ -12,8 +12,68 @@
     'Greensville County', 'Nottoway County', 'Prince George County'
   ];
 
+  // Sharded static API (scripts/publish_api.py): the manifest maps each
+  // shard to a content hash, so only the shards this view needs are fetched
+  // and unchanged ones stay cached
+  let manifestPromise = null;
+  function loadManifest() {
+    if (!manifestPromise) {
+      manifestPromise = fetch('api/manifest.json', { cache: 'no-cache' })
+        .then(r => (r.ok ? r.json() : null))
+        .catch(() => null);
+    }
+    return manifestPromise;
+  }
+
+  async function loadCountyShard(county) {
+    const manifest = await loadManifest();
+    if (!manifest) return null;
+    const slug = (manifest.counties || {})[county.replace(/ County$/, '')];
+    if (!slug) return null;
+    const path = `counties/${slug}/${manifest.latestDate}.json`;
+    const hash = (manifest.files || {})[path];
+    if (!hash) return null;
+    try {
+      const r = await fetch(`api/${path}?v=${hash}`);
+      return r.ok ? await r.json() : null;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  // Published classes are 1-5 (or ranges like "1–2"); use the highest
+  const CLASS_NAMES = { 1: 'Low', 2: 'Moderate', 3: 'High', 4: 'Very High', 5: 'Extreme' };
+  const CLASS_CSS = {
+    'Low': 'class-low', 'Moderate': 'class-mod', 'High': 'class-high',
+    'Very High': 'class-vhigh', 'Extreme': 'class-extreme'
+  };
+  // Missing or QC-rejected readings are null in the shards: print '–' (prerender num())
+  const num = (value, digits) => {
+    if (value === null || value === undefined) return '–';
+    return digits ? Number(value).toFixed(digits) : String(value);
+  };
+  const classLabel = (value) => {
+    const nums = String(value == null ? '' : value).match(/[1-5]/g);
+    if (!nums) return null;
+    return CLASS_NAMES[Math.max(...nums.map(Number))];
+  };
+
   // Helper to fetch weather and compute classes
   async function getCountyData(county) {
+    const shard = await loadCountyShard(county);
+    if (shard && shard.observations && shard.observations.temp != null) {
+      const obs = shard.observations;
+      const fc = shard.forecast || {};
+      const fallback = classLabel(obs.dangerClass) || 'Low';
+      return {
+        county,
+        dofClass: classLabel(fc.dof) || fallback,
+        localClass: classLabel(fc.local) || fallback,
+        temp: obs.temp, rh: obs.rh, wind: obs.wind,
+        rain: (shard.antecedents && shard.antecedents.rain_24h) || 0
+      };
+    }
+
     // Placeholder demo data – replace with real DOF API and local logic as available
     // You can load from forecasts/ JSON files in repo, or call NWS gridpoints if desired
     const rnd = Math.random();
@@ -53,15 +113,15 @@
     // Build rows: for each county, two lines (DOF and LOCAL)
     rows.forEach(row => {
       const makeRow = (source, classVal) => {
-        const classCss = classVal === 'High' ? 'class-high' : classVal === 'Moderate' ? 'class-mod' : 'class-low';
+        const classCss = CLASS_CSS[classVal] || 'class-low';
         const cells = [
           { text: row.county, cls: 'row-county src' },
           { text: source, cls: 'src' },
           { text: classVal, cls: classCss },
-          { text: row.temp.toString() },
-          { text: row.rh.toString() },
-          { text: row.wind.toString() },
-          { text: row.rain.toFixed(2) }
+          { text: num(row.temp) },
+          { text: num(row.rh) },
+          { text: num(row.wind) },
+          { text: num(row.rain, 2) }
         ];
         cells.forEach((cell, idx) => {
           const d = document.createElement('div');
@@ -79,7 +139,9 @@
     }
   }
 
-  // Initialize
+  // Initialize; a grid pre-rendered by scripts/prerender.py is already
+  // current for the published date, so nothing is fetched
+  if (grid.dataset.prerendered) return;
   grid.innerHTML = '';
   await buildGrid();
 })();
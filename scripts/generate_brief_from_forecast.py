@@ -29,16 +29,18 @@ def generate_brief_input():
         data = json.load(f)
         county_data = data.get("counties", [])
 
-    # Transform data for brief generation
+    # Transform data for brief generation. Readings that are missing or were
+    # rejected by QC (obs_qc.screen) stay null rather than turning into 0 °F,
+    # 0 % RH or calm wind; local_points() scores None as "no data".
     counties_list = []
     for county in county_data:
         counties_list.append({
             "name": county.get("name", "Unknown"),
-            "temp_f": county.get("temp", 0),
-            "rh_percent": county.get("rh", 0),
-            "dew_point_f": county.get("dewPoint", 0),
-            "wind_mph": county.get("wind", 0),
-            "gust_mph": county.get("gust", 0),
+            "temp_f": county.get("temp"),
+            "rh_percent": county.get("rh"),
+            "dew_point_f": county.get("dewPoint"),
+            "wind_mph": county.get("wind"),
+            "gust_mph": county.get("gust"),
             "danger_class": county.get("dangerClass", 1),
             "danger_level": map_danger_class_to_level(county.get("dangerClass", 1)),
         })
@@ -70,5 +72,9 @@ def generate_brief_input():
 
 
 if __name__ == "__main__":
-    success = generate_brief_input()
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from profiling import profile
+    with profile("generate_brief_from_forecast"):
+        success = generate_brief_input()
     exit(0 if success else 1)
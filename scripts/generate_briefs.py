@@ -4,12 +4,22 @@ Generate daily briefs (HTML) from repo data.
 
 - Reads data/counties.json
 - Optionally reads data/weather.json (county keyed) if present
+- Fills antecedents/observed values from the local observation store
+  (data/observations.db) when it has history for a county
+- Takes days since rain, 48 h rain and KBDI (as CSI fallback) from the
+  drought engine checkpoint (data/drought_state.json) when present
 - Computes DOF readiness score per provided DOF method
+- Adds a class probability table when forecasts/forecast_data.json carries
+  an "ensemble" section (ensemble.py), and a daily FFWI/HDW peak table for
+  its "indices" section (fire_indices.py)
+- Lists active NWS Red Flag Warnings / Fire Weather Watches for our counties
+  from data/nws_alerts.json (nws_alerts.py)
 - Writes briefs/brief-YYYY-MM-DD.html and updates briefs/index.html
 """
 
 import json
 import os
+import sys
 import datetime
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -17,6 +27,43 @@ DATA_DIR = os.path.join(REPO_ROOT, "data")
 BRIEFS_DIR = os.path.join(REPO_ROOT, "briefs")
 COUNTIES_FILE = os.path.join(DATA_DIR, "counties.json")
 WEATHER_FILE = os.path.join(DATA_DIR, "weather.json")  # optional per-county weather snapshots
+OBS_DB = os.path.join(DATA_DIR, "observations.db")  # written by fetch_weather.py
+DROUGHT_FILE = os.path.join(DATA_DIR, "drought_state.json")  # written by drought_index.py
+FORECAST_FILE = os.path.join(REPO_ROOT, "forecasts", "forecast_data.json")  # "ensemble"/"indices" sections
+NWS_ALERTS_FILE = os.path.join(DATA_DIR, "nws_alerts.json")  # written by nws_alerts.py
+
+# Archive search on briefs/index.html (index: scripts/build_brief_index.py)
+SEARCH_HTML = """<h2>Search the archive</h2>
+<form id="briefSearch"><input id="briefQuery" size="48" placeholder="dinwiddie dof:4 &nbsp; county:Amelia local:3-5 &nbsp; from:2026-03-01">
+<button>Search</button></form>
+<p id="briefSearchStatus"></p>
+<ul id="briefSearchResults"></ul>
+<script src="../scripts/brief-search.js"></script>
+<script>
+(function() {
+  let index = null;
+  const status = document.getElementById('briefSearchStatus');
+  const results = document.getElementById('briefSearchResults');
+  document.getElementById('briefSearch').addEventListener('submit', async e => {
+    e.preventDefault();
+    try {
+      index = index || await BriefSearch.load('search-index.json');
+    } catch (err) {
+      status.textContent = 'Search index not available';
+      return;
+    }
+    const t0 = performance.now();
+    const hits = BriefSearch.search(index, document.getElementById('briefQuery').value);
+    status.textContent = `${hits.length} of ${index.docs.file.length} briefs (${(performance.now() - t0).toFixed(1)} ms)`;
+    results.innerHTML = hits.slice(0, 200).map(h =>
+      `<li><a href="./${h.file}">${h.issued} ${h.file}</a>${h.csi !== null ? ` CSI ${h.csi}` : ''}</li>`).join('');
+  });
+})();
+</script>"""
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+from profiling import profile, span
 
 os.makedirs(BRIEFS_DIR, exist_ok=True)
 
@@ -27,6 +74,50 @@ def load_json(path):
     except Exception:
         return None
 
+def apply_observed_history(weather_map, counties, db_path=OBS_DB):
+    """Overlay values computed from stored NWS history onto weather_map"""
+    if not os.path.exists(db_path):
+        return weather_map
+    from obs_store import ObservationStore
+
+    with ObservationStore(db_path) as store:
+        for c in counties:
+            name = c.get("name")
+            summary = store.county_summary(name)
+            if not summary:
+                continue
+            entry = weather_map.setdefault(name, {})
+            for key in ("days_since_rain", "rainfall_inches", "temp_f", "min_rh", "wind_mph"):
+                if summary.get(key) is not None:
+                    entry[key] = summary[key]
+    return weather_map
+
+def active_nws_alerts(path=NWS_ALERTS_FILE):
+    """Unexpired alerts from the last nws_alerts.py poll ([] when there is none)"""
+    alerts = (load_json(path) or {}).get("alerts", [])
+    try:
+        from nws_alerts import unexpired
+    except ImportError:         # requests not installed; the poll already dropped expired ones
+        return alerts
+    return unexpired(alerts)
+
+
+def apply_drought_state(weather_map, path=DROUGHT_FILE):
+    """Overlay antecedents from the incremental drought engine onto weather_map"""
+    state = load_json(path)
+    if not state:
+        return weather_map
+    for name, snap in state.get("summary", {}).items():
+        entry = weather_map.setdefault(name, {})
+        if snap.get("days_since_rain") is not None:
+            entry["days_since_rain"] = snap["days_since_rain"]
+        if snap.get("rain_48h") is not None:
+            entry["rainfall_inches"] = snap["rain_48h"]
+        # DOF CSI is Keetch-Byram based; use our KBDI only when no CSI was supplied
+        if entry.get("csi") is None and snap.get("kbdi") is not None:
+            entry["csi"] = snap["kbdi"]
+    return weather_map
+
 def days_since_rain_weight(days):
     if days <= 1: return 1
     if days == 2: return 2
@@ -92,7 +183,79 @@ def readiness_level(sum_score):
     if 16 <= sum_score <= 18: return (4, "Very High")
     return (5, "Extreme")
 
-def make_brief(counties, weather_map, date_str):
+@span()
+def ensemble_section(ens):
+    """HTML table of Monte Carlo local-class probabilities per county and day"""
+    if not ens or not ens.get("counties"):
+        return ""
+    from ensemble import describe
+    html_rows = ""
+    for county, days in ens["counties"].items():
+        cells = "".join(
+            f"<td>{describe(d['local'])}<br><small>P(≥Mod) {d['local']['exceedance']['2'] * 100:.0f}% · "
+            f"P(High) {d['local']['exceedance']['3'] * 100:.0f}%</small></td>"
+            for d in days)
+        html_rows += f"<tr><td>{county}</td>{cells}</tr>\n"
+    return f"""<h2>Local class probabilities</h2>
+<p>{ens.get('samples')} perturbed forecasts per county and day (temp, RH and wind error).</p>
+<table class="ensemble-table">
+<thead><tr><th>County</th><th>Day 1</th><th>Day 2</th><th>Day 3</th></tr></thead>
+<tbody>
+{html_rows}</tbody>
+</table>
+"""
+
+
+def nws_alerts_section(alerts):
+    """Banner listing active official NWS fire weather products"""
+    if not alerts:
+        return ""
+    items = "".join(
+        f"<li><strong>{a['event']}</strong> — {', '.join(a['counties'])}"
+        f" until {a.get('ends') or 'further notice'}<br><small>{a.get('headline') or ''}</small></li>\n"
+        for a in alerts)
+    return f"""<div class="level-5" style="padding:8px 12px;margin:12px 0">
+<h2>NWS fire weather products in effect</h2>
+<ul>
+{items}</ul>
+</div>
+"""
+
+
+@span()
+def indices_section(ind, days=3):
+    """HTML table of daily peak FFWI and HDW (with local peak hour) per county"""
+    if not ind or not ind.get("counties"):
+        return ""
+    critical = ind.get("ffwiCritical", 50)
+    offset = datetime.timedelta(hours=ind.get("tzOffsetHours", -5))
+    dates = []
+    html_rows = ""
+    for county, entry in ind["counties"].items():
+        dates = dates or [d["date"] for d in entry["days"][:days]]
+        cells = ""
+        for d in entry["days"][:days]:
+            f, h = d.get("ffwi"), d.get("hdw")
+            if not f:
+                cells += "<td>n/a</td>"
+                continue
+            at = datetime.datetime.fromisoformat(f["at"].rstrip("Z")) + offset
+            style = ' class="level-4"' if f["peak"] >= critical else ""
+            cells += (f"<td{style}>FFWI {f['peak']:.0f} @ {at:%H}00"
+                      f"<br><small>HDW {h['peak']:.0f}</small></td>")
+        html_rows += f"<tr><td>{county}</td>{cells}</tr>\n"
+    heads = "".join(f"<th>{d}</th>" for d in dates)
+    return f"""<h2>Fire weather indices (hourly forecast peaks)</h2>
+<p>Fosberg FFWI and Hot-Dry-Windy Index from the NWS hourly forecast; peak hour is local standard time. FFWI &ge; {critical} is highlighted.</p>
+<table class="indices-table">
+<thead><tr><th>County</th>{heads}</tr></thead>
+<tbody>
+{html_rows}</tbody>
+</table>
+"""
+
+
+def make_brief(counties, weather_map, date_str, ensemble=None, indices=None, nws_alerts=None):
     rows = []
     for c in counties:
         name = c.get("name")
@@ -163,7 +326,7 @@ th{{background:#f4f4f4}}
 <body>
 <h1>{title}</h1>
 <p>Generated: {date_str}</p>
-<table>
+{nws_alerts_section(nws_alerts)}<table class="county-table">
 <thead>
 <tr><th>County</th><th>DOF Readiness</th><th>Temp (°F)</th><th>Min RH (%)</th><th>Wind (mph)</th><th>Days since rain</th><th>Rain (in)</th></tr>
 </thead>
@@ -171,7 +334,7 @@ th{{background:#f4f4f4}}
 {html_rows}
 </tbody>
 </table>
-</body></html>"""
+{ensemble_section(ensemble)}{indices_section(indices)}</body></html>"""
     return html
 
 def main():
@@ -193,12 +356,17 @@ def main():
                 "csi": None,
                 "greenup": None
             }
+    weather_map = apply_observed_history(weather_map, counties)
+    weather_map = apply_drought_state(weather_map)
 
     today = datetime.date.today()
     date_str = today.isoformat()
     filename = f"brief-{date_str}.html"
     outpath = os.path.join(BRIEFS_DIR, filename)
-    html = make_brief(counties, weather_map, date_str)
+    forecast = load_json(FORECAST_FILE) or {}
+    official = active_nws_alerts()
+    html = make_brief(counties, weather_map, date_str,
+                      forecast.get("ensemble"), forecast.get("indices"), official)
     with open(outpath, "w", encoding="utf-8") as fh:
         fh.write(html)
 
@@ -210,6 +378,7 @@ def main():
 <ul>
 <li><a href="./{filename}">Brief {date_str}</a></li>
 </ul>
+{SEARCH_HTML}
 </body></html>"""
     with open(index_path, "w", encoding="utf-8") as fh:
         fh.write(index_html)
@@ -217,4 +386,5 @@ def main():
     print("WROTE", outpath, "and", index_path)
 
 if __name__ == "__main__":
-    main()
+    with profile("generate_briefs"):
+        main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Pre-render the dashboard's county cards and forecast grid into static HTML.
+
+- County cards (what dashboard.js builds after loadCountyList): centroids from
+  data/data/counties.json, observations and danger class from
+  county_data.json, NWS alerts from the last nws_alerts.py poll
+  (data/nws_alerts.json, newer than county_data.json between weather runs)
+  and the 1-hr fuel line from data/fuel_moisture.json
+- Forecast grid (what scripts/forecast.js builds): the county shards for the
+  latest date listed in api/manifest.json, so run it after publish_api.py
+- Writes partials/county-cards.html and partials/forecast-grid.html and
+  copies both into index.html between <!-- prerender:NAME --> markers, so the
+  page shows current conditions before any JavaScript runs
+- dashboard.js and forecast.js find the data-prerendered markup and keep it
+  instead of fetching and rebuilding it; cards carry the counties feed seq
+  (data-seq) so dashboard.js only applies newer deltas over them. Files are
+  only rewritten when their content changes
+"""
+
+import datetime
+import html
+import json
+import os
+import re
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PARTIALS_DIR = os.path.join(REPO_ROOT, "partials")
+INDEX_FILE = os.path.join(REPO_ROOT, "index.html")
+COUNTIES_FILE = os.path.join(REPO_ROOT, "data", "data", "counties.json")
+COUNTY_DATA_FILE = os.path.join(REPO_ROOT, "county_data.json")  # written by fetch_weather.py
+FUEL_FILE = os.path.join(REPO_ROOT, "data", "fuel_moisture.json")  # written by fuel_moisture.py
+MANIFEST_FILE = os.path.join(REPO_ROOT, "api", "manifest.json")  # written by publish_api.py
+
+# Labels for danger classes 1-5 (card colors are .danger-N in style.css,
+# matching spatial_interp.CLASS_PALETTE)
+CLASS_NAMES = {1: "Low", 2: "Moderate", 3: "High", 4: "Very High", 5: "Extreme"}
+
+GRID_HEADERS = ("County", "Source", "Class Day", "Temp (°F)", "RH (%)", "Wind (mph)", "Rain (in)")
+GRID_CSS = {"Low": "class-low", "Moderate": "class-mod", "High": "class-high",
+            "Very High": "class-vhigh", "Extreme": "class-extreme"}
+
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception:
+        return None
+
+
+def parse_time(value):
+    """Naive UTC datetime from an ISO string ("...Z" or offset), or None"""
+    try:
+        dt = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def num(value, digits=0):
+    """Number as the front end prints it; '–' when missing"""
+    if value is None:
+        return "–"
+    if digits:
+        return f"{float(value):.{digits}f}"
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def class_label(value):
+    """CLASS_NAMES label for the highest class in a published value (2, "1–2"), as forecast.js"""
+    digits = re.findall(r"[1-5]", "" if value is None else str(value))
+    if not digits:
+        return None
+    return CLASS_NAMES[max(int(d) for d in digits)]
+
+
+# ---------------------------------------------------------------------------
+# County cards
+# ---------------------------------------------------------------------------
+
+def fuel_text(entry, start, issued):
+    """dashboard.js fuelMoistureText() at the issue time"""
+    series = (entry or {}).get("1hr") or []
+    if not series or start is None or issued is None:
+        return None
+    hour = int((issued - start).total_seconds() // 3600)
+    now = series[max(0, min(len(series) - 1, hour))]
+    if now is None:
+        return None
+    text = f"1-hr fuel: {num(now)}% (7-day min {num(entry.get('min1hr'))}%)"
+    if entry.get("firstCritical1hr") is not None:
+        text += " ⚠️"
+    return text
+
+
+def obs_text(obs):
+    """Observation line (dashboard.js updateCountyCard() builds the same)"""
+    if obs.get("temp") is None:
+        return ""
+    wind = f"Wind {num(obs.get('wind'))} mph"
+    if obs.get("gust"):
+        wind += f" (gust {num(obs['gust'])})"
+    return f"{num(obs['temp'])}°F · RH {num(obs.get('rh'))}% · {wind}"
+
+
+def county_card(county, obs, fuel_line, seq):
+    esc = html.escape
+    danger = obs.get("dangerClass")
+    classes = "county-card" + (f" danger-{danger}" if danger in CLASS_NAMES else "")
+    danger_line = f"Class {danger} · {CLASS_NAMES[danger]}" if danger in CLASS_NAMES else ""
+    lines = [
+        f'<div class="{classes}" data-county="{esc(county["name"])}" data-lat="{county["lat"]}" '
+        f'data-lon="{county["lon"]}" data-danger="{danger if danger in CLASS_NAMES else ""}" '
+        f'data-seq="{seq}" data-prerendered>',
+        f'  <h3>{esc(county["name"])}</h3>',
+        f'  <p class="small">Lat: {county["lat"]}, Lon: {county["lon"]}</p>',
+        f'  <p class="danger">{danger_line}</p>',
+        f'  <p class="small obs">{obs_text(obs)}</p>',
+    ]
+    for alert in obs.get("nwsAlerts") or []:
+        lines.append(f'  <p class="alert">🚩 {esc(alert["event"])} until {esc(alert.get("ends") or "further notice")}</p>')
+    lines.append(f'  <p class="status">{esc(fuel_line or "Data: not fetched in this build")}</p>')
+    lines.append("</div>")
+    return "\n".join(lines)
+
+
+def render_cards():
+    """(fragment, county count) for #countyGrid"""
+    counties = load_json(COUNTIES_FILE) or []
+    county_data = load_json(COUNTY_DATA_FILE) or {}
+    fuel = load_json(FUEL_FILE) or {}
+    # nws_alerts.py only writes data/nws_alerts.json; apply it here so the
+    # 5-minute poll reaches the cards without touching county_data.json
+    import nws_alerts
+    nws_alerts.apply_to_counties(county_data.get("counties", []))
+    observed = {c["name"]: c for c in county_data.get("counties", [])}
+    issued = parse_time(county_data.get("lastUpdated"))
+    start = parse_time(fuel.get("start"))
+
+    cards = []
+    for county in counties:
+        entry = (fuel.get("counties") or {}).get(county["name"])
+        cards.append(county_card(county, observed.get(county["name"], {}),
+                                 fuel_text(entry, start, issued), county_data.get("seq") or 0))
+    return "\n".join(cards), len(cards)
+
+
+# ---------------------------------------------------------------------------
+# Forecast grid
+# ---------------------------------------------------------------------------
+
+def grid_rows(manifest):
+    """forecast.js getCountyData() per county from the latest-date shards"""
+    rows = []
+    date = manifest.get("latestDate")
+    for name, slug in sorted((manifest.get("counties") or {}).items()):
+        shard = load_json(os.path.join(REPO_ROOT, "api", "counties", slug, f"{date}.json"))
+        if not shard:
+            continue
+        obs = shard.get("observations") or {}
+        fc = shard.get("forecast") or {}
+        fallback = class_label(obs.get("dangerClass")) or "Low"
+        rows.append({
+            "county": f"{name} County",
+            "dof": class_label(fc.get("dof")) or fallback,
+            "local": class_label(fc.get("local")) or fallback,
+            "temp": obs.get("temp"),
+            "rh": obs.get("rh"),
+            "wind": obs.get("wind"),
+            "rain": (shard.get("antecedents") or {}).get("rain_24h") or 0,
+        })
+    return rows
+
+
+def render_grid():
+    """(fragment, row count) for the forecast card"""
+    manifest = load_json(MANIFEST_FILE) or {}
+    rows = grid_rows(manifest)
+    esc = html.escape
+    date = esc(manifest.get("latestDate") or "")
+    lines = [f'<div class="forecast-grid" id="forecastGrid" data-prerendered="{date}">']
+    lines += [f'  <div class="head">{esc(h)}</div>' for h in GRID_HEADERS]
+    for row in rows:
+        for source, label in (("DOF", row["dof"]), ("Local", row["local"])):
+            cells = [
+                (row["county"], "row-county src"),
+                (source, "src"),
+                (label, GRID_CSS[label]),
+                (num(row["temp"]), ""),
+                (num(row["rh"]), ""),
+                (num(row["wind"]), ""),
+                (num(row["rain"], 2), ""),
+            ]
+            lines += [f'  <div class="{" ".join(["cell"] + cls.split())}">{esc(text)}</div>'
+                      for text, cls in cells]
+    lines.append("</div>")
+    lines.append(f'<p class="small">Forecast for {date} · updated <span id="forecastLastUpdate">'
+                 f'{esc(manifest.get("generated") or "")}</span></p>')
+    return "\n".join(lines), len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def write_if_changed(path, text):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            if fh.read() == text:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    return True
+
+
+def inject(page, name, fragment):
+    """Replace what sits between the page's prerender markers for `name`"""
+    start, end = f"<!-- prerender:{name} -->", f"<!-- /prerender:{name} -->"
+    i = page.find(start)
+    j = page.find(end, i)
+    if i < 0 or j < 0:
+        return None
+    return page[:i + len(start)] + "\n" + fragment + "\n" + page[j:]
+
+
+def main():
+    fragments = {}
+    fragments["county-cards"], n_cards = render_cards()
+    fragments["forecast-grid"], n_rows = render_grid()
+
+    written = []
+    for name, fragment in fragments.items():
+        partial = f"<!-- Generated by scripts/prerender.py; copied into index.html -->\n{fragment}\n"
+        if write_if_changed(os.path.join(PARTIALS_DIR, f"{name}.html"), partial):
+            written.append(f"partials/{name}.html")
+
+    with open(INDEX_FILE, "r", encoding="utf-8") as fh:
+        page = fh.read()
+    for name, fragment in fragments.items():
+        updated = inject(page, name, fragment)
+        if updated is None:
+            print(f"WARNING: index.html has no <!-- prerender:{name} --> marker")
+            continue
+        page = updated
+    if write_if_changed(INDEX_FILE, page):
+        written.append("index.html")
+
+    print(f"PRERENDERED {n_cards} county cards, {n_rows} forecast counties; "
+          f"wrote {', '.join(written) if written else 'nothing (unchanged)'}")
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, REPO_ROOT)
+    from profiling import profile
+    with profile("prerender"):
+        main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Publish a sharded static data API for the front end.
+
+- api/counties/<slug>/<YYYY-MM-DD>.json : one small file per county per day
+  (observations, forecast classes, brief links)
+- api/briefs/page-<n>.json              : paginated index of every archived brief
+- api/manifest.json                     : content hash per shard for cache busting
+
+Shards contain no run timestamps and are only rewritten when their content
+changes, so unchanged shards keep the same bytes and hash and CDN caches for
+them stay valid. Views load api/manifest.json and then only the shards they
+need, appending ?v=<hash>.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import re
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+API_DIR = os.path.join(REPO_ROOT, "api")
+BRIEFS_DIR = os.path.join(REPO_ROOT, "briefs")
+COUNTY_DATA_FILE = os.path.join(REPO_ROOT, "county_data.json")
+FORECAST_FILE = os.path.join(REPO_ROOT, "forecasts", "forecast_data.json")
+FUEL_FILE = os.path.join(REPO_ROOT, "data", "fuel_moisture.json")
+DROUGHT_FILE = os.path.join(REPO_ROOT, "data", "drought_state.json")
+MANIFEST_FILE = os.path.join(API_DIR, "manifest.json")
+
+BRIEF_PAGE_SIZE = 50
+FORECAST_DAYS = 3
+
+HTML_BRIEF_RE = re.compile(r"^brief-(\d{4}-\d{2}-\d{2})\.html$")
+DOCX_BRIEF_RE = re.compile(r"^Five_Forks_Brief_(\d{4})(\d{2})(\d{2})_\d{6}\.docx$")
+
+
+def load_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except Exception:
+        return None
+
+
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def write_shard(rel_path, obj):
+    """Write obj as compact JSON if its content changed; return its hash"""
+    body = json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    path = os.path.join(API_DIR, rel_path)
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == body:
+                return digest
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(body)
+    return digest
+
+
+def scan_briefs():
+    """All archived briefs grouped by date, newest first"""
+    by_date = {}
+    for fname in os.listdir(BRIEFS_DIR):
+        m = HTML_BRIEF_RE.match(fname)
+        if m:
+            by_date.setdefault(m.group(1), {"html": None, "docx": []})["html"] = f"briefs/{fname}"
+            continue
+        m = DOCX_BRIEF_RE.match(fname)
+        if m:
+            date = f"{m.group(1)}-{m.group(2)}-{m.group(3)}"
+            by_date.setdefault(date, {"html": None, "docx": []})["docx"].append(f"briefs/{fname}")
+    entries = []
+    for date in sorted(by_date, reverse=True):
+        entry = by_date[date]
+        entries.append({"date": date, "html": entry["html"], "docx": sorted(entry["docx"])})
+    return entries
+
+
+def publish_brief_index(entries, files):
+    """Paginated brief index; returns the number of pages"""
+    pages = max(1, -(-len(entries) // BRIEF_PAGE_SIZE))
+    for n in range(pages):
+        chunk = entries[n * BRIEF_PAGE_SIZE:(n + 1) * BRIEF_PAGE_SIZE]
+        rel = f"briefs/page-{n + 1}.json"
+        files[rel] = write_shard(rel, {
+            "page": n + 1,
+            "pages": pages,
+            "total": len(entries),
+            "briefs": chunk,
+        })
+    return pages
+
+
+def publish_county_shards(issue_date, briefs_by_date, files):
+    """One shard per county per forecast day starting at issue_date"""
+    county_data = load_json(COUNTY_DATA_FILE) or {}
+    forecast = load_json(FORECAST_FILE) or {}
+    fuel = (load_json(FUEL_FILE) or {}).get("counties", {})
+    drought = (load_json(DROUGHT_FILE) or {}).get("summary", {})
+
+    observed = {c["name"]: c for c in county_data.get("counties", [])}
+    classes = {row["county"]: row for row in forecast.get("classes", [])}
+    ensemble = (forecast.get("ensemble") or {}).get("counties", {})
+    names = sorted(set(observed) | set(classes))
+
+    for name in names:
+        slug = slugify(name)
+        for offset in range(FORECAST_DAYS):
+            day = issue_date + datetime.timedelta(days=offset)
+            day_str = day.isoformat()
+            cls = classes.get(name, {})
+            shard = {
+                "county": name,
+                "date": day_str,
+                "forecast": {
+                    "local": cls.get(f"day{offset + 1}Local"),
+                    "dof": cls.get(f"day{offset + 1}DOF"),
+                },
+                "briefs": briefs_by_date.get(day_str),
+            }
+            days = ensemble.get(name, [])
+            if offset < len(days):
+                shard["forecast"]["probabilities"] = {k: days[offset][k] for k in ("local", "dangerClass")}
+            if offset == 0:
+                obs = observed.get(name)
+                if obs:
+                    shard["observations"] = {k: v for k, v in obs.items() if k != "name"}
+                if name in drought:
+                    shard["antecedents"] = {k: v for k, v in drought[name].items() if k != "as_of"}
+                if name in fuel:
+                    shard["fuelMoisture"] = {"min1hr": fuel[name].get("min1hr"),
+                                             "firstCritical1hr": fuel[name].get("firstCritical1hr")}
+            rel = f"counties/{slug}/{day_str}.json"
+            files[rel] = write_shard(rel, shard)
+    return names
+
+
+def main():
+    manifest = load_json(MANIFEST_FILE) or {}
+    files = dict(manifest.get("files", {}))
+
+    county_data = load_json(COUNTY_DATA_FILE) or {}
+    issued = county_data.get("lastUpdated")
+    issue_date = (datetime.date.fromisoformat(issued[:10]) if issued
+                  else datetime.date.today())
+
+    entries = scan_briefs()
+    pages = publish_brief_index(entries, files)
+    names = publish_county_shards(issue_date, {e["date"]: e for e in entries}, files)
+
+    manifest = {
+        "generated": datetime.datetime.utcnow().isoformat() + "Z",
+        "latestDate": issue_date.isoformat(),
+        "counties": {name: slugify(name) for name in names},
+        "briefs": {"pages": pages, "pageSize": BRIEF_PAGE_SIZE, "total": len(entries)},
+        "files": dict(sorted(files.items())),
+    }
+    os.makedirs(API_DIR, exist_ok=True)
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+
+    print(f"WROTE {len(names)} counties x {FORECAST_DAYS} days, "
+          f"{pages} brief pages ({len(entries)} dates), {MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, REPO_ROOT)
+    from profiling import profile
+    with profile("publish_api"):
+        main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Spatial interpolation for station gap-filling and gridded fire-danger surfaces
+- Inverse-distance weighting (default) or a kriging-lite variant
+  (ordinary kriging with an auto-fitted exponential variogram)
+- Fills counties whose NWS fetch failed from the counties that were observed,
+  instead of reporting them as low danger
+- Renders a regular lat/lon danger-class grid for Virginia as an indexed PNG
+  overlay (data/danger_grid.png) with its bounds in data/danger_grid.json
+
+Everything is vectorized over grid cells (processed in chunks), so a full-state
+1 km grid is well under a second on one core.
+
+Usage:
+  python spatial_interp.py [--method idw|kriging] [--resolution-km 1.0]
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+from geo import load_boundary, polygon_bbox, points_in_polygon, project_km
+from profiling import profile
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+COUNTY_DATA_FILE = os.path.join(REPO_ROOT, "county_data.json")
+COUNTIES_FILE = os.path.join(REPO_ROOT, "data", "data", "counties.json")
+GRID_PNG = os.path.join(REPO_ROOT, "data", "danger_grid.png")
+GRID_META = os.path.join(REPO_ROOT, "data", "danger_grid.json")
+
+# Met fields interpolated for a missing county
+FILL_FIELDS = ("temp", "rh", "dewPoint", "wind", "gust")
+
+# RGB per danger class 1-5 (index 0 = outside Virginia / no data, transparent)
+CLASS_PALETTE = [
+    (0, 0, 0),
+    (76, 175, 80),    # 1 Low
+    (255, 235, 59),   # 2 Moderate
+    (255, 152, 0),    # 3 High
+    (244, 67, 54),    # 4 Very High
+    (139, 0, 0),      # 5 Extreme
+]
+
+CHUNK = 65536
+
+
+def idw(xs, ys, values, qx, qy, power=2.0):
+    """
+    Inverse-distance weighted estimate at query points (km coordinates)
+    `values` may be (N,) or (N, F); every field shares one weight matrix.
+    """
+    xs, ys, values = (np.asarray(a, dtype=float) for a in (xs, ys, values))
+    qx, qy = np.ravel(qx), np.ravel(qy)
+    out = np.empty((qx.size,) + values.shape[1:])
+    for i in range(0, qx.size, CHUNK):
+        dx = qx[i:i + CHUNK, None] - xs[None, :]
+        dy = qy[i:i + CHUNK, None] - ys[None, :]
+        d2 = np.maximum(dx * dx + dy * dy, 1e-12)
+        w = 1.0 / d2 if power == 2.0 else d2 ** (-power / 2)
+        w /= w.sum(axis=1, keepdims=True)
+        out[i:i + CHUNK] = w @ values
+    return out
+
+
+def kriging_lite(xs, ys, values, qx, qy):
+    """
+    Ordinary kriging with an exponential variogram fitted from the data
+    (sill = sample variance, range = 1/3 of the mean station spacing).
+    Falls back to IDW with fewer than three stations. `values` may be
+    (N,) or (N, F); the variogram is fitted on the first field.
+    """
+    xs, ys, values = (np.asarray(a, dtype=float) for a in (xs, ys, values))
+    n = values.shape[0]
+    if n < 3:
+        return idw(xs, ys, values, qx, qy)
+    d = np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :])
+    first = values if values.ndim == 1 else values[:, 0]
+    sill = max(float(first.var()), 1e-6)
+    rng = max(float(d[np.triu_indices(n, 1)].mean()) / 3.0, 1e-3)
+    nugget = 0.01 * sill
+
+    def gamma(h):
+        return np.where(h > 0, nugget + sill * (1.0 - np.exp(-h / rng)), 0.0)
+
+    A = np.ones((n + 1, n + 1))
+    A[:n, :n] = gamma(d)
+    A[n, n] = 0.0
+    # Fold the solved system and station values into one (n+1, F) matrix so
+    # each grid chunk needs a single matmul
+    coef = np.linalg.pinv(A).T[:, :n] @ values
+
+    qx, qy = np.ravel(qx), np.ravel(qy)
+    out = np.empty((qx.size,) + values.shape[1:])
+    for i in range(0, qx.size, CHUNK):
+        h = np.hypot(qx[i:i + CHUNK, None] - xs[None, :], qy[i:i + CHUNK, None] - ys[None, :])
+        b = np.ones((h.shape[0], n + 1))
+        b[:, :n] = gamma(h)
+        out[i:i + CHUNK] = b @ coef
+    return out
+
+
+METHODS = {"idw": idw, "kriging": kriging_lite}
+
+
+def interpolate(points, field, qlon, qlat, method="idw"):
+    """
+    Interpolate `field` from points [{lat, lon, field}] (None values skipped)
+    to query lon/lat arrays. Returns None when no point has the field.
+    """
+    known = [p for p in points if p.get(field) is not None]
+    if not known:
+        return None
+    xs, ys = project_km([p["lon"] for p in known], [p["lat"] for p in known])
+    qx, qy = project_km(qlon, qlat)
+    est = METHODS[method](xs, ys, [p[field] for p in known], qx, qy)
+    return est.reshape(np.shape(qlon))
+
+
+def danger_class_grid(temp, rh, wind):
+    """Vectorized fetch_weather.calculate_fire_danger_class (same thresholds)"""
+    score = (np.digitize(temp, [65, 75, 85])
+             + (3 - np.digitize(rh, [20, 30, 40], right=True))
+             + np.digitize(wind, [10, 15, 20]))
+    return (1 + np.digitize(score, [2, 4, 6, 8])).astype(np.uint8)
+
+
+def fill_missing_counties(county_data, coords, method="idw"):
+    """
+    Replace None met values for unobserved counties with interpolated ones
+    and recompute their danger class. Counties keep a 'source' of
+    observed / interpolated / unavailable; 'stale' entries (previous values
+    carried over by a deadline-limited run) are left as they are and not
+    used as interpolation points. Returns the names filled.
+    """
+    from fetch_weather import calculate_fire_danger_class
+
+    points = []
+    for c in county_data:
+        loc = coords.get(c["name"])
+        if loc and c.get("source", "observed") == "observed" and c.get("temp") is not None:
+            points.append(dict(c, lat=loc["lat"], lon=loc["lon"]))
+
+    filled = []
+    for c in county_data:
+        if c.get("source") == "stale":
+            continue
+        if c.get("source", "observed") == "observed" and c.get("temp") is not None:
+            c["source"] = "observed"
+            continue
+        loc = coords.get(c["name"])
+        if not points or not loc:
+            c["source"] = "unavailable"
+            c["dangerClass"] = None
+            continue
+        for field in FILL_FIELDS:
+            est = interpolate(points, field, np.array([loc["lon"]]), np.array([loc["lat"]]), method)
+            c[field] = round(float(est[0])) if est is not None else None
+        c["dangerClass"] = calculate_fire_danger_class(c["temp"], c["rh"], c["wind"], c["gust"])
+        c["source"] = "interpolated"
+        filled.append(c["name"])
+    return filled
+
+
+def render_grid(points, resolution_km=1.0, method="idw", ring=None):
+    """
+    Danger-class grid over the Virginia outline
+    Returns (grid uint8 [rows, cols], north-up; 0 outside/no data) and bounds
+    """
+    ring = load_boundary() if ring is None else ring
+    min_lat, min_lon, max_lat, max_lon = polygon_bbox(ring)
+    dlat = resolution_km / 110.57
+    dlon = resolution_km / (111.32 * np.cos(np.radians((min_lat + max_lat) / 2)))
+    lats = np.arange(max_lat - dlat / 2, min_lat, -dlat)
+    lons = np.arange(min_lon + dlon / 2, max_lon, dlon)
+    glon, glat = np.meshgrid(lons, lats)
+
+    mask = points_in_polygon(glon, glat, ring)
+    grid = np.zeros(glon.shape, dtype=np.uint8)
+    qlon, qlat = glon[mask], glat[mask]
+
+    # Interpolate temp, RH and effective wind together so the distance/weight
+    # matrix is built once per chunk
+    stations = [p for p in points
+                if p.get("temp") is not None and p.get("rh") is not None
+                and (p.get("gust") or p.get("wind")) is not None]
+    if stations:
+        xs, ys = project_km([p["lon"] for p in stations], [p["lat"] for p in stations])
+        qx, qy = project_km(qlon, qlat)
+        values = np.array([[p["temp"], p["rh"], p.get("gust") or p.get("wind")]
+                           for p in stations], dtype=float)
+        est = METHODS[method](xs, ys, values, qx, qy)
+        grid[mask] = danger_class_grid(est[:, 0], est[:, 1], est[:, 2])
+
+    bounds = [[float(lats[-1] - dlat / 2), float(min_lon)],
+              [float(max_lat), float(lons[-1] + dlon / 2)]]
+    return grid, bounds
+
+
+def write_png(path, grid, palette=CLASS_PALETTE, alpha=None, level=9):
+    """
+    Write an 8-bit indexed PNG with zlib only
+    alpha: per-palette-entry opacity (default: index 0 transparent, rest opaque)
+    level: zlib compression level
+    """
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    rows, cols = grid.shape
+    raw = np.zeros((rows, cols + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = grid
+    png = b"\x89PNG\r\n\x1a\n"
+    png += chunk(b"IHDR", struct.pack(">IIBBBBB", cols, rows, 8, 3, 0, 0, 0))
+    png += chunk(b"PLTE", bytes(v for rgb in palette for v in rgb))
+    png += chunk(b"tRNS", bytes(alpha if alpha is not None else [0] + [255] * (len(palette) - 1)))
+    png += chunk(b"IDAT", zlib.compress(raw.tobytes(), level))
+    png += chunk(b"IEND", b"")
+    with open(path, "wb") as f:
+        f.write(png)
+    return len(png)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gap-fill counties and render a danger-class grid")
+    parser.add_argument("--method", choices=sorted(METHODS), default="idw")
+    parser.add_argument("--resolution-km", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    with open(COUNTY_DATA_FILE, "r") as f:
+        data = json.load(f)
+    with open(COUNTIES_FILE, "r") as f:
+        coords = {c["name"]: c for c in json.load(f)}
+
+    points = []
+    for c in data.get("counties", []):
+        loc = coords.get(c["name"])
+        if loc and c.get("source", "observed") == "observed" and c.get("temp") is not None:
+            points.append(dict(c, lat=loc["lat"], lon=loc["lon"]))
+    if not points:
+        print("❌ ERROR: no observed counties to interpolate from")
+        return 1
+
+    t0 = time.perf_counter()
+    grid, bounds = render_grid(points, args.resolution_km, args.method)
+    elapsed = (time.perf_counter() - t0) * 1000
+    size = write_png(GRID_PNG, grid)
+
+    meta = {
+        "lastUpdated": datetime.utcnow().isoformat() + "Z",
+        "method": args.method,
+        "resolutionKm": args.resolution_km,
+        "bounds": bounds,
+        "image": "data/danger_grid.png",
+        "stations": len(points),
+        "classCounts": {str(k): int(v) for k, v in zip(*np.unique(grid[grid > 0], return_counts=True))},
+    }
+    with open(GRID_META, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    print(f"✅ {grid.shape[1]}x{grid.shape[0]} danger grid ({args.method}, "
+          f"{args.resolution_km} km) in {elapsed:.0f} ms → {GRID_PNG} ({size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    with profile("spatial_interp"):
+        code = main()
+    sys.exit(code)